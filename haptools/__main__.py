@@ -22,6 +22,36 @@ def main():
     pass
 
 
+def _get_workers(workers: int, threads: int, log) -> int:
+    """
+    Resolve the number of workers from the --workers option and its deprecated
+    --threads alias
+
+    Parameters
+    ----------
+    workers : int
+        The value of the --workers option, or None if it wasn't specified
+    threads : int
+        The value of the --threads option, or None if it wasn't specified
+    log : Logger
+        A logging module to which to warn about the deprecated alias
+
+    Returns
+    -------
+    int
+        The number of worker processes to use
+    """
+    if threads is not None:
+        if workers is not None:
+            raise click.UsageError(
+                "--threads is a deprecated alias of --workers. Please use only "
+                "--workers."
+            )
+        log.warning("--threads is deprecated and will be removed. Use --workers.")
+        workers = threads
+    return 1 if workers is None else workers
+
+
 @main.command()
 @click.option(
     "--bp",
@@ -432,6 +462,22 @@ def simgenotype(
     show_default="all variants",
     help="If using a PGEN file, read genotypes in chunks of X variants; reduces memory",
 )
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=None,
+    show_default="1",
+    help="If using an indexed VCF, read genotypes from X regions in parallel",
+)
+@click.option(
+    "-t",
+    "--threads",
+    type=int,
+    default=None,
+    hidden=True,
+    help="Deprecated alias of --workers",
+)
 @click.option(
     "--repeats",
     type=click.Path(exists=True, path_type=Path),
@@ -478,6 +524,8 @@ def simphenotype(
     ids: tuple[str] = tuple(),
     ids_file: Path = None,
     chunk_size: int = None,
+    workers: int = None,
+    threads: int = None,
     repeats: Path = None,
     seed: int = None,
     output: Path = Path("-"),
@@ -541,6 +589,7 @@ def simphenotype(
         seed,
         output,
         log,
+        _get_workers(workers, threads, log),
     )
 
 
@@ -608,6 +657,25 @@ def simphenotype(
     show_default="all variants",
     help="If using a PGEN file, read genotypes in chunks of X variants; reduces memory",
 )
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=None,
+    show_default="1",
+    help=(
+        "Transform the haplotypes on different contigs or regions in X processes; "
+        "requires a PGEN or an indexed VCF"
+    ),
+)
+@click.option(
+    "-t",
+    "--threads",
+    type=int,
+    default=None,
+    hidden=True,
+    help="Deprecated alias of --workers",
+)
 @click.option(
     "--discard-missing",
     is_flag=True,
@@ -622,6 +690,26 @@ def simphenotype(
     default=False,
     help="Also transform using VCF 'POP' FORMAT field and 'ancestry' .hap extra field",
 )
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    show_default="no cache",
+    help=(
+        "Cache the genotypes of each haplotype in this directory, so that only new or "
+        "changed haplotypes are transformed the next time"
+    ),
+)
+@click.option(
+    "--streaming",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help=(
+        "Read genotypes in chunks of --chunk-size variants and write each haplotype "
+        "as soon as its variants have been read; reduces memory"
+    ),
+)
 @click.option(
     "-o",
     "--output",
@@ -647,8 +735,12 @@ def transform(
     ids: tuple[str] = tuple(),
     ids_file: Path = None,
     chunk_size: int = None,
+    workers: int = None,
+    threads: int = None,
     discard_missing: bool = False,
     ancestry: bool = False,
+    cache_dir: Path = None,
+    streaming: bool = False,
     output: Path = Path("-"),
     verbosity: str = "INFO",
 ):
@@ -696,6 +788,9 @@ def transform(
         ancestry,
         output,
         log,
+        _get_workers(workers, threads, log),
+        streaming,
+        cache_dir,
     )
 
 
@@ -768,6 +863,22 @@ def transform(
     show_default="all variants",
     help="If using a PGEN file, read genotypes in chunks of X variants; reduces memory",
 )
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=None,
+    show_default="1",
+    help="If using an indexed VCF, read genotypes from X regions in parallel",
+)
+@click.option(
+    "-t",
+    "--threads",
+    type=int,
+    default=None,
+    hidden=True,
+    help="Deprecated alias of --workers",
+)
 @click.option(
     "--discard-missing",
     is_flag=True,
@@ -811,6 +922,8 @@ def ld(
     ids: tuple[str] = tuple(),
     ids_file: Path = None,
     chunk_size: int = None,
+    workers: int = None,
+    threads: int = None,
     discard_missing: bool = False,
     from_gts: bool = False,
     output: Path = Path("/dev/stdout"),
@@ -868,6 +981,7 @@ def ld(
         from_gts,
         output,
         log,
+        _get_workers(workers, threads, log),
     )
 
 
@@ -880,6 +994,16 @@ def ld(
     show_default=True,
     help="Sorting of the file will not be performed",
 )
+@click.option(
+    "--ids",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help=(
+        "Instead of a .hap file, index the variant IDs in a VCF, BCF, or PGEN file so"
+        " that variants can be loaded by their IDs without reading the entire file"
+    ),
+)
 @click.option(
     "-o",
     "--output",
@@ -899,6 +1023,7 @@ def ld(
 def index(
     haplotypes: Path,
     sort: bool = True,
+    ids: bool = False,
     output: Path = None,
     verbosity: str = "INFO",
 ):
@@ -906,11 +1031,18 @@ def index(
     Takes in an unsorted .hap file and outputs it as a .gz and a .tbi file
     """
 
-    from .index import index_haps
     from .logging import getLogger
 
     log = getLogger(name="index", level=verbosity)
 
+    if ids:
+        from .index import index_variants
+
+        index_variants(haplotypes, log)
+        return
+
+    from .index import index_haps
+
     index_haps(haplotypes, sort, output, log)
 
 
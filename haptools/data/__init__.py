@@ -6,7 +6,9 @@ from .haplotypes import Extra, Repeat, Variant, Haplotype, Haplotypes
 from .genotypes import (
     Genotypes,
     GenotypesVCF,
+    GenotypesVCFWriter,
     GenotypesTR,
     GenotypesPLINK,
+    GenotypesPLINKWriter,
     GenotypesPLINKTR,
 )
@@ -10,6 +10,11 @@ from logging import getLogger, Logger
 
 import numpy as np
 
+try:
+    import zstandard
+except ModuleNotFoundError:
+    zstandard = None
+
 
 class Data(ABC):
     """
@@ -106,5 +111,12 @@ class Data(ABC):
         ext = os.path.splitext(filename)[1]
         if ext == ".gz":
             return gzip.open(filename, mode)
+        elif ext == ".zst":
+            if zstandard is None:
+                raise ModuleNotFoundError(
+                    "Reading and writing .zst files requires the zstandard package."
+                    " Try running 'pip install zstandard'."
+                )
+            return zstandard.open(filename, mode)
         else:
             return open(filename, mode)
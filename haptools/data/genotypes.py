@@ -1,16 +1,30 @@
 from __future__ import annotations
+import os
 import re
 import gc
+import sys
+import gzip
+import zlib
+import json
+import struct
+import hashlib
+import logging
 from csv import reader
 from pathlib import Path
 from logging import Logger
-from typing import Iterator
-from collections import namedtuple, Counter
+from copy import copy
+from typing import Iterator, Callable
+from functools import lru_cache, partial
+from bisect import bisect_right
+from operator import itemgetter
+from itertools import chain, islice, repeat
+from collections import namedtuple, Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import pgenlib
 import numpy as np
 import numpy.typing as npt
-from pysam import VariantFile
+from pysam import VariantFile, tabix_index
 from cyvcf2 import VCF, Variant
 
 try:
@@ -21,6 +35,676 @@ except ModuleNotFoundError:
 from .data import Data
 
 
+# the number of set bits in each possible byte; used to count alleles in packed data
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(
+    axis=1, dtype=np.uint8
+)
+# regions look like 'chr1', 'chr1:1234', or 'chr1:1234-34566'
+_REGION_RE = re.compile(r"^(?P<chrom>[^:]+)(?::(?P<start>\d+)?(?:-(?P<end>\d+)?)?)?$")
+# the checks that can be run while reading genotypes, in the order they are applied
+_QC_CHECKS = ("missing", "biallelic", "phase", "maf")
+# the number of variants to summarize at once for those checks
+_QC_BLOCK = 1024
+# the max number of elements to move at once when compacting an array in-place
+_COMPACT_BLOCK = 1 << 20
+# the approximate number of characters to parse at once when loading a PVAR file
+_PVAR_BLOCK = 1 << 24
+# the max number of variants (and bytes of buffers) to decode at once from a PGEN file
+# when iterating over it
+_ITER_BLOCK = 1024
+_ITER_BUFFER = 1 << 26
+# the number of variants to format at once when writing a PVAR file
+_PVAR_WRITE_BLOCK = 1 << 16
+# the approximate number of genotypes to format at once when writing a VCF
+_VCF_WRITE_BLOCK = 1 << 22
+# the max number of uncompressed bytes in each BGZF block (the same as bgzip)
+_BGZF_BLOCK = 0xFF00
+# the max number of unrequested variants between two requested ones that are still read
+# in the same seek, when the variants are found via an ID index
+_ID_SEEK_GAP = 16
+# the default max number of bytes of decoded genotypes to keep when reading lazily
+_LAZY_BUDGET = 1 << 28
+# every BGZF file ends with this empty block
+_BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+
+
+def _parse_index(fname: Path | str) -> list[tuple[str, int, int]]:
+    """
+    Summarize each contig in a tabix (.tbi) or CSI (.csi) index
+
+    Parameters
+    ----------
+    fname : Path | str
+        The path to the index
+
+    Raises
+    ------
+    ValueError
+        If the file is neither a tabix nor a CSI index
+
+    Returns
+    -------
+    list[tuple[str, int, int]]
+        The name of each contig (or None if the index doesn't record it), an upper
+        bound on the position of its last record, and its number of records, in the
+        order that the contigs appear in the index
+    """
+    with gzip.open(fname, "rb") as index:
+        magic = index.read(4)
+        if magic == b"TBI\1":
+            is_csi, min_shift, depth = False, 14, 5
+            (n_ref,) = struct.unpack("<i", index.read(4))
+            # the tabix-specific fields come before the names
+            aux = index.read(28)
+            aux += index.read(struct.unpack_from("<i", aux, 24)[0])
+        elif magic == b"CSI\1":
+            is_csi = True
+            min_shift, depth, l_aux = struct.unpack("<3i", index.read(12))
+            aux = index.read(l_aux)
+            (n_ref,) = struct.unpack("<i", index.read(4))
+        else:
+            raise ValueError(f"{fname} is not a tabix or CSI index")
+        names = [None] * n_ref
+        if len(aux) >= 28:
+            names = aux[28:].rstrip(b"\0").decode().split("\0")
+        # bins are numbered level by level, starting with the largest bin
+        # each level has eight times as many bins as the last
+        level_starts = [((1 << (3 * level)) - 1) // 7 for level in range(depth + 2)]
+        # the pseudo-bin records the number of records in each contig
+        pseudo_bin = level_starts[-1] + 1
+        contigs = []
+        for name in names:
+            extent, num_records = 0, 0
+            (n_bin,) = struct.unpack("<i", index.read(4))
+            for _ in range(n_bin):
+                (bin_num,) = struct.unpack("<I", index.read(4))
+                if is_csi:
+                    # skip the loffset field
+                    index.read(8)
+                (n_chunk,) = struct.unpack("<i", index.read(4))
+                chunks = index.read(16 * n_chunk)
+                if bin_num == pseudo_bin:
+                    num_records = struct.unpack_from("<Q", chunks, 16)[0]
+                    continue
+                level = bisect_right(level_starts, bin_num) - 1
+                bin_size = 1 << (min_shift + 3 * (depth - level))
+                extent = max(extent, (bin_num - level_starts[level] + 1) * bin_size)
+            if not is_csi:
+                # skip the linear index
+                (n_intv,) = struct.unpack("<i", index.read(4))
+                index.read(8 * n_intv)
+            contigs.append((name, extent, num_records))
+    return contigs
+
+
+def _read_shard(
+    genotypes: Genotypes,
+    region: str,
+    samples: set[str] = None,
+    variants: set[str] = None,
+) -> Genotypes:
+    """
+    Read the genotypes from a single shard of a file
+
+    This is a helper function for :py:meth:`~.Genotypes._read_shards`. It must be
+    defined at the module level so that it can be sent to other processes.
+
+    Parameters
+    ----------
+    genotypes : Genotypes
+        An empty Genotypes object to read the shard into
+    region : str
+        The region of the shard
+    samples : set[str], optional
+        See documentation for :py:meth:`~.Genotypes.read`
+    variants : set[str], optional
+        See documentation for :py:meth:`~.Genotypes.read`
+
+    Returns
+    -------
+    Genotypes
+        The Genotypes object, with the shard loaded into its properties
+    """
+    # the parent process reports progress for all of the shards, so the workers
+    # should only ever report errors
+    genotypes.log.setLevel(max(genotypes.log.getEffectiveLevel(), logging.ERROR))
+    if genotypes._variant_major:
+        genotypes.read(region, samples, variants, variant_major=True)
+    else:
+        genotypes.read(region=region, samples=samples, variants=variants)
+    return genotypes
+
+
+def _merged_dtype(data: list[npt.NDArray]) -> type:
+    """
+    Choose the dtype of the genotype matrix that results from merging several others
+
+    This is a helper function for :py:meth:`~.Genotypes.merge_variants` and
+    :py:meth:`~.Genotypes.merge_samples`
+
+    Parameters
+    ----------
+    data : list[npt.NDArray]
+        The genotype matrices that will be merged
+
+    Returns
+    -------
+    type
+        np.bool_ if all of the matrices are biallelic bools, or np.uint8 otherwise
+    """
+    # TODO: fix Genotypes.check_biallelic so it always keeps data as np.uint8 and then adjust this code accordingly
+    return np.bool_ if all(arr.dtype == np.bool_ for arr in data) else np.uint8
+
+
+def _compact(
+    arr: npt.NDArray, keep: npt.NDArray[np.bool_], axis: int = 0, inplace: bool = False
+) -> npt.NDArray:
+    """
+    Discard entries of an array along an axis without copying the entire array
+
+    If the caller owns the array and it is writeable and C-contiguous, the entries
+    that should be kept are shifted down to the start of its buffer. Otherwise, the
+    kept entries are copied to a new array.
+
+    Parameters
+    ----------
+    arr : npt.NDArray
+        The array to compact
+    keep : npt.NDArray[np.bool_]
+        A mask denoting the entries along the axis to keep
+    axis : int, optional
+        The axis along which to discard entries
+    inplace : bool, optional
+        Whether the array may be modified in-place
+
+        Only set this if nothing else could be sharing the array's buffer (ex: a view
+        or another Genotypes object), since the buffer will be overwritten
+
+    Returns
+    -------
+    npt.NDArray
+        An array containing only the kept entries
+
+        If the array was compacted in-place, this is a view of the start of its
+        buffer
+    """
+    if not (inplace and arr.flags.writeable and arr.flags.c_contiguous):
+        return np.compress(keep, arr, axis=axis)
+    shape = arr.shape
+    idx = np.flatnonzero(keep)
+    outer, inner = int(np.prod(shape[:axis])), int(np.prod(shape[axis + 1 :]))
+    flat = arr.reshape(-1)
+    if axis == 0:
+        _compact_runs(flat.reshape((shape[0], inner)), idx)
+    elif len(idx):
+        # move blocks of rows, so that the temporary copy of each block stays small
+        view = flat.reshape((outer, shape[axis], inner))
+        row_size = len(idx) * inner
+        step = max(_COMPACT_BLOCK // max(row_size, 1), 1)
+        for start in range(0, outer, step):
+            end = min(start + step, outer)
+            # the kept entries of these rows never begin after the rows themselves
+            flat[start * row_size : end * row_size] = view[start:end, idx].reshape(-1)
+        del view
+    new_shape = shape[:axis] + (len(idx),) + shape[axis + 1 :]
+    return flat[: outer * len(idx) * inner].reshape(new_shape)
+
+
+def _compact_runs(view: npt.NDArray, idx: npt.NDArray):
+    """
+    Shift the kept rows of a 2D array down to the start of the array in-place
+
+    This is a helper function for :py:func:`~._compact`. The kept rows are moved one
+    run of consecutive rows at a time.
+
+    Parameters
+    ----------
+    view : npt.NDArray
+        The array whose rows should be shifted
+    idx : npt.NDArray
+        The indices of the rows to keep, in increasing order
+    """
+    if not len(idx):
+        return
+    # split the kept entries into runs of consecutive entries
+    breaks = np.flatnonzero(np.diff(idx) != 1) + 1
+    starts = idx[np.concatenate(([0], breaks))]
+    ends = idx[np.concatenate((breaks - 1, [len(idx) - 1]))] + 1
+    # move at most this many entries at once, so that any temporary copies that
+    # np makes of overlapping moves stay small
+    max_step = max(_COMPACT_BLOCK // max(view.shape[1], 1), 1)
+    num_kept = 0
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if start != num_kept:
+            step = max(start - num_kept, max_step)
+            for src in range(start, end, step):
+                dest = num_kept + src - start
+                size = min(step, end - src)
+                view[dest : dest + size] = view[src : src + size]
+        num_kept += end - start
+
+
+def _object_array(vals: list) -> npt.NDArray:
+    """
+    Store some values in a one-dimensional array of type object
+
+    Parameters
+    ----------
+    vals : list
+        The values to store
+
+    Returns
+    -------
+    npt.NDArray
+        An array containing the values, which are never copied
+    """
+    arr = np.empty(len(vals), dtype=object)
+    arr[:] = vals
+    return arr
+
+
+def _bgzf_block(data: bytes, level: int = 6) -> bytes:
+    """
+    Compress data into a single BGZF block
+
+    Parameters
+    ----------
+    data : bytes
+        At most _BGZF_BLOCK bytes of uncompressed data
+    level : int, optional
+        The zlib compression level
+
+    Returns
+    -------
+    bytes
+        The BGZF block, including its header and footer
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+    if len(cdata) > len(data):
+        # incompressible data should just be stored instead
+        compressor = zlib.compressobj(0, zlib.DEFLATED, -15)
+        cdata = compressor.compress(data) + compressor.flush()
+    # the BC extra field records the size of the entire block, minus one
+    header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+    header += struct.pack("<H", len(cdata) + 25)
+    return header + cdata + struct.pack("<II", zlib.crc32(data), len(data))
+
+
+class _BGZFWriter:
+    """
+    A binary file that compresses everything written to it into BGZF blocks
+
+    The blocks are compressed in batches by a pool of threads, since zlib releases
+    the GIL while it compresses
+
+    Attributes
+    ----------
+    threads : int
+        The number of threads with which to compress blocks
+    level : int
+        The zlib compression level
+    """
+
+    def __init__(self, fname: Path | str, threads: int = 1, level: int = 6):
+        self.threads = max(threads, 1)
+        self.level = level
+        self._file = open(fname, "wb")
+        self._buffer = bytearray()
+        self._pool = None
+        if self.threads > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.threads)
+
+    def write(self, data: bytes):
+        self._buffer += data
+        # wait until every thread can have a few blocks before compressing them
+        if len(self._buffer) >= _BGZF_BLOCK * 4 * self.threads:
+            self._flush(final=False)
+
+    def _flush(self, final: bool = True):
+        size = len(self._buffer)
+        if not final:
+            # keep the remainder for the next batch, so that blocks stay full
+            size -= size % _BGZF_BLOCK
+        view = memoryview(self._buffer)
+        blocks = [
+            bytes(view[start : start + _BGZF_BLOCK])
+            for start in range(0, size, _BGZF_BLOCK)
+        ]
+        view.release()
+        del self._buffer[:size]
+        levels = repeat(self.level, len(blocks))
+        mapper = map if self._pool is None else self._pool.map
+        for block in mapper(_bgzf_block, blocks, levels):
+            self._file.write(block)
+
+    def close(self):
+        self._flush()
+        self._file.write(_BGZF_EOF)
+        self._file.close()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def __enter__(self) -> _BGZFWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+@lru_cache(maxsize=1)
+def _gt_tokens() -> npt.NDArray:
+    """
+    Create a lookup table from the allele indices and phase of a genotype to its GT
+    token in a VCF
+
+    Returns
+    -------
+    npt.NDArray
+        An array of shape 2 (unphased, phased) x 256 x 256 and type S7, indexed by
+        the phase and then the allele index of each strand. Missing alleles (255) are
+        represented by a period.
+    """
+    alleles = np.array([str(idx) for idx in range(255)] + ["."], dtype="S3")
+    return np.array(
+        [
+            np.char.add(np.char.add(alleles[:, np.newaxis], sep), alleles)
+            for sep in (b"/", b"|")
+        ]
+    )
+
+
+class _QCStats:
+    """
+    Per-variant summaries of genotypes needed by the check_*() methods of the
+    :py:class:`~.Genotypes` class, gathered one block of variants at a time
+
+    This is a helper class for :py:meth:`~.Genotypes.read`
+
+    Attributes
+    ----------
+    checks : set[str]
+        The names of the checks for which to gather summaries
+    miss_first : npt.NDArray[np.int64]
+        The index of the first variant at which each sample is missing a genotype, or
+        -1 if the sample isn't missing any genotypes
+    multiallelic : list[int]
+        The indices of the variants that have more than two alleles in any sample
+    unphased : list[int]
+        The indices of the variants that are heterozygous and unphased in any sample
+    alt_cts : list[int]
+        The number of strands with a non-REF allele at each variant
+    """
+
+    def __init__(self, checks: set[str]):
+        self.checks = checks
+        self.miss_first = None
+        self.multiallelic = []
+        self.unphased = []
+        self.alt_cts = []
+
+    def update(self, start: int, data: npt.NDArray[np.uint8]):
+        """
+        Summarize a block of variants
+
+        Parameters
+        ----------
+        start : int
+            The index of the first variant in the block
+        data : npt.NDArray[np.uint8]
+            The genotypes of the variants in the block, as a k (variants) x n (samples)
+            x 2 (or 3, with phase) array
+        """
+        gts = data[:, :, :2]
+        if "missing" in self.checks:
+            if self.miss_first is None:
+                self.miss_first = np.full(data.shape[1], -1, dtype=np.int64)
+            missing = np.any(gts >= np.iinfo(np.uint8).max - 1, axis=2)
+            new = np.any(missing, axis=0) & (self.miss_first < 0)
+            if np.any(new):
+                self.miss_first[new] = start + missing[:, new].argmax(axis=0)
+        if "biallelic" in self.checks:
+            multiallelic = np.any(gts > 1, axis=(1, 2))
+            self.multiallelic.extend((start + np.flatnonzero(multiallelic)).tolist())
+        if "phase" in self.checks and data.shape[2] > 2:
+            het = (gts[:, :, 0] != 0) ^ (gts[:, :, 1] != 0)
+            unphased = np.any(het & (data[:, :, 2] == 0), axis=1)
+            self.unphased.extend((start + np.flatnonzero(unphased)).tolist())
+        if "maf" in self.checks:
+            self.alt_cts.extend(np.count_nonzero(gts, axis=(1, 2)).tolist())
+
+
+class _StringColumn:
+    """
+    A column of strings stored in a single buffer of UTF-8 bytes, rather than in a
+    fixed-width np array sized to fit the longest string
+
+    Only the rows that are accessed are ever decoded
+
+    This is a helper class for :py:meth:`~.GenotypesPLINK._load_pvar`
+
+    Attributes
+    ----------
+    buffer : bytes
+        The concatenated bytes of every string
+    offsets : npt.NDArray[np.int64]
+        The index in the buffer at which each string starts, followed by the length
+        of the buffer
+    """
+
+    def __init__(self, buffer: bytes, offsets: npt.NDArray[np.int64]):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, strings: list[str]) -> _StringColumn:
+        """
+        Store some strings in a single buffer
+
+        Parameters
+        ----------
+        strings : list[str]
+            The strings to store
+
+        Returns
+        -------
+        _StringColumn
+            The strings, packed into a single buffer
+        """
+        encoded = [val.encode("utf8") for val in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64), out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, indices: npt.NDArray[np.uint32]) -> npt.NDArray:
+        """
+        Decode some of the strings
+
+        Parameters
+        ----------
+        indices : npt.NDArray[np.uint32]
+            The indices of the strings to decode
+
+        Returns
+        -------
+        npt.NDArray
+            An array of type object containing the decoded strings
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        starts, ends = (
+            self.offsets[indices].tolist(),
+            self.offsets[indices + 1].tolist(),
+        )
+        vals = np.empty(len(starts), dtype=object)
+        vals[:] = [
+            self.buffer[start:end].decode("utf8") for start, end in zip(starts, ends)
+        ]
+        return vals
+
+
+class _LazyGenotypes:
+    """
+    A stand-in for :py:attr:`~.Genotypes.data` that decodes the genotypes of each
+    variant only once it is accessed
+
+    It supports the same indexing as an n x p x 2 (or x 3) np array, along with
+    np.take() and np.asarray(). Only the requested variants are ever decoded, and the
+    most recently used ones are cached until they exceed a memory budget. Any other
+    attributes of np arrays are taken from a fully decoded copy of the matrix.
+
+    This is a helper class for :py:meth:`~.Genotypes.read`
+
+    Attributes
+    ----------
+    shape : tuple[int, int, int]
+        The shape of the genotype matrix
+    dtype : np.dtype
+        The type of the genotype matrix
+    """
+
+    ndim = 3
+
+    def __init__(
+        self,
+        decode: Callable[[npt.NDArray[np.intp]], npt.NDArray[np.uint8]],
+        shape: tuple[int, int, int],
+        budget: int = _LAZY_BUDGET,
+    ):
+        """
+        Parameters
+        ----------
+        decode : Callable[[npt.NDArray[np.intp]], npt.NDArray[np.uint8]]
+            A function that decodes the genotypes of the variants at some sorted
+            indices, as an n x k x 2 (or x 3) array with all of the samples
+        shape : tuple[int, int, int]
+            The shape of the genotype matrix
+        budget : int, optional
+            The max number of bytes of decoded genotypes to cache
+        """
+        self._decode = decode
+        self.shape = shape
+        self.dtype = np.dtype(np.uint8)
+        # the samples (among all of the decoded ones) that are visible through this
+        # proxy, or None for all of them
+        self._samp_idx = None
+        # the genotypes of each decoded variant, from least to most recently used
+        self._cache = OrderedDict()
+        self._max_cached = max(1, budget // max(1, shape[0] * shape[2]))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return (
+            f"<lazy genotypes of shape {self.shape}: {len(self._cache)} variants"
+            " decoded>"
+        )
+
+    def _take_variants(self, var_idx: npt.NDArray[np.intp]) -> npt.NDArray[np.uint8]:
+        """
+        Get the genotypes of some variants, decoding any that aren't cached
+
+        Parameters
+        ----------
+        var_idx : npt.NDArray[np.intp]
+            The indices of the variants, in the order in which they should appear
+
+        Returns
+        -------
+        npt.NDArray[np.uint8]
+            An n x len(var_idx) x 2 (or x 3) array
+        """
+        var_idx = np.arange(self.shape[1])[var_idx]
+        uniq = np.unique(var_idx).tolist()
+        missing = [idx for idx in uniq if idx not in self._cache]
+        decoded = {}
+        if missing:
+            arr = self._decode(np.array(missing, dtype=np.intp))
+            decoded = {idx: arr[:, col] for col, idx in enumerate(missing)}
+        columns = {}
+        for idx in uniq:
+            if idx in decoded:
+                columns[idx] = self._cache[idx] = decoded[idx]
+            else:
+                columns[idx] = self._cache[idx]
+                self._cache.move_to_end(idx)
+        while len(self._cache) > self._max_cached:
+            self._cache.popitem(last=False)
+        num_samples = len(next(iter(columns.values()))) if columns else 0
+        out = np.empty((num_samples, len(var_idx), self.shape[2]), dtype=self.dtype)
+        for col, idx in enumerate(var_idx.tolist()):
+            out[:, col] = columns[idx]
+        if self._samp_idx is not None:
+            out = out[self._samp_idx]
+        return out
+
+    def take(self, indices, axis: int = None, out: npt.NDArray = None, mode="raise"):
+        """
+        Take the genotypes of some samples or variants, like np.take()
+
+        Taking samples returns another lazy proxy. Taking variants decodes only those
+        variants.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        if axis == 0:
+            subset = copy(self)
+            subset._samp_idx = (
+                indices if self._samp_idx is None else self._samp_idx[indices]
+            )
+            subset.shape = (len(subset._samp_idx), *self.shape[1:])
+            return subset
+        if axis == 1:
+            result = self._take_variants(indices.ravel()).reshape(
+                (self.shape[0], *indices.shape, self.shape[2])
+            )
+        else:
+            result = np.take(np.asarray(self), indices, axis=axis, mode=mode)
+        if out is not None:
+            out[...] = result
+            return out
+        return result
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is None for k in key):
+            return np.asarray(self)[key]
+        if any(k is Ellipsis for k in key):
+            pos = next(idx for idx, k in enumerate(key) if k is Ellipsis)
+            key = (
+                key[:pos] + (slice(None),) * (self.ndim - len(key) + 1) + key[pos + 1 :]
+            )
+        key = key + (slice(None),) * (self.ndim - len(key))
+        samp_key, var_key, strand_key = key
+        # decode just the requested variants and then index into them like np would
+        if isinstance(var_key, slice):
+            arr = self._take_variants(np.arange(self.shape[1])[var_key])
+            var_key = slice(None)
+        elif np.ndim(var_key) == 0:
+            arr = self._take_variants(np.array([var_key], dtype=np.intp))
+            var_key = 0
+        else:
+            var_key = np.asarray(var_key)
+            if var_key.dtype == np.bool_:
+                var_key = np.flatnonzero(var_key)
+            uniq, var_key = np.unique(var_key, return_inverse=True)
+            arr = self._take_variants(uniq)
+        return arr[samp_key, var_key, strand_key]
+
+    def __array__(self, dtype=None, copy=None) -> npt.NDArray:
+        arr = self._take_variants(np.arange(self.shape[1]))
+        return arr if dtype is None else arr.astype(dtype)
+
+    def __getattr__(self, name: str):
+        # any other np array attributes (ex: astype) require decoding every variant
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(np.asarray(self), name)
+
+
 class Genotypes(Data):
     """
     A class for processing genotypes from a file
@@ -29,6 +713,13 @@ class Genotypes(Data):
     ----------
     data : npt.NDArray
         The genotypes in an n (samples) x p (variants) x 2 (strands) array
+
+        If the genotypes were read in variant-major order (see
+        :py:meth:`~.Genotypes.read`), this will instead be a p x n x 2 array
+
+        If the genotypes have been bit-packed via :py:meth:`~.Genotypes.pack`, this
+        will instead be a ceil(n/8) x p x 2 array of np.uint8 in which each bit
+        denotes the presence of the ALT allele in a strand of a sample
     fname : Path | str
         The path to the read-only file containing the data
     samples : tuple[str]
@@ -43,179 +734,1476 @@ class Genotypes(Data):
     _prephased : bool
         If True, assume that the genotypes are phased. Otherwise, extract their phase
         when reading from the VCF.
+    _packed : bool
+        If True, the genotypes in :py:attr:`~.Genotypes.data` have been bit-packed
+        across samples. See :py:meth:`~.Genotypes.pack`
+    _variant_major : bool
+        If True, the variants are the first axis of :py:attr:`~.Genotypes.data`
+        instead of the samples
     _samp_idx : dict[str, int]
         Sample index; maps samples to indices in self.samples
     _var_idx : dict[str, int]
         Variant index; maps variant IDs to indices in self.variants
 
-    Examples
-    --------
-    >>> genotypes = Genotypes.load('tests/data/simple.vcf')
-    >>> # directly access the loaded variants, samples, and genotypes (in data)
-    >>> genotypes.variants
-    >>> genotypes.samples
-    >>> genotypes.data
-    """
+    Examples
+    --------
+    >>> genotypes = Genotypes.load('tests/data/simple.vcf')
+    >>> # directly access the loaded variants, samples, and genotypes (in data)
+    >>> genotypes.variants
+    >>> genotypes.samples
+    >>> genotypes.data
+    """
+
+    def __init__(self, fname: Path | str, log: Logger = None):
+        super().__init__(fname, log)
+        self.samples = tuple()
+        self.variants = np.array(
+            [],
+            dtype=[
+                ("id", "U50"),
+                ("chrom", "U10"),
+                ("pos", np.uint32),
+            ],
+        )
+        self._prephased = False
+        self._packed = False
+        self._variant_major = False
+        self._samp_idx = None
+        self._var_idx = None
+
+    @property
+    def _samp_axis(self) -> int:
+        """
+        The axis of :py:attr:`~.Genotypes.data` along which the samples are stored
+        """
+        return int(self._variant_major)
+
+    @property
+    def _var_axis(self) -> int:
+        """
+        The axis of :py:attr:`~.Genotypes.data` along which the variants are stored
+        """
+        return int(not self._variant_major)
+
+    def _sample_major(self) -> npt.NDArray:
+        """
+        Get a view of :py:attr:`~.Genotypes.data` in which the samples are rows and
+        the variants are columns, regardless of how the genotypes are stored
+
+        No data is copied, so this is useful for any code that only reads genotypes
+
+        Returns
+        -------
+        npt.NDArray
+            An n x p x 2 view of :py:attr:`~.Genotypes.data`
+        """
+        if self._variant_major:
+            return self.data.swapaxes(0, 1)
+        return self.data
+
+    @classmethod
+    def load(
+        cls: Genotypes,
+        fname: Path | str,
+        region: str = None,
+        samples: set[str] = None,
+        variants: set[str] = None,
+        qc: dict[str, dict] = None,
+    ) -> Genotypes:
+        """
+        Load genotypes from a VCF file
+
+        Read the file contents, check the genotype phase, and create the MAC matrix
+
+        Parameters
+        ----------
+        fname
+            See documentation for :py:attr:`~.Data.fname`
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        qc : dict[str, dict], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+            Defaults to calling :py:meth:`~.Genotypes.check_missing`,
+            :py:meth:`~.Genotypes.check_biallelic`, and
+            :py:meth:`~.Genotypes.check_phase` after reading
+
+        Returns
+        -------
+        Genotypes
+            A Genotypes object with the data loaded into its properties
+        """
+        genotypes = cls(fname)
+        if qc is not None:
+            genotypes.read(region, samples, variants, qc=qc)
+            return genotypes
+        genotypes.read(region, samples, variants)
+        genotypes.check_missing()
+        genotypes.check_biallelic()
+        genotypes.check_phase()
+        # genotypes.to_MAC()
+        return genotypes
+
+    def read(
+        self,
+        region: str = None,
+        samples: set[str] = None,
+        variants: set[str] = None,
+        max_variants: int = None,
+        cache: bool = False,
+        workers: int = 1,
+        variant_major: bool = False,
+        qc: dict[str, dict] = None,
+        lazy: bool | int = False,
+    ):
+        """
+        Read genotypes from a VCF into a numpy matrix stored in :py:attr:`~.Genotypes.data`
+
+        Raises
+        ------
+        ValueError
+            If the genotypes array is empty
+
+        Parameters
+        ----------
+        region : str, optional
+            The region from which to extract genotypes; ex: 'chr1:1234-34566' or 'chr7'
+
+            For this to work, the VCF must be indexed and the seqname must match!
+
+            Defaults to loading all genotypes
+        samples : set[str], optional
+            A subset of the samples from which to extract genotypes
+
+            Note that they are loaded in the same order as in the file
+
+            Defaults to loading genotypes from all samples
+        variants : set[str], optional
+            A set of variant IDs for which to extract genotypes
+
+            All other variants will be ignored. This may be useful if you're running
+            out of memory.
+        max_variants : int, optional
+            The maximum mumber of variants to load from the file. Setting this value
+            helps preallocate the arrays, making the process faster and less memory
+            intensive. You should use this option if your processes are frequently
+            "Killed" from memory overuse.
+
+            If you don't know how many variants there are, the number will be estimated
+            from the tabix or CSI index of the file (or, for uncompressed files, from
+            the number of lines in the file). The np array will be grown or resized
+            appropriately if the estimate is off.
+
+            Note that this value is ignored if the variants argument is provided.
+        cache : bool, optional
+            Whether to store the parsed genotypes in an on-disk cache next to the file
+            (in a directory ending in ".hgtcache") so that later reads with the same
+            parameters can skip parsing the VCF entirely
+
+            Cached genotypes are memory-mapped in copy-on-write mode, so changes to
+            :py:attr:`~.Genotypes.data` are never written back to the cache. The cache
+            is invalidated whenever the size or modification time of the file changes.
+        workers : int, optional
+            The number of processes to use for reading the file
+
+            If greater than 1, the region is split into shards (one per contig or
+            several within a contig) which are read in parallel and then concatenated
+            in the order of the file. For this to work, the file must be indexed.
+            Otherwise, it will be read serially. Note that max_variants is ignored
+            when reading in parallel.
+        variant_major : bool, optional
+            Whether to store :py:attr:`~.Genotypes.data` with the variants as rows and
+            the samples as columns (ie with shape p x n x 2)
+
+            The genotypes are parsed one variant at a time, so this skips the final
+            transpose and leaves the matrix contiguous in memory. The subset() and
+            check_*() methods, :py:meth:`~.Haplotypes.transform`, and the writers all
+            respect this layout, but variant-major genotypes cannot be bit-packed.
+        qc : dict[str, dict], optional
+            Quality-control checks to run on the genotypes as they are read
+
+            Each key is the name of a check_*() method (ex: "missing" for
+            :py:meth:`~.Genotypes.check_missing`) and each value is a dict of keyword
+            arguments for it. The checks are applied in the order "missing",
+            "biallelic", "phase", and then "maf", and they raise the same errors and
+            warnings as the methods themselves.
+
+            Instead of sweeping the entire matrix once for each check, the statistics
+            that each check needs are gathered from every block of variants as soon as
+            it is decoded, and all of the samples and variants that should be
+            discarded are then removed together.
+        lazy : bool | int, optional
+            Whether to load only the samples and variants right away
+
+            :py:attr:`~.Genotypes.data` will instead be a proxy that supports the same
+            indexing as a np array, along with np.take() and np.asarray(). Only the
+            variants that are accessed (ex: via :py:meth:`~.Genotypes.subset`) are ever
+            decoded. The most recently used ones are cached until they take up more
+            than 256 MiB, or the number of bytes given by this parameter, if it is an
+            int. For this to work, the file must be indexed.
+
+            This cannot be combined with the cache, workers, variant_major, or qc
+            parameters.
+        """
+        super().read()
+        self._variant_major = variant_major
+        if lazy:
+            self._check_lazy(cache, workers > 1, variant_major, qc)
+            self._read_lazy(region, samples, variants, max_variants, lazy)
+            return
+        qc_stats = self._qc_stats(qc)
+        # we allocated the genotypes ourselves, so nothing else can be sharing them
+        owned = True
+        if cache:
+            cache_dir = self._cache_path(region, samples, variants, max_variants)
+        if cache and self._read_cache(cache_dir):
+            # the genotypes weren't parsed, so they'll have to be summarized later
+            qc_stats = None
+            owned = False
+        elif workers > 1 and self._read_shards(region, samples, variants, workers):
+            qc_stats = None
+            if 0 in self.data.shape:
+                self.log.warning(
+                    "Failed to load genotypes. If you specified a region, check that"
+                    " the contig name matches! For example, double-check the 'chr'"
+                    " prefix."
+                )
+            elif cache and (max_variants is None or variants is not None):
+                # parallel reads ignore max_variants, so don't cache a result that a
+                # serial read with the same parameters wouldn't have produced
+                self._write_cache(cache_dir)
+        else:
+            self._read_records(region, samples, variants, max_variants, qc_stats)
+            if cache and 0 not in self.data.shape:
+                self._write_cache(cache_dir)
+        if qc is not None and 0 not in self.data.shape:
+            self._apply_qc(qc, qc_stats, inplace=owned)
+
+    @staticmethod
+    def _check_lazy(*options):
+        """
+        Check that none of the options that conflict with the lazy parameter of
+        :py:meth:`~.Genotypes.read` were provided
+
+        Parameters
+        ----------
+        *options
+            The values of the cache, workers, variant_major, and qc parameters
+
+        Raises
+        ------
+        ValueError
+            If any of them were provided
+        """
+        if any(options):
+            raise ValueError(
+                "Genotypes that are read lazily cannot also be cached, read in "
+                "parallel, stored in variant-major order, or checked as they are read"
+            )
+
+    def _read_lazy(
+        self,
+        region: str = None,
+        samples: set[str] = None,
+        variants: set[str] = None,
+        max_variants: int = None,
+        lazy: bool | int = True,
+    ):
+        """
+        Load the samples and variants in the file, but only create a proxy for
+        :py:attr:`~.Genotypes.data`
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        max_variants : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        lazy : bool | int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Raises
+        ------
+        ValueError
+            If the file isn't indexed
+        """
+        fname = str(self.fname)
+        if not any(Path(fname + ext).exists() for ext in (".tbi", ".csi")):
+            raise ValueError(
+                f"Genotypes can only be read lazily from an indexed file, but {fname}"
+                " doesn't have a tabix or CSI index"
+            )
+        vcf = self._open_vcf(samples)
+        self.read_variants(region, variants, max_variants)
+        shape = (len(self.samples), len(self.variants), 2 + (not self._prephased))
+        budget = _LAZY_BUDGET if lazy is True else lazy
+        self.data = _LazyGenotypes(
+            partial(self._decode_lazy, vcf, self.variants), shape, budget
+        )
+
+    def read_variants(
+        self,
+        region: str = None,
+        variants: set[str] = None,
+        max_variants: int = None,
+    ):
+        """
+        Read only the variants from a VCF into :py:attr:`~.Genotypes.variants`,
+        without parsing any of the genotypes
+
+        Parameters
+        ----------
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        max_variants : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        """
+        if len(self.variants) != 0:
+            self.log.warning("Variant data has already been loaded. Overriding.")
+        self.log.info(f"Loading variants from {self.fname}")
+        if variants is not None:
+            max_variants = len(variants)
+        variant_getter = self._variant_getter(fields=True)
+        columns = tuple([] for _ in self.variants.dtype.names)
+        appenders = [col.append for col in columns]
+        num_seen = 0
+        # don't load any samples, so that htslib can skip parsing the FORMAT fields of
+        # each line
+        vcf = VCF(str(self.fname), samples=[], lazy=True)
+        for variant in self._vcf_iter(vcf, region, variants):
+            if max_variants is not None and num_seen >= max_variants:
+                break
+            if variants is not None and variant.ID not in variants:
+                continue
+            for append, val in zip(appenders, variant_getter(variant)):
+                append(val)
+            num_seen += 1
+        vcf.close()
+        self.variants = self._build_variants(columns)
+
+    def _decode_lazy(
+        self, vcf: VCF, variants: npt.NDArray, var_idx: npt.NDArray[np.intp]
+    ) -> npt.NDArray[np.uint8]:
+        """
+        Decode the genotypes of some of the variants in the file
+
+        This is a helper function for :py:meth:`~.Genotypes._read_lazy`. Variants that
+        are close together are read in a single seek.
+
+        Parameters
+        ----------
+        vcf: VCF
+            The VCF object from which to fetch variant records
+        variants : npt.NDArray
+            The variants that were loaded by :py:meth:`~.Genotypes._read_lazy`
+        var_idx : npt.NDArray[np.intp]
+            The sorted indices of the variants to decode
+
+        Raises
+        ------
+        ValueError
+            If any of the variants can't be found in the file anymore
+
+        Returns
+        -------
+        npt.NDArray[np.uint8]
+            An n x len(var_idx) x 2 (or x 3) array of the genotypes
+        """
+        ids, chroms, pos = variants["id"], variants["chrom"], variants["pos"]
+        strands = 2 + (not self._prephased)
+        out = np.empty((len(vcf.samples), len(var_idx), strands), dtype=np.uint8)
+        col = 0
+        for first, last in zip(*self._seek_groups(var_idx, chroms, pos)):
+            start, end = pos[var_idx[first]], pos[var_idx[last]]
+            region = f"{chroms[var_idx[first]]}:{start}-{end}"
+            for variant in self._vcf_iter(vcf, region):
+                if col > last or variant.POS > end:
+                    break
+                row = var_idx[col]
+                # skip any variants that we didn't load or that merely overlap
+                if variant.POS == pos[row] and str(variant.ID) == ids[row]:
+                    out[:, col] = self._return_data(variant)[:, :strands]
+                    col += 1
+            if col <= last:
+                raise ValueError(
+                    f"Failed to find variant {ids[var_idx[col]]} in {self.fname}. Has"
+                    " the file changed?"
+                )
+        return out
+
+    def _read_records(
+        self,
+        region: str = None,
+        samples: set[str] = None,
+        variants: set[str] = None,
+        max_variants: int = None,
+        qc_stats: _QCStats = None,
+    ):
+        """
+        Parse the genotypes in the file line by line into
+        :py:attr:`~.Genotypes.data`
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        max_variants : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        qc_stats : _QCStats, optional
+            An object in which to summarize the genotypes as they are read
+        """
+        records = self._iterate(self._open_vcf(samples), region, variants, fields=True)
+        if variants is not None:
+            max_variants = len(variants)
+        # preallocate arrays! this will save us lots of memory and speed b/c
+        # appends can sometimes make copies
+        arrays = self._collect_records(
+            records, self._num_records(region, max_variants), max_variants, qc_stats
+        )
+        self.variants = arrays.get(
+            "variants", np.empty((0,), dtype=self.variants.dtype)
+        )
+        # in order to check_phase() later, we must store the phase info, as well
+        self.data = arrays.get("data", np.empty((0, 0, 0), dtype=np.uint8))
+        if 0 in self.data.shape:
+            self.log.warning(
+                "Failed to load genotypes. If you specified a region, check that the"
+                " contig name matches! For example, double-check the 'chr' prefix."
+            )
+            self.data = np.empty(shape=(0, 0, 0), dtype=self.data.dtype)
+        else:
+            if not self._variant_major:
+                # transpose the GT matrix so that samples are rows and variants are
+                # columns
+                self.log.info(f"Transposing genotype matrix of size {self.data.shape}")
+                self.data = self.data.transpose((1, 0, 2))
+
+    def _fused_checks(self, qc: dict[str, dict] = None) -> list[str]:
+        """
+        Get the quality-control checks that can be run while the genotypes are read
+
+        Checks that have been overridden by a child class can't be, so they are run
+        afterward, instead
+
+        Parameters
+        ----------
+        qc : dict[str, dict], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        list[str]
+            The names of the checks, in the order in which they should be applied
+        """
+        if qc is None:
+            return []
+        return [
+            name
+            for name in _QC_CHECKS
+            if name in qc
+            and getattr(type(self), f"check_{name}")
+            is getattr(Genotypes, f"check_{name}")
+        ]
+
+    def _qc_stats(self, qc: dict[str, dict] = None) -> _QCStats | None:
+        """
+        Create an object in which to summarize the genotypes as they are read
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Raises
+        ------
+        ValueError
+            If any of the checks are unknown
+
+        Parameters
+        ----------
+        qc : dict[str, dict], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        _QCStats | None
+            An empty _QCStats object, or None if no checks can be run while reading
+        """
+        unknown = set(qc or ()) - set(_QC_CHECKS)
+        if unknown:
+            raise ValueError(f"Unknown quality-control checks: {unknown}")
+        checks = self._fused_checks(qc)
+        if not checks:
+            return None
+        return _QCStats(set(checks))
+
+    def _apply_qc(
+        self, qc: dict[str, dict], qc_stats: _QCStats = None, inplace: bool = False
+    ):
+        """
+        Run quality-control checks on the genotypes, discarding any samples and
+        variants that fail them all at once
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        qc : dict[str, dict]
+            See documentation for :py:meth:`~.Genotypes.read`
+        qc_stats : _QCStats, optional
+            The summaries gathered while reading the genotypes
+
+            If not provided, the genotypes will be summarized here, instead
+        inplace : bool, optional
+            See documentation for :py:meth:`~.Genotypes._discard`
+        """
+        checks = self._fused_checks(qc)
+        if checks:
+            if qc_stats is None:
+                qc_stats = _QCStats(set(checks))
+                for start in range(0, len(self.variants), _QC_BLOCK):
+                    end = start + _QC_BLOCK
+                    if self._variant_major:
+                        qc_stats.update(start, self.data[start:end])
+                    else:
+                        qc_stats.update(start, self.data[:, start:end].swapaxes(0, 1))
+            keep_samples = np.ones(len(self.samples), dtype=np.bool_)
+            keep_variants = np.ones(len(self.variants), dtype=np.bool_)
+            # remove the phase info at the end only if check_phase() would have
+            num_strands = self.data.shape[2]
+            if "phase" in checks and not (self._prephased or num_strands < 3):
+                num_strands = 2
+            for name in checks:
+                getattr(self, f"_fused_{name}")(
+                    qc_stats, keep_samples, keep_variants, **qc[name]
+                )
+            self._discard(keep_samples, keep_variants, inplace)
+            self.data = self.data[:, :, :num_strands]
+            if "biallelic" in checks:
+                # every remaining genotype is now a 0 or a 1, so we can reinterpret
+                # them as bools without making a copy
+                self.data = self.data.view(np.bool_)
+        # finally, run any checks that child classes have overridden
+        for name in _QC_CHECKS:
+            if name in qc and name not in checks:
+                getattr(self, f"check_{name}")(**qc[name])
+
+    def _fused_missing(
+        self,
+        qc_stats: _QCStats,
+        keep_samples: npt.NDArray[np.bool_],
+        keep_variants: npt.NDArray[np.bool_],
+        discard_also: bool = False,
+    ):
+        """
+        The equivalent of :py:meth:`~.Genotypes.check_missing` for
+        :py:meth:`~.Genotypes._apply_qc`
+
+        Parameters
+        ----------
+        qc_stats : _QCStats
+            The summaries gathered while reading the genotypes
+        keep_samples : npt.NDArray[np.bool_]
+            Which samples have passed the checks so far; modified in-place
+        keep_variants : npt.NDArray[np.bool_]
+            Which variants have passed the checks so far; modified in-place
+        discard_also : bool, optional
+            See documentation for :py:meth:`~.Genotypes.check_missing`
+        """
+        missing = qc_stats.miss_first >= 0
+        if np.any(missing):
+            if discard_also:
+                keep_samples &= ~missing
+                self.log.warning(
+                    "Ignoring missing genotypes from "
+                    f"{np.count_nonzero(missing)} samples"
+                )
+            else:
+                samp_idx = np.argmax(missing)
+                raise ValueError(
+                    "Genotype with ID {} at POS {}:{} is missing for sample {}".format(
+                        *tuple(self.variants[qc_stats.miss_first[samp_idx]])[:3],
+                        self.samples[samp_idx],
+                    )
+                )
+        if discard_also and not np.any(keep_samples):
+            self.log.warning(
+                "All samples were discarded! Check that that none of your variants are"
+                " missing genotypes (GT: '.|.')."
+            )
+
+    def _fused_biallelic(
+        self,
+        qc_stats: _QCStats,
+        keep_samples: npt.NDArray[np.bool_],
+        keep_variants: npt.NDArray[np.bool_],
+        discard_also: bool = False,
+    ):
+        """
+        The equivalent of :py:meth:`~.Genotypes.check_biallelic` for
+        :py:meth:`~.Genotypes._apply_qc`
+
+        Parameters
+        ----------
+        qc_stats : _QCStats
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        keep_samples : npt.NDArray[np.bool_]
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        keep_variants : npt.NDArray[np.bool_]
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        discard_also : bool, optional
+            See documentation for :py:meth:`~.Genotypes.check_biallelic`
+        """
+        var_idx = np.array(qc_stats.multiallelic, dtype=np.intp)
+        if len(var_idx):
+            # only the flagged variants need to be examined again, to ignore any
+            # samples that were discarded
+            samp_kept = np.flatnonzero(keep_samples)
+            data = self._sample_major()[:, var_idx, :2][samp_kept]
+            samp_idx, variant_idx = np.nonzero(np.any(data > 1, axis=2))
+            if len(variant_idx) and discard_also:
+                self.log.info(f"Ignoring {len(variant_idx)} multiallelic variants")
+                keep_variants[var_idx[variant_idx]] = False
+            elif len(variant_idx):
+                raise ValueError(
+                    "Variant with ID {} at POS {}:{} is multiallelic for sample {}"
+                    .format(
+                        *tuple(self.variants[var_idx[variant_idx[0]]])[:3],
+                        self.samples[samp_kept[samp_idx[0]]],
+                    )
+                )
+        if discard_also and not np.any(keep_variants):
+            self.log.warning(
+                "All variants were discarded! Check that there are biallelic variants "
+                "in your dataset."
+            )
+
+    def _fused_phase(
+        self,
+        qc_stats: _QCStats,
+        keep_samples: npt.NDArray[np.bool_],
+        keep_variants: npt.NDArray[np.bool_],
+    ):
+        """
+        The equivalent of :py:meth:`~.Genotypes.check_phase` for
+        :py:meth:`~.Genotypes._apply_qc`
+
+        Parameters
+        ----------
+        qc_stats : _QCStats
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        keep_samples : npt.NDArray[np.bool_]
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        keep_variants : npt.NDArray[np.bool_]
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        """
+        if self._prephased or self.data.shape[2] < 3:
+            self.log.warning("Phase information has already been removed from the data")
+            return
+        var_idx = np.array(qc_stats.unphased, dtype=np.intp)
+        var_idx = var_idx[keep_variants[var_idx]]
+        if not len(var_idx):
+            return
+        samp_kept = np.flatnonzero(keep_samples)
+        data = self._sample_major()[:, var_idx][samp_kept].astype(np.bool_)
+        unphased = (data[:, :, 0] ^ data[:, :, 1]) & (~data[:, :, 2])
+        if np.any(unphased):
+            samp_idx, variant_idx = np.nonzero(unphased)
+            raise ValueError(
+                "Variant with ID {} at POS {}:{} is unphased for sample {}".format(
+                    *tuple(self.variants[var_idx[variant_idx[0]]])[:3],
+                    self.samples[samp_kept[samp_idx[0]]],
+                )
+            )
+
+    def _fused_maf(
+        self,
+        qc_stats: _QCStats,
+        keep_samples: npt.NDArray[np.bool_],
+        keep_variants: npt.NDArray[np.bool_],
+        threshold: float = None,
+        discard_also: bool = False,
+        warn_only: bool = False,
+    ):
+        """
+        The equivalent of :py:meth:`~.Genotypes.check_maf` for
+        :py:meth:`~.Genotypes._apply_qc`
+
+        Parameters
+        ----------
+        qc_stats : _QCStats
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        keep_samples : npt.NDArray[np.bool_]
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        keep_variants : npt.NDArray[np.bool_]
+            See documentation for :py:meth:`~.Genotypes._fused_missing`
+        threshold: float, optional
+            See documentation for :py:meth:`~.Genotypes.check_maf`
+        discard_also : bool, optional
+            See documentation for :py:meth:`~.Genotypes.check_maf`
+        warn_only: bool, optional
+            See documentation for :py:meth:`~.Genotypes.check_maf`
+        """
+        if threshold is None:
+            return
+        alt_cts = np.array(qc_stats.alt_cts, dtype=np.int64)
+        if not np.all(keep_samples):
+            # subtract the alleles of any samples that were discarded
+            discarded = self._sample_major()[~keep_samples][:, :, :2]
+            alt_cts -= np.count_nonzero(discarded, axis=(0, 2))
+        var_kept = np.flatnonzero(keep_variants)
+        ref_af = alt_cts[var_kept] / (2 * np.count_nonzero(keep_samples))
+        maf = np.array([ref_af, 1 - ref_af]).min(axis=0)
+        rare_variants = maf < threshold
+        if np.any(rare_variants):
+            idx = np.nonzero(rare_variants)[0]
+            if discard_also:
+                keep_variants[var_kept[idx]] = False
+                self.log.info(f"Ignoring {len(idx)} variants with MAF < {threshold}")
+            else:
+                vals = tuple(self.variants[var_kept[idx[0]]])[:3]
+                vals += (maf[idx[0]], threshold)
+                msg = "Variant with ID {} at POS {}:{} has MAF {} < {}".format(*vals)
+                if warn_only:
+                    self.log.warning(msg)
+                else:
+                    raise ValueError(msg)
+
+    def _num_records(self, region: str = None, max_variants: int = None) -> int:
+        """
+        Determine how many records to preallocate space for when reading the file
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        max_variants : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        int
+            The value of max_variants, if it was provided. Otherwise, an estimate of the
+            number of records in the region.
+        """
+        if max_variants is not None:
+            return max_variants
+        stats = self._index_stats()
+        num_records = None
+        if stats is not None:
+            if region is None:
+                num_records = sum(count for _, count in stats.values())
+            else:
+                match = _REGION_RE.match(region.replace(",", ""))
+                if match is not None and match["chrom"] in stats:
+                    extent, num_records = stats[match["chrom"]]
+                    # assume the records are spread evenly across the contig
+                    if extent and (match["start"] or match["end"]):
+                        span = int(match["end"] or extent) - int(match["start"] or 1)
+                        fraction = min(1, (span + 1) / extent)
+                        num_records = int(np.ceil(num_records * fraction))
+        elif (
+            region is None
+            and Path(self.fname).is_file()
+            and Path(self.fname).suffix not in (".gz", ".bgz", ".bcf")
+        ):
+            # the header lines make this a slight overestimate
+            with open(self.fname, "rb") as vcf:
+                num_records = sum(
+                    block.count(b"\n") for block in iter(lambda: vcf.read(1 << 20), b"")
+                )
+        if num_records is None:
+            num_records = 1024
+            self.log.info(
+                "Unable to estimate the number of variants in the file. Check that it"
+                " has been indexed. Space for more variants will be allocated as"
+                " needed."
+            )
+        else:
+            self.log.info(f"Estimated that there are {num_records} variants to load")
+        return num_records
+
+    def _collect_records(
+        self,
+        records: Iterator[namedtuple],
+        num_records: int,
+        max_variants: int = None,
+        qc_stats: _QCStats = None,
+    ) -> dict[str, npt.NDArray]:
+        """
+        Store the records yielded by :py:meth:`~.Genotypes.__iter__` in preallocated
+        arrays, where each row is a variant
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        If the variant metadata in each record is a tuple of fields (see
+        :py:meth:`~.Genotypes._variant_fields`), each field is appended to its own
+        list and the :py:attr:`~.Genotypes.variants` array is built once at the end
+
+        Parameters
+        ----------
+        records : Iterator[namedtuple]
+            The records returned by :py:meth:`~.Genotypes.__iter__`
+        num_records : int
+            The number of records to preallocate space for
+
+            If there are more records than this, the arrays are grown geometrically
+        max_variants : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        qc_stats : _QCStats, optional
+            An object in which to summarize each block of genotypes once it's stored
+
+        Returns
+        -------
+        dict[str, npt.NDArray]
+            An array for each field of the records, or an empty dict if there were no
+            records
+        """
+        arrays = {}
+        # the columns of the variants array, if its fields are yielded as tuples
+        columns = None
+        num_records = max(num_records, 1)
+        num_seen = 0
+        # the number of records that have been summarized in qc_stats so far
+        num_summarized = 0
+        for rec in records:
+            if max_variants is not None and num_seen >= max_variants:
+                break
+            if not arrays:
+                if isinstance(getattr(rec, "variants", None), tuple):
+                    columns = tuple([] for _ in self.variants.dtype.names)
+                    appenders = tuple(col.append for col in columns)
+                arrays = {
+                    name: np.empty(
+                        (num_records, *np.shape(val)),
+                        dtype=(self.variants.dtype if name == "variants" else np.uint8),
+                    )
+                    for name, val in rec._asdict().items()
+                    if not (columns is not None and name == "variants")
+                }
+            elif num_seen == num_records:
+                num_records *= 2
+                self.log.debug(f"Growing arrays to fit {num_records} variant records")
+                for name in list(arrays):
+                    grown = np.empty(
+                        (num_records, *arrays[name].shape[1:]), dtype=arrays[name].dtype
+                    )
+                    grown[:num_seen] = arrays[name]
+                    arrays[name] = grown
+            for name, arr in arrays.items():
+                arr[num_seen] = getattr(rec, name)
+            if columns is not None:
+                for append, val in zip(appenders, rec.variants):
+                    append(val)
+            num_seen += 1
+            if qc_stats is not None and num_seen - num_summarized == _QC_BLOCK:
+                # summarize the block while it's still in the cache
+                qc_stats.update(num_summarized, arrays["data"][num_summarized:num_seen])
+                num_summarized = num_seen
+        if qc_stats is not None and num_seen > num_summarized:
+            qc_stats.update(num_summarized, arrays["data"][num_summarized:num_seen])
+        if arrays and num_records > num_seen:
+            self.log.info(
+                f"Removing {num_records-num_seen} unneeded variant records that "
+                "were preallocated."
+            )
+            arrays = {name: arr[:num_seen] for name, arr in arrays.items()}
+        if columns is not None:
+            arrays["variants"] = self._build_variants(columns)
+        return arrays
+
+    def _build_variants(self, columns: tuple[list]) -> npt.NDArray:
+        """
+        Build the :py:attr:`~.Genotypes.variants` array from a list of values for
+        each of its fields
+
+        This is a helper function for :py:meth:`~.Genotypes._collect_records`
+
+        Parameters
+        ----------
+        columns : tuple[list]
+            A list of values for each field in :py:attr:`~.Genotypes.variants`, in
+            order
+
+        Returns
+        -------
+        npt.NDArray
+            The new :py:attr:`~.Genotypes.variants` array
+        """
+        variants = np.empty(len(columns[0]), dtype=self.variants.dtype)
+        for name, col in zip(variants.dtype.names, columns):
+            if variants.dtype[name] == object:
+                # assign objects one at a time so that np doesn't try to unpack tuples
+                dest = variants[name]
+                for idx, val in enumerate(col):
+                    dest[idx] = val
+            else:
+                variants[name] = col
+        return variants
+
+    def _index_stats(self) -> dict[str, tuple[int, int]] | None:
+        """
+        Summarize each contig in the tabix or CSI index of the file, if it has one
+
+        Returns
+        -------
+        dict[str, tuple[int, int]] | None
+            An upper bound on the position of the last record in each contig and its
+            number of records, in the order of the index. Or None if the file doesn't
+            have an index.
+        """
+        fname = str(self.fname)
+        for ext in (".tbi", ".csi"):
+            if Path(fname + ext).exists():
+                contigs = _parse_index(fname + ext)
+                break
+        else:
+            return None
+        if any(name is None for name, _, _ in contigs):
+            # CSI indices of BCFs refer to the contigs by their order in the header
+            vcf = VCF(fname, lazy=True)
+            names = [
+                hrec.info()["ID"] for hrec in vcf.header_iter() if hrec.type == "CONTIG"
+            ]
+            vcf.close()
+            contigs = [(name, *stats[1:]) for name, stats in zip(names, contigs)]
+        return {name: (extent, num_records) for name, extent, num_records in contigs}
+
+    def _id_index_path(self) -> Path:
+        """
+        Get the path to the sidecar created by :py:meth:`~.Genotypes.write_id_index`
+
+        Returns
+        -------
+        Path
+            The path to the file, with ".hidx" appended to it
+        """
+        return Path(str(self.fname) + ".hidx")
+
+    def write_id_index(self):
+        """
+        Index the ID of each variant in the file by its contig and position
+
+        The index is stored in a binary sidecar next to the file (ending in ".hidx").
+        Afterward, whenever variants are requested by their IDs and no region is
+        given, only the parts of the file that contain them are read, via seeks in
+        the tabix or CSI index of the file. The sidecar is ignored if the file has
+        been modified since it was written.
+        """
+        index_fname = self._id_index_path()
+        stamp = self._file_stamp()
+        self.log.info(f"Indexing the variant IDs in {self.fname}")
+        vcf = VCF(str(self.fname), lazy=True)
+        ids, chroms, pos = [], [], []
+        for variant in vcf:
+            ids.append(variant.ID or ".")
+            chroms.append(variant.CHROM)
+            pos.append(variant.POS)
+        vcf.close()
+        arrays = {
+            "id": np.array(ids, dtype=str),
+            "chrom": np.array(chroms, dtype=str),
+            "pos": np.array(pos, dtype=self.variants.dtype["pos"]),
+        }
+        for name in ("id", "chrom"):
+            try:
+                # ASCII takes a quarter of the space of np's unicode strings
+                arrays[name] = arrays[name].astype(np.bytes_)
+            except UnicodeEncodeError:
+                pass
+        arrays["stamp"] = np.array([stamp["size"], stamp["mtime"]], dtype=np.int64)
+        self.log.info(f"Writing variant ID index {index_fname}")
+        # write to a temporary file first so that we never leave a partial sidecar
+        tmp_fname = index_fname.with_name(index_fname.name + ".tmp")
+        with open(tmp_fname, "wb") as index:
+            np.savez(index, **arrays)
+        tmp_fname.replace(index_fname)
+
+    def _read_id_index(self) -> tuple[npt.NDArray] | None:
+        """
+        Load the sidecar created by :py:meth:`~.Genotypes.write_id_index`
+
+        Returns
+        -------
+        tuple[npt.NDArray] | None
+            The ID, contig, and position of each variant in the file or None if the
+            sidecar doesn't exist or is out of date
+        """
+        index_fname = self._id_index_path()
+        if not index_fname.exists():
+            return None
+        with np.load(index_fname) as index:
+            stamp = self._file_stamp()
+            if index["stamp"].tolist() != [stamp["size"], stamp["mtime"]]:
+                self.log.info(f"Ignoring stale variant ID index {index_fname}")
+                return None
+            return index["id"].astype(str), index["chrom"].astype(str), index["pos"]
+
+    def _id_regions(self, variants: set[str]) -> list[tuple[str, int, int]] | None:
+        """
+        Find the regions of the file that contain the requested variants
+
+        This is a helper function for :py:meth:`~.Genotypes._vcf_iter`
+
+        Parameters
+        ----------
+        variants : set[str]
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        list[tuple[str, int, int]] | None
+            The contig, start, and end of each region, in the order of the file. Or
+            None if the file doesn't have both a variant ID index and a tabix or CSI
+            index.
+        """
+        fname = str(self.fname)
+        if not any(Path(fname + ext).exists() for ext in (".tbi", ".csi")):
+            return None
+        index = self._read_id_index()
+        if index is None:
+            return None
+        ids, chroms, pos = index
+        rows = np.flatnonzero(np.isin(ids, list(variants)))
+        self.log.info(
+            f"Found {len(rows)} of the requested variants in {self._id_index_path()}"
+        )
+        first, last = self._seek_groups(rows, chroms, pos)
+        return list(
+            zip(
+                chroms[rows[first]].tolist(),
+                pos[rows[first]].tolist(),
+                pos[rows[last]].tolist(),
+            )
+        )
+
+    @staticmethod
+    def _seek_groups(
+        rows: npt.NDArray[np.intp], chroms: npt.NDArray, pos: npt.NDArray
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+        """
+        Group variants that are close together in a file, so that each group can be
+        read in a single seek
+
+        Parameters
+        ----------
+        rows : npt.NDArray[np.intp]
+            The sorted indices of the variants within the file
+        chroms : npt.NDArray
+            The contig of every variant in the file
+        pos : npt.NDArray
+            The position of every variant in the file
+
+        Returns
+        -------
+        tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]
+            The indices of the first and last variant of each group within rows
+        """
+        if not len(rows):
+            return rows, rows
+        # variants that are close together are read in the same seek, but regions on
+        # the same contig must never overlap, or a variant might be read twice
+        breaks = np.flatnonzero(
+            (chroms[rows[1:]] != chroms[rows[:-1]])
+            | ((np.diff(rows) > _ID_SEEK_GAP + 1) & (pos[rows[1:]] > pos[rows[:-1]]))
+        )
+        return np.concatenate(([0], breaks + 1)), np.append(breaks, len(rows) - 1)
+
+    def _iter_regions(
+        self, vcf: VCF, regions: list[tuple[str, int, int]]
+    ) -> Iterator[Variant]:
+        """
+        Yield the variants that start within each of a list of regions
+
+        This is a helper function for :py:meth:`~.Genotypes._vcf_iter`
+
+        Parameters
+        ----------
+        vcf: VCF
+            The VCF object from which to fetch variant records
+        regions : list[tuple[str, int, int]]
+            The regions returned by :py:meth:`~.Genotypes._id_regions`
+
+        Yields
+        ------
+        Iterator[Variant]
+            Each variant in the regions
+        """
+        for chrom, start, end in regions:
+            for variant in vcf(f"{chrom}:{start}-{end}"):
+                # skip any variants that merely overlap the region
+                if start <= variant.POS <= end:
+                    yield variant
+
+    def _shard_regions(
+        self, region: str = None, num_shards: int = 2
+    ) -> list[tuple[str, int]] | None:
+        """
+        Split a region of an indexed file into shards that can be read independently
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        num_shards : int, optional
+            The desired number of shards
 
-    def __init__(self, fname: Path | str, log: Logger = None):
-        super().__init__(fname, log)
-        self.samples = tuple()
-        self.variants = np.array(
-            [],
-            dtype=[
-                ("id", "U50"),
-                ("chrom", "U10"),
-                ("pos", np.uint32),
-            ],
-        )
-        self._prephased = False
-        self._samp_idx = None
-        self._var_idx = None
+            Whole contigs are never merged, so there may be more shards than this. And
+            contigs are only split if their length can be determined from the header
+            or the index, so there may also be fewer.
 
-    @classmethod
-    def load(
-        cls: Genotypes,
-        fname: Path | str,
+        Returns
+        -------
+        list[tuple[str, int]] | None
+            The region of each shard, in the order of the file, and the minimum
+            position of the variants that belong to it (or None if there isn't one)
+
+            Variants that overlap the start of a shard but begin before it belong to
+            the previous shard. Returns None if the file cannot be split into at least
+            two shards.
+        """
+        stats = self._index_stats()
+        if stats is None:
+            return None
+        # unlike the header, the index tells us which contigs have records
+        contigs = [contig for contig, (_, num_records) in stats.items() if num_records]
+        extents = {contig: extent for contig, (extent, _) in stats.items()}
+        # prefer the contig lengths in the header over the estimates from the index
+        vcf = VCF(str(self.fname), lazy=True)
+        for hrec in vcf.header_iter():
+            if hrec.type == "CONTIG":
+                info = hrec.info(extra=True)
+                if b"length" in info:
+                    extents[info[b"ID"].decode()] = int(info[b"length"])
+        vcf.close()
+        # each target is a tuple of (region, contig, start, end)
+        if region is None:
+            targets = [(contig, contig, 1, extents.get(contig)) for contig in contigs]
+        else:
+            match = _REGION_RE.match(region.replace(",", ""))
+            if match is None:
+                return None
+            end = match["end"] or extents.get(match["chrom"])
+            targets = [
+                (region, match["chrom"], int(match["start"] or 1), end and int(end))
+            ]
+        total = sum(end - start + 1 for _, _, start, end in targets if end)
+        shards = []
+        for target, contig, start, end in targets:
+            pieces = 1
+            if end and end >= start and len(targets) < num_shards:
+                pieces = max(1, round(num_shards * (end - start + 1) / total))
+            if pieces == 1:
+                shards.append((target, None))
+                continue
+            bounds = np.linspace(start, end + 1, pieces + 1).astype(int).tolist()
+            for idx in range(pieces):
+                # leave the last shard open-ended unless the region had an end
+                # since the contig length might only be an estimate
+                stop = bounds[idx + 1] - 1
+                if idx == pieces - 1 and (region is None or not match["end"]):
+                    stop = ""
+                shards.append(
+                    (f"{contig}:{bounds[idx]}-{stop}", bounds[idx] if idx else None)
+                )
+        if len(shards) < 2:
+            return None
+        return shards
+
+    def _read_shards(
+        self,
         region: str = None,
         samples: set[str] = None,
         variants: set[str] = None,
-    ) -> Genotypes:
+        workers: int = 2,
+    ) -> bool:
         """
-        Load genotypes from a VCF file
+        Read shards of the file in parallel and concatenate them
 
-        Read the file contents, check the genotype phase, and create the MAC matrix
+        This is a helper function for :py:meth:`~.Genotypes.read`
 
         Parameters
         ----------
-        fname
-            See documentation for :py:attr:`~.Data.fname`
         region : str, optional
             See documentation for :py:meth:`~.Genotypes.read`
         samples : set[str], optional
             See documentation for :py:meth:`~.Genotypes.read`
         variants : set[str], optional
             See documentation for :py:meth:`~.Genotypes.read`
+        workers : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
 
         Returns
         -------
-        Genotypes
-            A Genotypes object with the data loaded into its properties
+        bool
+            True if the genotypes were loaded and False if the file could not be split
+            into shards
         """
-        genotypes = cls(fname)
-        genotypes.read(region, samples, variants)
-        genotypes.check_missing()
-        genotypes.check_biallelic()
-        genotypes.check_phase()
-        # genotypes.to_MAC()
-        return genotypes
+        shards = self._shard_regions(region, workers)
+        if shards is None:
+            self.log.warning(
+                "Unable to split the file into shards for parallel reading. Check that"
+                " it has been indexed. Falling back to serial reading."
+            )
+            return False
+        self.log.info(f"Reading {len(shards)} shards with {workers} workers")
+        regions = [region for region, _ in shards]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    _read_shard,
+                    repeat(self),
+                    regions,
+                    repeat(samples),
+                    repeat(variants),
+                )
+            )
+        # drop any variants that were already loaded by the previous shard
+        keep = [
+            slice(None) if min_pos is None else gts.variants["pos"] >= min_pos
+            for gts, (_, min_pos) in zip(results, shards)
+        ]
+        self._merge_shards(results, keep)
+        self.log.info(f"Loaded {len(self.variants)} variants from {len(shards)} shards")
+        return True
+
+    def _merge_shards(self, shards: list[Genotypes], keep: list[npt.NDArray]):
+        """
+        Concatenate the genotypes from each shard into this object
 
-    def read(
+        This is a helper function for :py:meth:`~.Genotypes._read_shards`. It's
+        separate so that it can easily be overridden in any child classes.
+
+        Parameters
+        ----------
+        shards : list[Genotypes]
+            The Genotypes objects containing each shard, in the order of the file
+        keep : list[npt.NDArray]
+            The variants to keep from each shard
+        """
+        self.samples = shards[0].samples
+        self.variants = np.concatenate(
+            [gts.variants[idx] for gts, idx in zip(shards, keep)]
+        )
+        data = [
+            gts.data[idx] if gts._variant_major else gts.data[:, idx]
+            for gts, idx in zip(shards, keep)
+            if gts.data.shape[gts._var_axis]
+        ]
+        if len(data) and len(self.variants):
+            self.data = np.concatenate(data, axis=self._var_axis)
+        else:
+            self.data = np.empty(shape=(0, 0, 0), dtype=np.uint8)
+
+    def _cache_path(
         self,
         region: str = None,
         samples: set[str] = None,
         variants: set[str] = None,
         max_variants: int = None,
-    ):
+    ) -> Path:
         """
-        Read genotypes from a VCF into a numpy matrix stored in :py:attr:`~.Genotypes.data`
+        Get the path to the cache directory for a particular set of read() parameters
 
-        Raises
-        ------
-        ValueError
-            If the genotypes array is empty
+        This is a helper function for :py:meth:`~.Genotypes.read`
 
         Parameters
         ----------
         region : str, optional
-            The region from which to extract genotypes; ex: 'chr1:1234-34566' or 'chr7'
+            See documentation for :py:meth:`~.Genotypes.read`
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        max_variants : int, optional
+            See documentation for :py:meth:`~.Genotypes.read`
 
-            For this to work, the VCF must be indexed and the seqname must match!
+        Returns
+        -------
+        Path
+            A subdirectory of the ".hgtcache" directory that sits next to the file
+        """
+        key = (
+            self.__class__.__name__,
+            getattr(self, "vcftype", None),
+            self._prephased,
+            self._variant_major,
+            region,
+            None if samples is None else sorted(samples),
+            None if variants is None else sorted(variants),
+            (
+                # max_variants is ignored if variants is provided
+                max_variants
+                if variants is None
+                else None
+            ),
+        )
+        digest = hashlib.sha1(repr(key).encode("utf8")).hexdigest()[:16]
+        return Path(str(self.fname) + ".hgtcache") / digest
 
-            Defaults to loading all genotypes
-        samples : set[str], optional
-            A subset of the samples from which to extract genotypes
+    def _file_stamp(self, fname: Path = None) -> dict[str, int]:
+        """
+        Identify the current version of the file by its size and modification time
 
-            Note that they are loaded in the same order as in the file
+        Parameters
+        ----------
+        fname : Path, optional
+            The file to identify, if not :py:attr:`~.Genotypes.fname`
 
-            Defaults to loading genotypes from all samples
-        variants : set[str], optional
-            A set of variant IDs for which to extract genotypes
+        Returns
+        -------
+        dict[str, int]
+            The size and modification time (in ns) of the file
+        """
+        stat = Path(self.fname if fname is None else fname).stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
 
-            All other variants will be ignored. This may be useful if you're running
-            out of memory.
-        max_variants : int, optional
-            The maximum mumber of variants to load from the file. Setting this value
-            helps preallocate the arrays, making the process faster and less memory
-            intensive. You should use this option if your processes are frequently
-            "Killed" from memory overuse.
+    def _source_stamp(self) -> tuple:
+        """
+        Identify the current version of the files from which the genotypes are read
 
-            If you don't know how many variants there are, set this to a large number
-            greater than what you would except. The np array will be resized
-            appropriately. You can also use the bcftools "counts" plugin to obtain the
-            number of expected sites within a region.
+        It's separate so that it can easily be overridden in any child classes that
+        read from more than one file.
 
-            Note that this value is ignored if the variants argument is provided.
+        Returns
+        -------
+        tuple
+            The resolved path to :py:attr:`~.Genotypes.fname` and its
+            :py:meth:`~.Genotypes._file_stamp`
         """
-        super().read()
-        records = self.__iter__(region=region, samples=samples, variants=variants)
-        if variants is not None:
-            max_variants = len(variants)
-        # check whether we can preallocate memory instead of making copies
-        if max_variants is None:
-            self.log.warning(
-                "The max_variants parameter was not specified. We have no choice but to"
-                " append to an ever-growing array, which can lead to memory overuse!"
-            )
-            variants_arr = []
-            data_arr = []
-            for rec in records:
-                variants_arr.append(rec.variants)
-                data_arr.append(rec.data)
-            self.log.info(f"Copying {len(variants_arr)} variants into np arrays.")
-            # convert to np array for speedy operations later on
-            self.variants = np.array(variants_arr, dtype=self.variants.dtype)
-            self.data = np.array(data_arr, dtype=np.uint8)
+        return (str(Path(self.fname).resolve()), self._file_stamp())
+
+    def _read_cache(self, cache_dir: Path) -> bool:
+        """
+        Load genotypes from a cache directory created by
+        :py:meth:`~.Genotypes._write_cache`
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        cache_dir : Path
+            The path returned by :py:meth:`~.Genotypes._cache_path`
+
+        Returns
+        -------
+        bool
+            True if the genotypes were loaded from the cache and False otherwise
+        """
+        meta_file = cache_dir / "meta.json"
+        if not meta_file.exists():
+            return False
+        with open(meta_file) as meta_fh:
+            meta = json.load(meta_fh)
+        if meta["stamp"] != self._file_stamp():
+            self.log.info(f"Ignoring stale genotype cache in {cache_dir}")
+            return False
+        self.log.info(f"Loading genotypes from cache in {cache_dir}")
+        self.samples = tuple(np.load(cache_dir / "samples.npy").tolist())
+        plain = np.load(cache_dir / "variants.npy", mmap_mode="c")
+        if plain.dtype == self.variants.dtype:
+            self.variants = plain
         else:
-            # preallocate arrays! this will save us lots of memory and speed b/c
-            # appends can sometimes make copies
-            self.variants = np.empty((max_variants,), dtype=self.variants.dtype)
-            # in order to check_phase() later, we must store the phase info, as well
-            self.data = np.empty(
-                (max_variants, len(self.samples), (2 + (not self._prephased))),
-                dtype=np.uint8,
+            self.variants = np.empty(len(plain), dtype=self.variants.dtype)
+            for name in plain.dtype.names:
+                self.variants[name] = plain[name]
+            # fields of type object (like alleles) were stored as joined strings
+            for name in meta["joined"]:
+                joined = np.load(cache_dir / f"{name}.npy")
+                for idx, val in enumerate(joined.tolist()):
+                    self.variants[name][idx] = tuple(val.split(","))
+        self.data = np.load(cache_dir / "data.npy", mmap_mode="c")
+        return True
+
+    def _write_cache(self, cache_dir: Path):
+        """
+        Store the genotypes in a cache directory as raw .npy files so that they can be
+        memory-mapped by :py:meth:`~.Genotypes._read_cache`
+
+        This is a helper function for :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        cache_dir : Path
+            The path returned by :py:meth:`~.Genotypes._cache_path`
+        """
+        self.log.info(f"Caching genotypes in {cache_dir}")
+        joined = [
+            name
+            for name, (dtype, *_) in self.variants.dtype.fields.items()
+            if dtype == np.dtype(object)
+        ]
+        plain = [name for name in self.variants.dtype.names if name not in joined]
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            np.save(cache_dir / "data.npy", self.data)
+            np.save(cache_dir / "samples.npy", np.array(self.samples, dtype=str))
+            variants = np.empty(
+                len(self.variants),
+                dtype=[(name, self.variants.dtype[name]) for name in plain],
             )
-            num_seen = 0
-            for rec in records:
-                if num_seen >= max_variants:
-                    break
-                self.variants[num_seen] = rec.variants
-                self.data[num_seen] = rec.data
-                num_seen += 1
-            if max_variants > num_seen:
-                self.log.info(
-                    f"Removing {max_variants-num_seen} unneeded variant records that "
-                    "were preallocated b/c max_variants was specified."
+            for name in plain:
+                variants[name] = self.variants[name]
+            np.save(cache_dir / "variants.npy", variants)
+            for name in joined:
+                np.save(
+                    cache_dir / f"{name}.npy",
+                    np.array([",".join(val) for val in self.variants[name]], dtype=str),
                 )
-                self.variants = self.variants[:num_seen]
-                self.data = self.data[:num_seen]
-        if 0 in self.data.shape:
-            self.log.warning(
-                "Failed to load genotypes. If you specified a region, check that the"
-                " contig name matches! For example, double-check the 'chr' prefix."
-            )
-            self.data = np.empty(shape=(0, 0, 0), dtype=self.data.dtype)
-        else:
-            # transpose the GT matrix so that samples are rows and variants are columns
-            self.log.info(f"Transposing genotype matrix of size {self.data.shape}")
-            self.data = self.data.transpose((1, 0, 2))
+            # write the metadata last, since its presence marks the cache as complete
+            with open(cache_dir / "meta.json", "w") as meta_fh:
+                json.dump({"stamp": self._file_stamp(), "joined": joined}, meta_fh)
+        except OSError as e:
+            self.log.warning(f"Failed to cache genotypes in {cache_dir}: {e}")
 
-    def _variant_arr(self, record: Variant):
+    def _variant_fields(self, record: Variant) -> tuple:
         """
-        Construct a np array from the metadata in a line of the VCF
+        Extract the metadata in a line of the VCF
 
         This is a helper function for :py:meth:`~.Genotypes._iterate`. It's separate
         so that it can easily be overridden in any child classes.
 
+        Parameters
+        ----------
+        record: Variant
+            A Variant object from which to fetch metadata
+
+        Returns
+        -------
+        tuple
+            The value of each field in a row of the :py:attr:`~.Genotypes.variants`
+            array, in order
+        """
+        # there are usually only a few distinct contigs, so we intern them to share
+        # a single copy of each
+        return (record.ID, sys.intern(record.CHROM), record.POS)
+
+    def _variant_arr(self, record: Variant):
+        """
+        Construct a np array from the metadata in a line of the VCF
+
+        This is a helper function for :py:meth:`~.Genotypes._iterate`. Child classes
+        should override :py:meth:`~.Genotypes._variant_fields` instead.
+
         Parameters
         ----------
         record: Variant
@@ -226,27 +2214,56 @@ class Genotypes(Data):
         npt.NDArray
             A row from the :py:attr:`~.Genotypes.variants` array
         """
-        return np.array(
-            (record.ID, record.CHROM, record.POS),
-            dtype=self.variants.dtype,
-        )
+        return np.array(self._variant_fields(record), dtype=self.variants.dtype)
+
+    def _variant_getter(self, fields: bool = False):
+        """
+        Choose the method for extracting the metadata in each line of the VCF
+
+        This is a helper function for :py:meth:`~.Genotypes._iterate`
+
+        Parameters
+        ----------
+        fields: bool, optional
+            See documentation for :py:meth:`~.Genotypes._iterate`
+
+        Returns
+        -------
+        Callable
+            Either :py:meth:`~.Genotypes._variant_fields` or
+            :py:meth:`~.Genotypes._variant_arr`
+        """
+        # respect child classes that still override _variant_arr
+        if fields and type(self)._variant_arr is Genotypes._variant_arr:
+            return self._variant_fields
+        return self._variant_arr
 
-    def _vcf_iter(self, vcf: VCF, region: str):
+    def _vcf_iter(self, vcf: VCF, region: str, variants: set[str] = None):
         """
         Yield all variants within a region in the VCF file.
 
+        If variants are requested without a region and the file has been indexed by
+        :py:meth:`~.Genotypes.write_id_index`, only the regions that contain them
+        are read.
+
         Parameters
         ----------
         vcf: VCF
             The VCF object from which to fetch variant records
         region : str, optional
             See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
 
         Returns
         -------
         vcffile : VCF
             Iterable cyvcf2 instance.
         """
+        if region is None and variants is not None:
+            regions = self._id_regions(variants)
+            if regions is not None:
+                return self._iter_regions(vcf, regions)
         return vcf(region)
 
     def _return_data(self, variant: Variant):
@@ -265,7 +2282,13 @@ class Genotypes(Data):
         """
         return variant.genotype.array().astype(np.uint8)
 
-    def _iterate(self, vcf: VCF, region: str = None, variants: set[str] = None):
+    def _iterate(
+        self,
+        vcf: VCF,
+        region: str = None,
+        variants: set[str] = None,
+        fields: bool = False,
+    ):
         """
         A generator over the lines of a VCF
 
@@ -279,6 +2302,12 @@ class Genotypes(Data):
             See documentation for :py:meth:`~.Genotypes.read`
         variants : set[str], optional
             See documentation for :py:meth:`~.Genotypes.read`
+        fields: bool, optional
+            Whether to encode the metadata of each variant as a tuple of its fields
+            instead of as a row of the :py:attr:`~.Genotypes.variants` array
+
+            This saves :py:meth:`~.Genotypes.read` from allocating a new np array for
+            every line
 
         Yields
         ------
@@ -288,17 +2317,18 @@ class Genotypes(Data):
         """
         self.log.info(f"Loading genotypes from {len(self.samples)} samples")
         Record = namedtuple("Record", "data variants")
+        variant_getter = self._variant_getter(fields)
         num_seen = 0
         # iterate over each line in the VCF
         # note, this can take a lot of time if there are many samples
-        for variant in self._vcf_iter(vcf, region):
+        for variant in self._vcf_iter(vcf, region, variants):
             if variants is not None and variant.ID not in variants:
                 if num_seen >= len(variants):
                     # exit early if we've already found all the variants
                     break
                 continue
             # save meta information about each variant
-            variant_arr = self._variant_arr(variant)
+            variant_arr = variant_getter(variant)
             # extract the genotypes to a matrix of size n x 3
             # the last dimension has three items:
             # 1) presence of REF in strand one
@@ -330,6 +2360,28 @@ class Genotypes(Data):
         Iterator[namedtuple]
             See documentation for :py:meth:`~.Genotypes._iterate`
         """
+        vcf = self._open_vcf(samples)
+        # call another function to force the lines above to be run immediately
+        # see https://stackoverflow.com/a/36726497
+        return self._iterate(vcf, region, variants)
+
+    def _open_vcf(self, samples: set[str] = None) -> VCF:
+        """
+        Open the VCF and record the samples that will be loaded from it
+
+        This is a helper function for :py:meth:`~.Genotypes.__iter__` and
+        :py:meth:`~.Genotypes.read`
+
+        Parameters
+        ----------
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        VCF
+            The cyvcf2 object from which to fetch variant records
+        """
         if samples is not None:
             if not isinstance(samples, set):
                 self.log.warning(
@@ -339,9 +2391,97 @@ class Genotypes(Data):
             samples = list(samples)
         vcf = VCF(str(self.fname), samples=samples, lazy=True)
         self.samples = tuple(vcf.samples)
-        # call another function to force the lines above to be run immediately
-        # see https://stackoverflow.com/a/36726497
-        return self._iterate(vcf, region, variants)
+        return vcf
+
+    def iter_chunks(
+        self,
+        chunk_size: int,
+        region: str = None,
+        samples: set[str] = None,
+        variants: set[str] = None,
+    ) -> Iterator[namedtuple]:
+        """
+        Read genotypes from a file in chunks of variants without storing anything
+
+        This is a middle ground between :py:meth:`~.Genotypes.__iter__` and
+        :py:meth:`~.Genotypes.read`: only chunk_size variants are ever held in memory
+        at once, but each chunk is stored as a single matrix
+
+        Parameters
+        ----------
+        chunk_size : int
+            The maximum number of variants in each chunk
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        Iterator[namedtuple]
+            An iterator over each chunk of variants in the file
+
+            Each chunk is a namedtuple with the same fields as those yielded by
+            :py:meth:`~.Genotypes.__iter__`, except that the data has shape
+            n x chunk_size x 2 (or x 3, if the phase is also stored) like
+            :py:attr:`~.Genotypes.data`, and the variants are a slice of
+            chunk_size rows of :py:attr:`~.Genotypes.variants`. The last chunk
+            may contain fewer than chunk_size variants.
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk_size must be a positive integer")
+        # each record's variant is stored in the chunk right away, so it doesn't need
+        # its own np array
+        records = self._iterate(self._open_vcf(samples), region, variants, fields=True)
+        return self._chunk_records(records, chunk_size)
+
+    def _chunk_records(
+        self, records: Iterator[namedtuple], chunk_size: int
+    ) -> Iterator[namedtuple]:
+        """
+        Collect the records yielded by :py:meth:`~.Genotypes.__iter__` into chunks
+
+        This is a helper function for :py:meth:`~.Genotypes.iter_chunks`
+
+        Parameters
+        ----------
+        records : Iterator[namedtuple]
+            The records returned by :py:meth:`~.Genotypes.__iter__`
+        chunk_size : int
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+
+        Yields
+        ------
+        Iterator[namedtuple]
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        """
+        records = iter(records)
+        while True:
+            first = next(records, None)
+            if first is None:
+                break
+            # preallocate each field of the chunk using the shape of the first record
+            # all fields besides "variants" have the samples as their first dimension
+            chunk = {
+                name: np.empty(
+                    (len(self.samples), chunk_size, *val.shape[1:]), dtype=val.dtype
+                )
+                for name, val in first._asdict().items()
+                if name != "variants"
+            }
+            variants_arr = np.empty((chunk_size,), dtype=self.variants.dtype)
+            num_seen = 0
+            for rec in chain((first,), islice(records, chunk_size - 1)):
+                for name, arr in chunk.items():
+                    arr[:, num_seen] = getattr(rec, name)
+                variants_arr[num_seen] = rec.variants
+                num_seen += 1
+            if num_seen < chunk_size:
+                chunk = {name: arr[:, :num_seen] for name, arr in chunk.items()}
+                variants_arr = variants_arr[:num_seen]
+            yield type(first)(variants=variants_arr, **chunk)
 
     def index(self, samples: bool = True, variants: bool = True):
         """
@@ -410,6 +2550,8 @@ class Genotypes(Data):
         gts.samples = self.samples
         gts.variants = self.variants
         gts.data = self.data
+        gts._packed = self._packed
+        gts._variant_major = self._variant_major
         # Index the current set of samples and variants so we can have fast look-up
         self.index(samples=(samples is not None), variants=(variants is not None))
         # Subset the samples
@@ -424,7 +2566,10 @@ class Genotypes(Data):
             samp_idx = tuple(self._samp_idx[samp] for samp in gts.samples)
             if inplace:
                 self._samp_idx = None
-            gts.data = gts.data[samp_idx, :]
+            if self._packed:
+                gts.data = self._subset_packed_samples(gts.data, samp_idx)
+            else:
+                gts.data = np.take(gts.data, samp_idx, axis=self._samp_axis)
         # Subset the variants
         if variants is not None:
             var_idx = [self._var_idx[var] for var in variants if var in self._var_idx]
@@ -437,10 +2582,137 @@ class Genotypes(Data):
             gts.variants = self.variants[var_idx]
             if inplace:
                 self._var_idx = None
-            gts.data = gts.data[:, var_idx]
+            gts.data = np.take(gts.data, var_idx, axis=self._var_axis)
         if not inplace:
             return gts
 
+    @staticmethod
+    def _subset_packed_samples(
+        data: npt.NDArray[np.uint8], samp_idx: tuple[int]
+    ) -> npt.NDArray[np.uint8]:
+        """
+        Extract a subset of the samples from a bit-packed genotype matrix
+
+        This is a helper function for :py:meth:`~.Genotypes.subset`. Only the bits of
+        the requested samples are ever unpacked, so the full matrix is never expanded.
+
+        Parameters
+        ----------
+        data: npt.NDArray[np.uint8]
+            A bit-packed genotype matrix. See :py:meth:`~.Genotypes.pack`
+        samp_idx: tuple[int]
+            The indices of the samples to keep, in the order in which they should
+            appear
+
+        Returns
+        -------
+        npt.NDArray[np.uint8]
+            A new bit-packed genotype matrix containing only the requested samples
+        """
+        samp_idx = np.array(samp_idx, dtype=np.uintp)
+        # each sample is stored at bit (7 - idx % 8) of byte (idx // 8)
+        shifts = (7 - (samp_idx % 8)).astype(np.uint8)[:, np.newaxis, np.newaxis]
+        bits = (data[samp_idx // 8] >> shifts) & 1
+        return np.packbits(bits, axis=0)
+
+    def pack(self):
+        """
+        Bit-pack the genotypes in :py:attr:`~.Genotypes.data` so that each strand of
+        each sample takes up a single bit instead of a byte
+
+        The bits of consecutive samples are packed together into the same bytes, so
+        the result has shape ceil(n/8) x p x 2. This cuts memory usage eightfold and
+        lets allele counting and haplotype matching operate on many samples at once.
+
+        This function modifies :py:attr:`~.Genotypes.data` in-place
+
+        .. note::
+            You must call :py:meth:`~.Genotypes.check_biallelic` and
+            :py:meth:`~.Genotypes.check_phase` before executing this method, since only
+            phased, biallelic hard calls can be packed. Missing genotypes cannot be
+            represented, so you should also call :py:meth:`~.Genotypes.check_missing`.
+
+        Raises
+        ------
+        ValueError
+            If the genotypes are not yet biallelic, still contain phase information, or
+            are stored in variant-major order
+        """
+        if self._packed:
+            self.log.warning("The genotypes have already been packed")
+            return
+        if self._variant_major:
+            raise ValueError(
+                "Only genotypes stored in sample-major order can be packed"
+            )
+        if self.data.dtype != np.bool_ or self.data.shape[2] != 2:
+            raise ValueError(
+                "Only biallelic, phased genotypes can be packed. Call check_biallelic()"
+                " and check_phase() first."
+            )
+        self.log.debug(f"Bit-packing genotype matrix of size {self.data.shape}")
+        self.data = np.packbits(self.data, axis=0)
+        self._packed = True
+
+    def unpack(self):
+        """
+        Reverse :py:meth:`~.Genotypes.pack`, restoring :py:attr:`~.Genotypes.data` to a
+        boolean array of shape n x p x 2
+
+        This function modifies :py:attr:`~.Genotypes.data` in-place
+        """
+        if not self._packed:
+            self.log.warning("The genotypes are not packed")
+            return
+        self.data = np.unpackbits(self.data, axis=0, count=len(self.samples)).astype(
+            np.bool_
+        )
+        self._packed = False
+
+    def _discard(
+        self,
+        keep_samples: npt.NDArray[np.bool_] = None,
+        keep_variants: npt.NDArray[np.bool_] = None,
+        inplace: bool = False,
+    ):
+        """
+        Discard samples and variants from this object
+
+        The kept samples and variants are copied to a new genotype matrix, unless
+        inplace is set, in which case they are shifted down inside the existing one.
+        The variants array is small enough to simply be subset, which also keeps it
+        safe to share with other objects.
+
+        It's separate so that it can easily be overridden in any child classes that
+        store other per-genotype properties.
+
+        Parameters
+        ----------
+        keep_samples : npt.NDArray[np.bool_], optional
+            A mask denoting the samples to keep. Defaults to keeping all of them
+        keep_variants : npt.NDArray[np.bool_], optional
+            A mask denoting the variants to keep. Defaults to keeping all of them
+        inplace : bool, optional
+            Whether the genotype matrix may be overwritten, instead of copied
+
+            Only set this if nothing else could be sharing the matrix (ex: if it was
+            just allocated by :py:meth:`~.Genotypes.read`)
+        """
+        if keep_samples is not None and not np.all(keep_samples):
+            self.data = _compact(
+                self.data, keep_samples, axis=self._samp_axis, inplace=inplace
+            )
+            self.samples = tuple(
+                samp for samp, keep in zip(self.samples, keep_samples) if keep
+            )
+            self._samp_idx = None
+        if keep_variants is not None and not np.all(keep_variants):
+            self.data = _compact(
+                self.data, keep_variants, axis=self._var_axis, inplace=inplace
+            )
+            self.variants = self.variants[keep_variants]
+            self._var_idx = None
+
     def check_missing(self, discard_also=False):
         """
         Check that each sample is properly genotyped
@@ -456,21 +2728,24 @@ class Genotypes(Data):
             If True, discard any samples that are missing genotypes without raising a
             ValueError
         """
+        if self._packed:
+            # packed genotypes are hard calls, so none of them can be missing
+            return
         # check: are there any samples that have genotype values that are empty?
         # A genotype value equal to the max or one less than max for uint8 indicates
         #   the value was missing
-        missing = np.any(self.data[:, :, :2] >= np.iinfo(np.uint8).max - 1, axis=2)
+        missing = np.any(
+            self._sample_major()[:, :, :2] >= np.iinfo(np.uint8).max - 1, axis=2
+        )
         if np.any(missing):
             samp_idx, variant_idx = np.nonzero(missing)
             if discard_also:
                 original_num_samples = len(self.samples)
-                self.data = np.delete(self.data, samp_idx, axis=0)
-                self.samples = tuple(np.delete(self.samples, samp_idx))
+                self._discard(keep_samples=~np.any(missing, axis=1))
                 self.log.warning(
                     "Ignoring missing genotypes from "
                     f"{original_num_samples - len(self.samples)} samples"
                 )
-                self._samp_idx = None
             else:
                 raise ValueError(
                     "Genotype with ID {} at POS {}:{} is missing for sample {}".format(
@@ -478,7 +2753,7 @@ class Genotypes(Data):
                         self.samples[samp_idx[0]],
                     )
                 )
-        if discard_also and not self.data.shape[0]:
+        if discard_also and not self.data.shape[self._samp_axis]:
             self.log.warning(
                 "All samples were discarded! Check that that none of your variants are"
                 " missing genotypes (GT: '.|.')."
@@ -500,19 +2775,17 @@ class Genotypes(Data):
         discard_also : bool, optional
             If True, discard any multiallelic variants without raising a ValueError
         """
-        if self.data.dtype == np.bool_:
+        if self.data.dtype == np.bool_ or self._packed:
             self.log.warning("All genotypes are already biallelic")
             return
         # check: are there any variants that have genotype values above 1?
         # A genotype value above 1 would imply the variant has more than one ALT allele
-        multiallelic = np.any(self.data[:, :, :2] > 1, axis=2)
+        multiallelic = np.any(self._sample_major()[:, :, :2] > 1, axis=2)
         if np.any(multiallelic):
             samp_idx, variant_idx = np.nonzero(multiallelic)
             if discard_also:
                 self.log.info(f"Ignoring {len(variant_idx)} multiallelic variants")
-                self.data = np.delete(self.data, variant_idx, axis=1)
-                self.variants = np.delete(self.variants, variant_idx)
-                self._var_idx = None
+                self._discard(keep_variants=~np.any(multiallelic, axis=0))
             else:
                 raise ValueError(
                     "Variant with ID {} at POS {}:{} is multiallelic for sample {}"
@@ -521,7 +2794,7 @@ class Genotypes(Data):
                         self.samples[samp_idx[0]],
                     )
                 )
-        if discard_also and not self.data.shape[1]:
+        if discard_also and not self.data.shape[self._var_axis]:
             self.log.warning(
                 "All variants were discarded! Check that there are biallelic variants "
                 "in your dataset."
@@ -543,9 +2816,9 @@ class Genotypes(Data):
             self.log.warning("Phase information has already been removed from the data")
             return
         # check: are there any variants that are heterozygous and unphased?
-        data = self.data
+        data = self._sample_major()
         if data.dtype != np.bool_:
-            data = self.data.astype(np.bool_)
+            data = data.astype(np.bool_)
         unphased = (data[:, :, 0] ^ data[:, :, 1]) & (~data[:, :, 2])
         if np.any(unphased):
             samp_idx, variant_idx = np.nonzero(unphased)
@@ -595,9 +2868,18 @@ class Genotypes(Data):
         -------
             The minor allele frequency of each variant
         """
-        num_strands = 2 * self.data.shape[0]
+        num_strands = 2 * (
+            len(self.samples) if self._packed else self.data.shape[self._samp_axis]
+        )
         # TODO: make this work for multi-allelic variants, too?
-        ref_af = self.data[:, :, :2].astype(np.bool_).sum(axis=(0, 2)) / num_strands
+        if self._packed:
+            # count the set bits in each variant; padding bits are always unset
+            alt_cts = _POPCOUNT[self.data].sum(axis=(0, 2))
+        else:
+            alt_cts = (
+                self.data[:, :, :2].astype(np.bool_).sum(axis=(self._samp_axis, 2))
+            )
+        ref_af = alt_cts / num_strands
         maf = np.array([ref_af, 1 - ref_af]).min(axis=0)
         if threshold is None:
             return maf
@@ -606,14 +2888,12 @@ class Genotypes(Data):
             idx = np.nonzero(rare_variants)[0]
             if discard_also:
                 original_num_variants = len(self.variants)
-                self.data = np.delete(self.data, idx, axis=1)
-                self.variants = np.delete(self.variants, idx)
-                maf = np.delete(maf, idx)
+                self._discard(keep_variants=~rare_variants)
+                maf = maf[~rare_variants]
                 self.log.info(
                     f"Ignoring {original_num_variants - len(self.variants)} variants "
                     f"with MAF < {threshold}"
                 )
-                self._var_idx = None
             else:
                 vals = tuple(self.variants[idx[0]])[:3] + (maf[idx[0]], threshold)
                 msg = "Variant with ID {} at POS {}:{} has MAF {} < {}".format(*vals)
@@ -690,22 +2970,258 @@ class Genotypes(Data):
         gts.samples = objs[0].samples
         dtypes = list(gts.variants.dtype.names)
         gts.variants = np.concatenate(tuple(obj.variants[dtypes] for obj in objs))
+        # keep the genotypes variant-major only if they all were, to begin with
+        gts._variant_major = all(obj._variant_major for obj in objs)
+        data = [
+            (
+                obj.data
+                if obj._variant_major == gts._variant_major
+                else obj._sample_major()
+            )
+            for obj in objs
+        ]
         unphased = [obj.data.shape[2] == 3 for obj in objs]
         # check: do we have a mix of phased and unphased objects?
         if any(unphased) and not all(unphased):
             data = (
-                obj.data if phase else np.insert(obj.data, 2, 1, axis=2)
-                for phase, obj in zip(unphased, objs)
+                arr if phase else np.insert(arr, 2, 1, axis=2)
+                for phase, arr in zip(unphased, data)
             )
+        dtype = _merged_dtype([obj.data for obj in objs])
+        gts.data = np.concatenate(tuple(data), axis=gts._var_axis, dtype=dtype)
+        return gts
+
+    @staticmethod
+    def _variant_keys(variants: npt.NDArray, on: str = "id") -> list:
+        """
+        Get the key of each variant by which to align variants across objects
+
+        This is a helper function for :py:meth:`~.Genotypes.merge_samples`
+
+        Parameters
+        ----------
+        variants: npt.NDArray
+            The variants, with the same fields as :py:attr:`~.Genotypes.variants`
+        on: str, optional
+            See documentation for :py:meth:`~.Genotypes.merge_samples`
+
+        Raises
+        ------
+        ValueError
+            If the variants cannot be aligned on the requested key
+
+        Returns
+        -------
+        list
+            The key of each variant, in order
+        """
+        if on == "id":
+            return variants["id"].tolist()
+        if on == "pos":
+            return list(zip(variants["chrom"].tolist(), variants["pos"].tolist()))
+        raise ValueError(f"Cannot align variants on '{on}'. Use either 'id' or 'pos'.")
+
+    @staticmethod
+    def _join_variants(keys: list[list]) -> list[npt.NDArray[np.intp]]:
+        """
+        Find the variants shared by every object via a hash join on their keys
+
+        This is a helper function for :py:meth:`~.Genotypes.merge_samples`
+
+        Parameters
+        ----------
+        keys: list[list]
+            The keys of the variants in each object, as returned by
+            :py:meth:`~.Genotypes._variant_keys`
+
+        Returns
+        -------
+        list[npt.NDArray[np.intp]]
+            For each object, the indices of the shared variants, in the order in which
+            they appear in the first object. Only the first occurrence of each key is
+            used.
+        """
+        # iterate in reverse so that the first occurrence of each key is kept
+        lookups = [
+            dict(zip(reversed(other), range(len(other) - 1, -1, -1)))
+            for other in keys[1:]
+        ]
+        indices = [[] for _ in keys]
+        seen = set()
+        for idx, key in enumerate(keys[0]):
+            matches = [lookup.get(key) for lookup in lookups]
+            if key in seen or None in matches:
+                continue
+            seen.add(key)
+            indices[0].append(idx)
+            for found, match in zip(indices[1:], matches):
+                found.append(match)
+        return [np.array(found, dtype=np.intp) for found in indices]
+
+    @staticmethod
+    def _stack_samples(
+        data: list[npt.NDArray], variant_major: bool = False
+    ) -> npt.NDArray:
+        """
+        Concatenate genotype matrices along their samples into a preallocated array
+
+        This is a helper function for :py:meth:`~.Genotypes.merge_samples`
+
+        Parameters
+        ----------
+        data: list[npt.NDArray]
+            The n_i x p x 2 (or x 3, if the phase is also stored) genotypes of each
+            object, all aligned to the same p variants
+        variant_major: bool, optional
+            Whether to store the output with the variants as rows
+
+        Returns
+        -------
+        npt.NDArray
+            The genotypes of all of the samples. If only some of the matrices store the
+            phase, the others are assumed to be phased.
+        """
+        num_samples = sum(arr.shape[0] for arr in data)
+        num_variants = data[0].shape[1]
+        strands = max(arr.shape[2] for arr in data)
+        dtype = _merged_dtype(data)
+        if variant_major:
+            out = np.empty((num_variants, num_samples, strands), dtype=dtype)
+            dest = out.swapaxes(0, 1)
         else:
-            data = (obj.data for obj in objs)
-        # TODO: fix Genotypes.check_biallelic so it always keeps data as np.uint8 and then adjust this code accordingly
-        dtype = (
-            np.bool_ if all(obj.data.dtype == np.bool_ for obj in objs) else np.uint8
+            out = dest = np.empty((num_samples, num_variants, strands), dtype=dtype)
+        start = 0
+        for arr in data:
+            end = start + arr.shape[0]
+            dest[start:end, :, : arr.shape[2]] = arr
+            if arr.shape[2] < strands:
+                dest[start:end, :, 2] = 1
+            start = end
+        return out
+
+    @classmethod
+    def merge_samples(
+        cls, objs: tuple[Genotypes], on: str = "id", **kwargs
+    ) -> Genotypes:
+        """
+        Merge genotypes objects with different sets of samples together
+
+        Only the variants shared by all of the objects are kept, in the order in which
+        they appear in the first object. The variants are matched via a hash join, so
+        they needn't be in the same order in each object.
+
+        .. note::
+            The input genotypes objects are not expected to have any overlapping
+            samples.
+
+        Parameters
+        ----------
+        objs: tuple[Genotypes]
+            The objects that should be merged together
+        on: str, optional
+            How to align the variants: either by their "id" or by their "chrom" and
+            "pos" (if "pos")
+        **kwargs
+            Any parameters to pass to :py:meth:`~.Genotypes._init__`
+
+        Raises
+        ------
+        ValueError
+            If any samples appear in more than one input object
+
+        Returns
+        -------
+        Genotypes
+            A new object containing the samples of all of the objects
+        """
+        gts = cls(**kwargs)
+        gts.samples = tuple(chain.from_iterable(obj.samples for obj in objs))
+        if len(set(gts.samples)) < len(gts.samples):
+            raise ValueError("Samples must be unique among all Genotypes")
+        indices = cls._join_variants(
+            [cls._variant_keys(obj.variants, on) for obj in objs]
         )
-        gts.data = np.concatenate(tuple(data), axis=1, dtype=dtype)
+        dtypes = list(gts.variants.dtype.names)
+        gts.variants = objs[0].variants[dtypes][indices[0]]
+        # keep the genotypes variant-major only if they all were, to begin with
+        gts._variant_major = all(obj._variant_major for obj in objs)
+        data = []
+        for obj, idx in zip(objs, indices):
+            if obj._packed:
+                arr = np.unpackbits(obj.data[:, idx], axis=0, count=len(obj.samples))
+                data.append(arr.astype(np.bool_))
+            else:
+                data.append(obj._sample_major()[:, idx])
+        gts.data = cls._stack_samples(data, gts._variant_major)
         return gts
 
+    @classmethod
+    def merge_samples_chunks(
+        cls, chunks: tuple[Iterator[namedtuple]], on: str = "id"
+    ) -> Iterator[namedtuple]:
+        """
+        Merge chunks of genotypes with different sets of samples together as they are
+        read
+
+        This is a streaming version of :py:meth:`~.Genotypes.merge_samples`. A chunk
+        is pulled from each input at a time and the variants shared by all of the
+        inputs so far are yielded. Any variants that precede the last shared variant
+        in an input are never shared, so they are dropped. As long as the shared
+        variants appear in the same order in each input, only a few chunks are held in
+        memory at once.
+
+        Parameters
+        ----------
+        chunks: tuple[Iterator[namedtuple]]
+            An iterator over the chunks of each input, like those returned by
+            :py:meth:`~.Genotypes.iter_chunks`
+        on: str, optional
+            See documentation for :py:meth:`~.Genotypes.merge_samples`
+
+        Yields
+        ------
+        Iterator[namedtuple]
+            Chunks of the merged genotypes, with the same fields as those yielded by
+            :py:meth:`~.Genotypes.iter_chunks`. The samples are stored in the same
+            order as the inputs.
+        """
+        Record = namedtuple("Record", "data variants")
+        chunks = [iter(chunk) for chunk in chunks]
+        # the data, variants, and keys of the variants that haven't been matched yet
+        pending = [None] * len(chunks)
+        while True:
+            new = [next(chunk, None) for chunk in chunks]
+            if all(chunk is None for chunk in new):
+                break
+            for src, chunk in enumerate(new):
+                if chunk is None:
+                    continue
+                keys = cls._variant_keys(chunk.variants, on)
+                if pending[src] is None:
+                    pending[src] = (chunk.data, chunk.variants, keys)
+                    continue
+                data, variants, old_keys = pending[src]
+                pending[src] = (
+                    np.concatenate((data, chunk.data), axis=1),
+                    np.concatenate((variants, chunk.variants)),
+                    old_keys + keys,
+                )
+            if any(pend is None for pend in pending):
+                continue
+            indices = cls._join_variants([pend[2] for pend in pending])
+            if not len(indices[0]):
+                continue
+            yield Record(
+                cls._stack_samples(
+                    [pend[0][:, idx] for pend, idx in zip(pending, indices)]
+                ),
+                pending[0][1][indices[0]],
+            )
+            # drop everything up to and including the last shared variant in each input
+            for src, (data, variants, keys) in enumerate(pending):
+                last = indices[src].max() + 1
+                pending[src] = (data[:, last:], variants[last:], keys[last:])
+
 
 class GenotypesVCF(Genotypes):
     """
@@ -736,82 +3252,482 @@ class GenotypesVCF(Genotypes):
         dtype = {k: v[0] for k, v in self.variants.dtype.fields.items()}
         self.variants = np.array([], dtype=list(dtype.items()) + [("alleles", object)])
 
-    def _variant_arr(self, record: Variant):
+    def _variant_fields(self, record: Variant) -> tuple:
         """
-        See documentation for :py:meth:`~.Genotypes._variant_arr`
+        See documentation for :py:meth:`~.Genotypes._variant_fields`
         """
-        return np.array(
-            (
-                record.ID,
-                record.CHROM,
-                record.POS,
-                (record.REF, *record.ALT),
+        return (*super()._variant_fields(record), (record.REF, *record.ALT))
+
+    @staticmethod
+    def _variant_lines(variants: npt.NDArray) -> Iterator[str]:
+        """
+        Format the CHROM, POS, ID, REF, and ALT columns of a VCF for each variant
+
+        Every column is formatted all at once, so that no Python code runs per
+        variant
+
+        Parameters
+        ----------
+        variants : npt.NDArray
+            The variants, with the same fields as :py:attr:`~.GenotypesVCF.variants`
+
+        Returns
+        -------
+        Iterator[str]
+            The tab-separated columns for each variant, without a final tab
+        """
+        alleles = variants["alleles"].tolist()
+        return map(
+            "\t".join,
+            zip(
+                variants["chrom"].tolist(),
+                variants["pos"].astype(str).tolist(),
+                variants["id"].tolist(),
+                map(itemgetter(0), alleles),
+                # variants without any ALT alleles get the missing value, instead
+                (
+                    ",".join(alt) or "."
+                    for alt in map(itemgetter(slice(1, None)), alleles)
+                ),
             ),
-            dtype=self.variants.dtype,
         )
 
-    def write(self):
+    def _vcf_header(self, formats: list[tuple[str, str, str]], contigs=None) -> str:
+        """
+        Create the header of a VCF
+
+        Parameters
+        ----------
+        formats : list[tuple[str, str, str]]
+            The ID, Number, and Description of each FORMAT field, in order
+        contigs : list[str], optional
+            The contigs to declare in the header
+
+            Defaults to every contig in :py:attr:`~.GenotypesVCF.variants`, in the
+            order in which they first appear
+
+        Returns
+        -------
+        str
+            The header lines, including the final newline
+        """
+        if contigs is None:
+            chroms = self.variants["chrom"]
+            contigs = chroms[np.sort(np.unique(chroms, return_index=True)[1])].tolist()
+        lines = [
+            "##fileformat=VCFv4.2",
+            '##FILTER=<ID=PASS,Description="All filters passed">',
+        ]
+        lines += [f"##contig=<ID={contig}>" for contig in contigs]
+        lines += [
+            f'##FORMAT=<ID={fid},Number={num},Type=String,Description="{desc}">'
+            for fid, num, desc in formats
+        ]
+        columns = ["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO"]
+        if len(self.samples):
+            columns += ["FORMAT", *self.samples]
+        lines.append("\t".join(columns))
+        return "\n".join(lines) + "\n"
+
+    def _vcf_blocks(self, size: int = None) -> Iterator[tuple[int, int, npt.NDArray]]:
+        """
+        Split the genotypes into blocks of variants for formatting
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write`
+
+        Parameters
+        ----------
+        size : int, optional
+            The maximum number of genotypes in each block
+
+            Defaults to _VCF_WRITE_BLOCK
+
+        Yields
+        ------
+        Iterator[tuple[int, int, npt.NDArray]]
+            The start and end of each block and its genotypes as a variant-major
+            array of type np.uint8, in which the phase of each genotype is either 0
+            or 1 (and always 1 if the genotypes are assumed to be phased)
+        """
+        num_samples = len(self.samples)
+        if size is None:
+            size = _VCF_WRITE_BLOCK
+        block_size = max(1, size // max(num_samples, 1))
+        phased = self._prephased or (self.data.shape[2] < 3)
+        for start in range(0, len(self.variants), block_size):
+            end = min(start + block_size, len(self.variants))
+            if self._variant_major:
+                block = self.data[start:end]
+            else:
+                block = self.data[:, start:end]
+                if self._packed:
+                    block = np.unpackbits(block, axis=0, count=num_samples)
+                block = block.swapaxes(0, 1)
+            gts = np.empty((end - start, num_samples, 3), dtype=np.uint8)
+            gts[:, :, :2] = block[:, :, :2]
+            gts[:, :, 2] = 1 if phased else block[:, :, 2] != 0
+            yield start, end, gts
+
+    def _gt_columns(self, gts: npt.NDArray[np.uint8]) -> list[bytes]:
+        """
+        Format the GT field of each sample for a block of variants
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write`
+
+        Parameters
+        ----------
+        gts : npt.NDArray[np.uint8]
+            A block of genotypes, as yielded by :py:meth:`~.GenotypesVCF._vcf_blocks`
+
+        Returns
+        -------
+        list[bytes]
+            The GT tokens of every sample in each variant, each preceded by a tab
+        """
+        num_vars, num_samples = gts.shape[:2]
+        tokens = _gt_tokens()[gts[:, :, 2], gts[:, :, 0], gts[:, :, 1]]
+        # most genotypes have single-digit alleles, so their tokens are all three
+        # characters long and can be formatted as a single block of bytes
+        short = ((gts[:, :, :2] < 10) | (gts[:, :, :2] == 255)).all(axis=(1, 2))
+        chars = np.empty((num_vars, num_samples, 4), dtype=np.uint8)
+        chars[:, :, 0] = ord("\t")
+        chars[:, :, 1:] = tokens.view(np.uint8).reshape(num_vars, num_samples, 7)[
+            :, :, :3
+        ]
+        return [
+            chars[idx].tobytes() if short[idx] else b"\t" + b"\t".join(tokens[idx])
+            for idx in range(num_vars)
+        ]
+
+    def _sample_columns(self, start: int, end: int, gts: npt.NDArray) -> list[bytes]:
+        """
+        Format the FORMAT fields of each sample for a block of variants
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write`. It's separate
+        so that child classes can easily add their own FORMAT fields.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first variant in the block
+        end : int
+            The index after the last variant in the block
+        gts : npt.NDArray[np.uint8]
+            A block of genotypes, as yielded by :py:meth:`~.GenotypesVCF._vcf_blocks`
+
+        Returns
+        -------
+        list[bytes]
+            The FORMAT fields of every sample in each variant, each preceded by a tab
+        """
+        return self._gt_columns(gts)
+
+    def _vcf_out(self, fname: Path, threads: int = 1):
+        """
+        Open a VCF for writing in binary mode
+
+        Parameters
+        ----------
+        fname : Path
+            The path to the VCF or "-" for stdout. It will be BGZF-compressed if it
+            ends in ".gz" or ".bgz"
+        threads : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+
+        Returns
+        -------
+        IO
+            The file object
+        """
+        if fname.suffix in (".gz", ".bgz"):
+            return _BGZFWriter(fname, threads)
+        if str(fname) == "-":
+            # write to stdout without closing it afterward
+            return open(1, "wb", closefd=False)
+        return open(fname, "wb")
+
+    def _finish_vcf(
+        self, fname: Path, threads: int = 1, index: bool = False, max_pos: int = None
+    ):
+        """
+        Convert a VCF to BCF (if needed) and index it
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write`
+
+        Parameters
+        ----------
+        fname : Path
+            The path to the VCF that was written
+        threads : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        index : bool, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        max_pos : int, optional
+            The largest position in the VCF
+
+            Defaults to the largest in :py:attr:`~.GenotypesVCF.variants`
+        """
+        out_fname = Path(self.fname)
+        if fname != out_fname:
+            # translate each record to BCF without handling its samples in Python
+            with VariantFile(str(fname)) as vcf:
+                with VariantFile(
+                    str(out_fname), mode="wb", header=vcf.header, threads=threads
+                ) as bcf:
+                    for record in vcf:
+                        bcf.write(record)
+            fname.unlink()
+        if not index:
+            return
+        if out_fname.suffix == ".bcf":
+            from pysam import bcftools
+
+            bcftools.index("-f", str(out_fname))
+        elif out_fname.suffix in (".gz", ".bgz"):
+            if max_pos is None:
+                max_pos = self.variants["pos"].max() if len(self.variants) else 0
+            # tabix indices can't handle positions beyond 2^29
+            csi = max_pos >= (1 << 29)
+            tabix_index(str(out_fname), preset="vcf", force=True, csi=csi)
+        else:
+            self.log.warning(f"Cannot index uncompressed VCF {out_fname}")
+
+    def write(self, threads: int = 1, index: bool = False):
+        """
+        Write the variants in this class to a VCF at :py:attr:`~.GenotypesVCF.fname`
+
+        The records are formatted as text in blocks of variants. If the file name ends
+        in ".gz" or ".bgz", the VCF will be BGZF-compressed. If it ends in ".bcf", it
+        will be converted to BCF.
+
+        Parameters
+        ----------
+        threads : int, optional
+            The number of threads with which to compress the file
+        index : bool, optional
+            Whether to also create a tabix (or CSI) index of the compressed file
+        """
+        self._write_vcf([("GT", "1", "Genotype")], threads=threads, index=index)
+
+    def _write_vcf(
+        self,
+        formats: list[tuple[str, str, str]],
+        contigs: list[str] = None,
+        threads: int = 1,
+        index: bool = False,
+        block_size: int = None,
+    ):
+        """
+        Write the variants in this class to a VCF at :py:attr:`~.GenotypesVCF.fname`
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write`. The FORMAT
+        fields of each block of variants are formatted by
+        :py:meth:`~.GenotypesVCF._sample_columns`
+
+        Parameters
+        ----------
+        formats : list[tuple[str, str, str]]
+            See documentation for :py:meth:`~.GenotypesVCF._vcf_header`
+        contigs : list[str], optional
+            See documentation for :py:meth:`~.GenotypesVCF._vcf_header`
+        threads : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        index : bool, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        block_size : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF._vcf_blocks`
+        """
+        fname = self._vcf_text_out()
+        with self._vcf_out(fname, threads) as vcf:
+            vcf.write(self._vcf_header(formats, contigs).encode())
+            self.log.info("Writing VCF records")
+            self._write_records(vcf, self._format_col(formats), block_size)
+        self._finish_vcf(fname, threads, index)
+        if len(self.variants) == 0:
+            self.log.warning(f"No variants in {self.fname}.")
+
+    def _vcf_text_out(self) -> Path:
+        """
+        Choose the path to which the VCF records should be written as text
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write`. BCFs are first
+        written to a temporary VCF, which is later converted by
+        :py:meth:`~.GenotypesVCF._finish_vcf`
+
+        Returns
+        -------
+        Path
+            The path to the VCF
+        """
+        fname = Path(self.fname)
+        if fname.suffix == ".bcf":
+            fname = fname.with_name(fname.name + ".tmp.vcf")
+        return fname
+
+    def _format_col(self, formats: list[tuple[str, str, str]]) -> bytes:
+        """
+        Create the QUAL, FILTER, INFO, and FORMAT columns shared by every VCF record
+
+        Parameters
+        ----------
+        formats : list[tuple[str, str, str]]
+            See documentation for :py:meth:`~.GenotypesVCF._vcf_header`
+
+        Returns
+        -------
+        bytes
+            The columns, each preceded by a tab
+        """
+        format_col = b"\t.\t.\t."
+        if len(self.samples):
+            format_col += ("\t" + ":".join(fmt[0] for fmt in formats)).encode()
+        return format_col
+
+    def _write_records(self, vcf, format_col: bytes, block_size: int = None):
+        """
+        Write a VCF record for each variant in this class
+
+        This is a helper function for :py:meth:`~.GenotypesVCF.write` and
+        :py:meth:`~.GenotypesVCFWriter.append`
+
+        Parameters
+        ----------
+        vcf : IO
+            The file object returned by :py:meth:`~.GenotypesVCF._vcf_out`
+        format_col : bytes
+            See documentation for :py:meth:`~.GenotypesVCF._format_col`
+        block_size : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF._vcf_blocks`
+        """
+        for start, end, gts in self._vcf_blocks(block_size):
+            lines = self._variant_lines(self.variants[start:end])
+            for line, samples in zip(lines, self._sample_columns(start, end, gts)):
+                vcf.write(line.encode() + format_col + samples + b"\n")
+
+    def write_chunks(
+        self, contigs: list[str] = None, threads: int = 1, index: bool = False
+    ) -> GenotypesVCFWriter:
+        """
+        Write genotypes to a VCF at :py:attr:`~.GenotypesVCF.fname` one chunk of
+        variants at a time, without storing them all in memory
+
+        The samples are taken from :py:attr:`~.GenotypesVCF.samples`, and the header
+        is written right away. Each chunk must be in the same layout as
+        :py:attr:`~.GenotypesVCF.data` would be.
+
+        .. code-block:: python
+
+            with genotypes.write_chunks(contigs=["1"]) as writer:
+                for chunk in other_genotypes.iter_chunks(chunk_size=1000):
+                    writer.append(chunk.data, chunk.variants)
+
+        Parameters
+        ----------
+        contigs : list[str], optional
+            The contigs to declare in the header, since they must be known in advance
+
+            Defaults to those in :py:attr:`~.GenotypesVCF.variants`
+        threads : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        index : bool, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+
+        Returns
+        -------
+        GenotypesVCFWriter
+            A context manager whose ``append()`` method writes each chunk
+
+            If an error is raised inside of it, the partially written file is removed.
+        """
+        return GenotypesVCFWriter(self, contigs, threads, index)
+
+
+class GenotypesVCFWriter:
+    """
+    A context manager for writing genotypes to a VCF one chunk at a time
+
+    Create one with :py:meth:`~.GenotypesVCF.write_chunks`
+
+    Attributes
+    ----------
+    genotypes : GenotypesVCF
+        The object whose fname, samples, and settings determine what is written
+    contigs : list[str]
+        See documentation for :py:meth:`~.GenotypesVCF.write_chunks`
+    threads : int
+        See documentation for :py:meth:`~.GenotypesVCF.write`
+    index : bool
+        See documentation for :py:meth:`~.GenotypesVCF.write`
+    num_written : int
+        The number of variants that have been appended so far
+    """
+
+    def __init__(
+        self,
+        genotypes: GenotypesVCF,
+        contigs: list[str] = None,
+        threads: int = 1,
+        index: bool = False,
+    ):
+        self.genotypes = genotypes
+        self.contigs = contigs
+        self.threads = threads
+        self.index = index
+        self.num_written = 0
+        self._formats = [("GT", "1", "Genotype")]
+        self._fname = None
+        self._vcf = None
+        self._max_pos = 0
+
+    def __enter__(self) -> GenotypesVCFWriter:
+        gts = self.genotypes
+        self._fname = gts._vcf_text_out()
+        self._vcf = gts._vcf_out(self._fname, self.threads)
+        self._vcf.write(gts._vcf_header(self._formats, self.contigs).encode())
+        self._format_col = gts._format_col(self._formats)
+        gts.log.info(
+            f"Writing genotypes from {len(gts.samples)} samples to a VCF in chunks"
+        )
+        return self
+
+    def append(self, data: npt.NDArray, variants: npt.NDArray):
         """
-        Write the variants in this class to a VCF at :py:attr:`~.GenotypesVCF.fname`
+        Append a chunk of variants to the VCF
+
+        Parameters
+        ----------
+        data : npt.NDArray
+            The genotypes of the variants, in the same layout as
+            :py:attr:`~.GenotypesVCF.data`
+        variants : npt.NDArray
+            The variants, with the same fields as :py:attr:`~.GenotypesVCF.variants`
         """
-        vcf = VariantFile(str(self.fname), mode="w")
-        # make sure the header is properly structured
-        for contig in set(self.variants["chrom"]):
-            vcf.header.contigs.add(contig)
-        vcf.header.add_meta(
-            "FORMAT",
-            items=[
-                ("ID", "GT"),
-                ("Number", 1),
-                ("Type", "String"),
-                ("Description", "Genotype"),
-            ],
+        if not len(variants):
+            return
+        self.genotypes.log.debug(
+            f"Writing variant #{self.num_written} through variant "
+            f"#{self.num_written + len(variants)}"
         )
-        try:
-            vcf.header.add_samples(self.samples)
-        except AttributeError:
-            self.log.warning(
-                "Upgrade to pysam >=0.19.1 to reduce the time required to create "
-                "VCFs. See https://github.com/pysam-developers/pysam/issues/1104"
+        # reuse the settings of the genotypes, but not their data
+        chunk = copy(self.genotypes)
+        chunk.data = data
+        chunk.variants = variants
+        chunk._write_records(self._vcf, self._format_col)
+        self._max_pos = max(self._max_pos, int(variants["pos"].max()))
+        self.num_written += len(variants)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._vcf.close()
+        if exc_type is None:
+            self.genotypes._finish_vcf(
+                self._fname, self.threads, self.index, self._max_pos
             )
-            for sample in self.samples:
-                vcf.header.add_sample(sample)
-        self.log.info("Writing VCF records")
-        phased = self._prephased or (self.data.shape[2] < 3)
-        missing_val = np.iinfo(np.uint8).max
-        for var_idx, var in enumerate(self.variants):
-            rec = {
-                "contig": var["chrom"],
-                "start": var["pos"],
-                "stop": var["pos"] + len(var["alleles"][0]) - 1,
-                "qual": None,
-                "alleles": var["alleles"],
-                "id": var["id"],
-                "filter": None,
-            }
-            # handle pysam increasing the start site by 1
-            rec["start"] -= 1
-            # parse the record into a pysam.VariantRecord
-            record = vcf.new_record(**rec)
-            for samp_idx, sample in enumerate(self.samples):
-                record.samples[sample]["GT"] = tuple(
-                    None if val == missing_val else val
-                    for val in self.data[samp_idx, var_idx, :2]
-                )
-                # add proper phasing info
-                if phased:
-                    record.samples[sample].phased = True
-                else:
-                    record.samples[sample].phased = self.data[samp_idx, var_idx, 2]
-            # write the record to a file
-            vcf.write(record)
-        try:
-            vcf.close()
-        except OSError as e:
-            if e.errno == 9 and len(self.variants) == 0:
-                self.log.warning(f"No variants in {self.fname}.")
-            else:
-                raise e
+        else:
+            # don't leave a half-written file behind
+            try:
+                self._fname.unlink()
+            except FileNotFoundError:
+                pass
 
 
 class TRRecordHarmonizerRegion(trh.TRRecordHarmonizer):
@@ -915,7 +3831,7 @@ class GenotypesTR(Genotypes):
         genotypes.check_phase()
         return genotypes
 
-    def _vcf_iter(self, vcf: VCF, region: str = None):
+    def _vcf_iter(self, vcf: VCF, region: str = None, variants: set[str] = None):
         """
         Collect GTs (trh.TRRecord objects) to iterate over
 
@@ -925,6 +3841,8 @@ class GenotypesTR(Genotypes):
             The VCF object from which to fetch variant records
         region : str, optional
             See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
 
         Returns
         -------
@@ -932,7 +3850,9 @@ class GenotypesTR(Genotypes):
             TRRecord objects yielded from TRRecordHarmonizer
         """
         for record in TRRecordHarmonizerRegion(
-            vcffile=vcf, vcfiter=vcf(region), vcftype=self.vcftype
+            vcffile=vcf,
+            vcfiter=iter(super()._vcf_iter(vcf, region, variants)),
+            vcftype=self.vcftype,
         ):
             record.ID = record.record_id
             record.CHROM = record.chrom
@@ -1078,64 +3998,45 @@ class GenotypesPLINK(GenotypesVCF):
             self.samples = tuple(self.samples.values())
             return indices
 
-    def _check_region(
-        self, pos: tuple, chrom: str, start: int = 0, end: int = float("inf")
-    ):
-        """
-        Check that pos lies within the provided chrom, start, and end coordinates
-
-        This is a helper function for :py:meth:`~.GenotypesPLINK.read_variants`
-
-        Parameters
-        ----------
-        pos : tuple[str, int]
-            A tuple of two elements: contig (str) and chromosomal position (int)
-        chrom: str
-            The contig of the region to check
-        start: int, optional
-            The start position of the region
-        end: int, optional
-            The end position of the region
-        """
-        return (pos[0] == chrom) and (start <= pos[1]) and (end >= pos[1])
-
-    def _variant_arr(
-        self,
-        record: list[str],
-        cid: dict[str, int] = dict(zip(["CHROM", "POS", "ID", "REF", "ALT"], range(5))),
-    ):
+    def _select_variants(
+        self, region: str = None, variants: set[str] = None, pvar_cache: bool = False
+    ) -> tuple[tuple[npt.NDArray], npt.NDArray[np.uint32]]:
         """
-        Construct a np array from the metadata in a line of the PVAR file
+        Find the rows of the PVAR file that belong to a region or a set of variants
 
-        This is a helper function for :py:meth:`~.GenotypesPLINK._iterate_variants`.
-        It's separate so that it can easily be overridden in any child classes.
+        This is a helper function for :py:meth:`~.GenotypesPLINK.read_variants` and
+        :py:meth:`~.GenotypesPLINK._iterate_variants`
 
         Parameters
         ----------
-        record: list[str]
-            A list of the tab-separated fields in a line from the PVAR file
-        cid: dict[str, int]
-            A dictionary mapping each column of the PVAR file to its index, as declared
-            in the header
-
-            This helps cover cases where the order of the fields might be different
+        region : str, optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        variants : set[str], optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        pvar_cache : bool, optional
+            See documentation for :py:meth:`~.GenotypesPLINK.read`
 
         Returns
         -------
-        npt.NDArray
-            A row from the :py:attr:`~.GenotypesPLINK.variants` array
+        tuple[tuple[npt.NDArray], npt.NDArray[np.uint32]]
+            The columns returned by :py:meth:`~.GenotypesPLINK._load_pvar` and the
+            sorted indices of the selected rows
         """
-        # Parse the REF and ALT alleles from the PVAR record
-        alleles = (record[cid["REF"]], *record[cid["ALT"]].split(","))
-        return np.array(
-            (
-                record[cid["ID"]],
-                record[cid["CHROM"]],
-                record[cid["POS"]],
-                alleles,
-            ),
-            dtype=self.variants.dtype,
-        )
+        columns, contigs = self._load_pvar(pvar_cache)
+        ids, chroms, pos = columns[:3]
+        if region is not None:
+            indices = self._region_indices(region, chroms, pos, contigs)
+        else:
+            indices = np.arange(len(ids), dtype=np.uint32)
+        if variants is not None:
+            select = set(variants)
+            keep = np.fromiter(
+                (vr_id in select for vr_id in ids[indices].tolist()),
+                dtype=np.bool_,
+                count=len(indices),
+            )
+            indices = indices[keep]
+        return columns, indices
 
     def _iterate_variants(
         self,
@@ -1143,10 +4044,11 @@ class GenotypesPLINK(GenotypesVCF):
         variants: set[str] = None,
     ):
         """
-        A generator over the lines of a PVAR file
+        A generator over the variants in a PVAR file
 
         This is a helper function for :py:meth:`~.GenotypesPLINK._iterate` and
-        :py:meth:`~.GenotypesPLINK.read_variants`
+        :py:meth:`~.GenotypesPLINK._iterate_chunks`. The PVAR file is parsed all at
+        once, so that a region can be found via binary search.
 
         Parameters
         ----------
@@ -1158,69 +4060,403 @@ class GenotypesPLINK(GenotypesVCF):
         Yields
         ------
         Iterator[tuple[int, npt.NDArray]]
-            An iterator of tuples over each line in the file
+            An iterator of tuples over each variant in the file
 
-            The first value is the index of the variant and the second is a line from
-            the file, encoded as a numpy mixed array type
+            The first value is the index of the variant and the second is a row from
+            the :py:attr:`~.GenotypesPLINK.variants` array
         """
-        # split the region string so each portion is an element
-        if region is not None:
-            region = re.split(":|-", region)
-            if len(region) > 1:
-                region[1:] = [int(pos) for pos in region[1:] if pos]
-        with self.hook_compressed(self.fname.with_suffix(".pvar"), mode="r") as pvar:
-            pvariants = reader(pvar, delimiter="\t")
+        columns, indices = self._select_variants(region, variants)
+        # build the rows of the variants array a block at a time
+        for start in range(0, len(indices), _ITER_BLOCK):
+            block = indices[start : start + _ITER_BLOCK]
+            rows = self._build_pvar_variants(columns, block)
+            for row, idx in enumerate(block.tolist()):
+                # index with an Ellipsis to get a 0-d array instead of a np.void
+                yield idx, rows[row, ...]
+
+    def _pvar_path(self) -> Path:
+        """
+        Find the PVAR file that accompanies the PGEN file
+
+        PLINK2 also allows the PVAR file to be compressed, so we look for a ".zst"
+        or ".gz" file if there isn't a plain one
+
+        Returns
+        -------
+        Path
+            The path to the PVAR file
+        """
+        pvar = self.fname.with_suffix(".pvar")
+        for ext in (".zst", ".gz"):
+            if not pvar.exists() and Path(str(pvar) + ext).exists():
+                return Path(str(pvar) + ext)
+        return pvar
+
+    def _source_stamp(self) -> tuple:
+        """
+        See documentation for :py:meth:`~.Genotypes._source_stamp`
+
+        The variants are read from the PVAR file, so it is identified, too
+        """
+        return super()._source_stamp() + (self._file_stamp(self._pvar_path()),)
+
+    def _parse_pvar(self, pvar_fname: Path) -> tuple[list[str]]:
+        """
+        Parse the ID, CHROM, POS, REF, and ALT columns of a PVAR file
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._load_pvar`. Rather
+        than parsing one line at a time, it reads large blocks of lines and splits
+        each block into its fields all at once.
+
+        Parameters
+        ----------
+        pvar_fname : Path
+            The path to the PVAR file
+
+        Raises
+        ------
+        ValueError
+            If the PVAR file is missing a header or has lines with too few columns
+
+        Returns
+        -------
+        tuple[list[str]]
+            The values in each of the five columns, in order
+        """
+        with self.hook_compressed(pvar_fname, mode="r") as pvar:
             # find the line that declares the header
-            for header in pvariants:
-                if not header[0].startswith("##"):
+            header = ""
+            for header in pvar:
+                if not header.startswith("##"):
                     break
+            header = header.rstrip("\r\n").split("\t")
             # there should be at least five columns
             if len(header) < 5:
                 raise ValueError("Your PVAR file should have at least five columns.")
-            if header[0][0] == "#":
-                header[0] = header[0][1:]
-            else:
+            if header[0][0] != "#":
                 raise ValueError("Your PVAR file is missing a header!")
-                # TODO: add proper support for missing headers
-                # The PVAR spec says "If no header lines are present, the file is
-                # treated as if it had a '#CHROM ID CM POS ALT REF' header line if it
-                # has 6 or more columns, and '#CHROM ID POS ALT REF' if there are
-                # exactly five"
-                header = ["CHROM", "POS", "ID", "REF", "ALT"]
-                self.log.info(
-                    "Your PVAR file lacks a proper header! Assuming first five columns"
-                    " are [CHROM, POS, ID, REF, ALT] in that order..."
-                )
-                # TODO: add header back in to pvariants using itertools.chain?
-            # create a dictionary that translates between the variant dtypes and thee
-            # columns of the PVAR file
-            cid = {item: header.index(item.upper()) for item in ("chrom", "pos", "id")}
-            num_seen = 0
-            for ct, rec in enumerate(pvariants):
-                if region and not self._check_region(
-                    (rec[cid["chrom"]], int(rec[cid["pos"]])), *region
-                ):
-                    continue
-                if variants is not None:
-                    if rec[cid["id"]] not in variants:
-                        if num_seen >= len(variants):
-                            # exit early if we've already found all the variants
-                            break
-                        continue
-                yield ct, self._variant_arr(rec)
+            header[0] = header[0][1:]
+            num_cols = len(header)
+            cids = [header.index(col) for col in ("ID", "CHROM", "POS", "REF", "ALT")]
+            columns = tuple([] for _ in cids)
+            while True:
+                block = pvar.read(_PVAR_BLOCK)
+                if not block:
+                    break
+                # finish the last line in the block, if it's been cut off
+                if block[-1] != "\n":
+                    block += pvar.readline()
+                lines = block.splitlines()
+                fields = "\t".join(lines).split("\t")
+                if len(fields) != len(lines) * num_cols:
+                    raise ValueError(
+                        f"Every line in your PVAR file should have {num_cols} columns."
+                    )
+                # every num_cols-th field belongs to the same column
+                for col, cid in zip(columns, cids):
+                    col.extend(fields[cid::num_cols])
+        return columns
+
+    def _read_pvar_index(self, index_fname: Path, stamp: dict[str, int]) -> tuple:
+        """
+        Load the columns of a PVAR file from a sidecar created by
+        :py:meth:`~.GenotypesPLINK._write_pvar_index`
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._load_pvar`
+
+        Parameters
+        ----------
+        index_fname : Path
+            The path to the sidecar
+        stamp : dict[str, int]
+            The current :py:meth:`~.Genotypes._file_stamp` of the PVAR file
+
+        Returns
+        -------
+        tuple
+            The values in each of the five columns and the range of each contig, like
+            in :py:meth:`~.GenotypesPLINK._load_pvar`, or None if the sidecar doesn't
+            exist or is out of date
+
+            The REF and ALT columns are :py:class:`~._StringColumn` objects, so that
+            only the selected rows are decoded
+        """
+        if not index_fname.exists():
+            return None
+        with np.load(index_fname) as index:
+            if "id_offsets" not in index or index["stamp"].tolist() != [
+                stamp["size"],
+                stamp["mtime"],
+            ]:
+                self.log.info(f"Ignoring stale PVAR index {index_fname}")
+                return None
+            self.log.info(f"Loading variants from PVAR index {index_fname}")
+            strings = {
+                name: _StringColumn(index[name].tobytes(), index[f"{name}_offsets"])
+                for name in ("id", "chrom_names", "ref", "alt")
+            }
+            pos = index["pos"]
+            rows = np.arange(len(pos))
+            # the chroms refer to a few distinct names, so they can share them
+            chroms = strings["chrom_names"][np.arange(len(strings["chrom_names"]))]
+            # only the alleles of the variants that are selected are ever decoded
+            columns = (
+                strings["id"][rows],
+                chroms[index["chrom"]],
+                pos,
+                strings["ref"],
+                strings["alt"],
+            )
+            contigs = None
+            if "contigs" in index:
+                bounds = index["bounds"].tolist()
+                contigs = {
+                    contig: (bounds[idx], bounds[idx + 1])
+                    for idx, contig in enumerate(index["contigs"].astype(str).tolist())
+                }
+        return columns, contigs
+
+    def _write_pvar_index(
+        self,
+        index_fname: Path,
+        stamp: dict[str, int],
+        columns: tuple[npt.NDArray],
+        contigs: dict[str, tuple[int, int]] = None,
+    ):
+        """
+        Store the columns of a PVAR file in a binary sidecar so that they can be
+        loaded by :py:meth:`~.GenotypesPLINK._read_pvar_index` without any parsing
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._load_pvar`
+
+        Parameters
+        ----------
+        index_fname : Path
+            The path to the sidecar
+        stamp : dict[str, int]
+            The current :py:meth:`~.Genotypes._file_stamp` of the PVAR file
+        columns : tuple[npt.NDArray]
+            The values in each of the five columns of the PVAR file
+        contigs : dict[str, tuple[int, int]], optional
+            The range of each contig, as returned by
+            :py:meth:`~.GenotypesPLINK._contig_ranges`
+        """
+        self.log.info(f"Writing PVAR index {index_fname}")
+        ids, chroms, pos, refs, alts = columns
+        chrom_names, chrom_codes = np.unique(chroms, return_inverse=True)
+        arrays = {"pos": pos, "chrom": chrom_codes.astype(np.uint32)}
+        # pack the strings into buffers, since a fixed-width array of them would be
+        # sized to fit the longest one
+        strings = {"id": ids, "chrom_names": chrom_names, "ref": refs, "alt": alts}
+        for name, col in strings.items():
+            if not isinstance(col, _StringColumn):
+                col = _StringColumn.pack(col)
+            arrays[name] = np.frombuffer(col.buffer, dtype=np.uint8)
+            arrays[f"{name}_offsets"] = col.offsets
+        if contigs is not None:
+            arrays["contigs"] = np.array(list(contigs.keys()), dtype=str)
+            arrays["bounds"] = np.array(
+                [0] + [end for start, end in contigs.values()], dtype=np.int64
+            )
+        arrays["stamp"] = np.array([stamp["size"], stamp["mtime"]], dtype=np.int64)
+        # write to a temporary file first so that we never leave a partial sidecar
+        tmp_fname = index_fname.with_name(index_fname.name + ".tmp")
+        try:
+            with open(tmp_fname, "wb") as index:
+                np.savez(index, **arrays)
+            tmp_fname.replace(index_fname)
+        except OSError as e:
+            self.log.warning(f"Failed to write PVAR index {index_fname}: {e}")
+
+    @staticmethod
+    def _contig_ranges(
+        chroms: npt.NDArray, pos: npt.NDArray[np.uint32]
+    ) -> dict[str, tuple[int, int]] | None:
+        """
+        Find the range of variant indices spanned by each contig
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._load_pvar`
+
+        Parameters
+        ----------
+        chroms : npt.NDArray
+            The CHROM column of the PVAR file
+        pos : npt.NDArray[np.uint32]
+            The POS column of the PVAR file
+
+        Returns
+        -------
+        dict[str, tuple[int, int]] | None
+            The start (inclusive) and end (exclusive) index of each contig, in order
+
+            None if the variants in a contig are not contiguous or not sorted by
+            position, since they cannot be binary searched
+        """
+        if not len(chroms):
+            return {}
+        # find where each run of variants from the same contig begins
+        starts = np.flatnonzero(chroms[1:] != chroms[:-1]) + 1
+        # positions can only decrease at the start of a contig
+        decreasing = np.flatnonzero(np.diff(pos.astype(np.int64)) < 0) + 1
+        if not np.isin(decreasing, starts).all():
+            return None
+        starts = np.concatenate(([0], starts)).tolist()
+        ends = starts[1:] + [len(chroms)]
+        contigs = dict(zip(chroms[starts].tolist(), zip(starts, ends)))
+        if len(contigs) != len(starts):
+            return None
+        return contigs
+
+    def _load_pvar(
+        self, pvar_cache: bool = False
+    ) -> tuple[tuple[npt.NDArray], dict[str, tuple[int, int]]]:
+        """
+        Load the columns of the PVAR file
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.read_variants`
+
+        Parameters
+        ----------
+        pvar_cache : bool, optional
+            See documentation for :py:meth:`~.GenotypesPLINK.read`
+
+        Returns
+        -------
+        tuple[tuple[npt.NDArray], dict[str, tuple[int, int]]]
+            The values in the ID, CHROM, POS, REF, and ALT columns of the PVAR file and
+            the range of each contig, as returned by
+            :py:meth:`~.GenotypesPLINK._contig_ranges`
+
+            The string columns are arrays of type object (or a
+            :py:class:`~._StringColumn`), so they never take up more space than the
+            strings themselves
+        """
+        pvar_fname = self._pvar_path()
+        index_fname = self.fname.with_suffix(".pvar.hidx")
+        stamp = self._file_stamp(pvar_fname)
+        loaded = self._read_pvar_index(index_fname, stamp)
+        if loaded is not None:
+            return loaded
+        ids, chroms, pos, refs, alts = self._parse_pvar(pvar_fname)
+        # there are usually only a few distinct contigs, so the rows can share them
+        names = {}
+        chroms = [names.setdefault(chrom, chrom) for chrom in chroms]
+        # a fixed-width array of strings would be sized to fit the longest one, so
+        # we store them as objects, instead
+        columns = tuple(
+            np.array(pos, dtype=np.uint32) if idx == 2 else _object_array(col)
+            for idx, col in enumerate((ids, chroms, pos, refs, alts))
+        )
+        contigs = self._contig_ranges(columns[1], columns[2])
+        if pvar_cache:
+            self._write_pvar_index(index_fname, stamp, columns, contigs)
+        return columns, contigs
+
+    def _build_pvar_variants(
+        self, columns: tuple[npt.NDArray], indices: npt.NDArray[np.uint32]
+    ) -> npt.NDArray:
+        """
+        Create an array like :py:attr:`~.GenotypesPLINK.variants` from some of the
+        rows in the columns of a PVAR file
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.read_variants`
+
+        Parameters
+        ----------
+        columns : tuple[npt.NDArray]
+            The columns returned by :py:meth:`~.GenotypesPLINK._load_pvar`
+        indices : npt.NDArray[np.uint32]
+            The rows to include
+
+        Returns
+        -------
+        npt.NDArray
+            A row for each of the indices
+        """
+        ids, chroms, pos, refs, alts = (col[indices] for col in columns)
+        variants = np.empty(len(indices), dtype=self.variants.dtype)
+        variants["id"] = ids
+        variants["chrom"] = chroms
+        variants["pos"] = pos
+        refs, alts = refs.tolist(), alts.tolist()
+        # most variants are biallelic, so we can pair up their alleles all at once
+        alleles = list(zip(refs, alts))
+        for idx, alt in enumerate(alts):
+            if "," in alt:
+                alleles[idx] = (refs[idx], *alt.split(","))
+        variants["alleles"] = np.fromiter(alleles, dtype=object, count=len(alleles))
+        return variants
+
+    def _region_indices(
+        self,
+        region: str,
+        chroms: npt.NDArray,
+        pos: npt.NDArray[np.uint32],
+        contigs: dict[str, tuple[int, int]] = None,
+    ) -> npt.NDArray[np.uint32]:
+        """
+        Find the indices of the variants within a region
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.read_variants`
+
+        Parameters
+        ----------
+        region : str
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        chroms : npt.NDArray
+            The CHROM column of the PVAR file
+        pos : npt.NDArray[np.uint32]
+            The POS column of the PVAR file
+        contigs : dict[str, tuple[int, int]], optional
+            The range of each contig, as returned by
+            :py:meth:`~.GenotypesPLINK._contig_ranges`
+
+            If provided, the region is found via binary search. Otherwise, every
+            variant is checked.
+
+        Returns
+        -------
+        npt.NDArray[np.uint32]
+            The sorted indices of the variants within the region
+        """
+        match = _REGION_RE.match(region.replace(",", ""))
+        if match is None:
+            raise ValueError(f"Could not parse region '{region}'")
+        start = int(match["start"] or 0)
+        end = int(match["end"]) if match["end"] else None
+        if contigs is None:
+            keep = (chroms == match["chrom"]) & (pos >= start)
+            if end is not None:
+                keep &= pos <= end
+            return np.flatnonzero(keep).astype(np.uint32)
+        first, last = contigs.get(match["chrom"], (0, 0))
+        contig_pos = pos[first:last]
+        last = first + np.searchsorted(contig_pos, end, "right") if end else last
+        first += np.searchsorted(contig_pos, start, "left")
+        return np.arange(first, max(first, last), dtype=np.uint32)
+
+    def write_id_index(self):
+        """
+        Index the variants in the PVAR file
+
+        The parsed PVAR file is stored in a binary sidecar next to the PGEN file
+        (ending in ".pvar.hidx"), just like when ``pvar_cache=True`` is passed to
+        :py:meth:`~.GenotypesPLINK.read`. Afterward, variants requested by their IDs
+        are found without parsing the PVAR file again.
+        """
+        self._load_pvar(pvar_cache=True)
 
     def read_variants(
         self,
         region: str = None,
         variants: set[str] = None,
         max_variants: int = None,
+        pvar_cache: bool = False,
     ):
         """
         Read variants from a PVAR file into a numpy array stored in
         :py:attr:`~.GenotypesPLINK.variants`
 
-        One of either variants or max_variants MUST be specified!
-
         This method is called automatically by :py:meth:`~.GenotypesPLINK.read`
 
         Parameters
@@ -1231,6 +4467,8 @@ class GenotypesPLINK(GenotypesVCF):
             See documentation for :py:attr:`~.GenotypesVCF.read`
         max_variants : int, optional
             See documentation for :py:attr:`~.GenotypesVCF.read`
+        pvar_cache : bool, optional
+            See documentation for :py:meth:`~.GenotypesPLINK.read`
 
         Returns
         -------
@@ -1239,30 +4477,11 @@ class GenotypesPLINK(GenotypesVCF):
         """
         if len(self.variants) != 0:
             self.log.warning("Variant data has already been loaded. Overriding.")
+        columns, indices = self._select_variants(region, variants, pvar_cache)
         if variants is not None:
             max_variants = len(variants)
-        if max_variants is None:
-            p = pgenlib.PvarReader(bytes(str(self.fname.with_suffix(".pvar")), "utf8"))
-            max_variants = p.get_variant_ct()
-        # first, preallocate the array and the indices of each variant
-        self.variants = np.empty((max_variants,), dtype=self.variants.dtype)
-        indices = np.empty((max_variants,), dtype=np.uint32)
-        num_seen = 0
-        # iterate through each variant and save it
-        for ct, rec in self._iterate_variants(region, variants):
-            if num_seen >= max_variants:
-                break
-            indices[num_seen] = ct
-            self.variants[num_seen] = rec
-            num_seen += 1
-        # did we see more variants than was asked for?
-        if max_variants > num_seen:
-            self.log.info(
-                f"Removing {max_variants-num_seen} unneeded variant records that "
-                "were preallocated b/c max_variants was specified."
-            )
-            indices = indices[:num_seen]
-            self.variants = self.variants[:num_seen]
+        indices = indices[:max_variants]
+        self.variants = self._build_pvar_variants(columns, indices)
         if not len(indices):
             self.log.warning(
                 "Failed to load any variants. If you specified a region, check that "
@@ -1276,6 +4495,10 @@ class GenotypesPLINK(GenotypesVCF):
         samples: set[str] = None,
         variants: set[str] = None,
         max_variants: int = None,
+        variant_major: bool = False,
+        qc: dict[str, dict] = None,
+        pvar_cache: bool = False,
+        lazy: bool | int = False,
     ):
         """
         Read genotypes from a PGEN file into a numpy matrix stored in
@@ -1291,19 +4514,39 @@ class GenotypesPLINK(GenotypesVCF):
             See documentation for :py:attr:`~.GenotypesVCF.read`
         max_variants : int, optional
             See documentation for :py:attr:`~.GenotypesVCF.read`
+        variant_major : bool, optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        qc : dict[str, dict], optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        pvar_cache : bool, optional
+            Whether to store the parsed PVAR file in a binary sidecar next to the PGEN
+            file (ending in ".pvar.hidx")
+
+            Later reads will load the variants from the sidecar instead of parsing the
+            PVAR file again, as long as the PVAR file hasn't changed since.
+        lazy : bool | int, optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+
+            The PGEN file doesn't need to be indexed for this to work. This cannot be
+            combined with the variant_major or qc parameters.
         """
         super(Genotypes, self).read()
+        self._variant_major = variant_major
+        if lazy:
+            self._check_lazy(variant_major, qc)
+        qc_stats = self._qc_stats(qc)
 
         sample_idxs = self.read_samples(samples)
-        pvar_fname = bytes(str(self.fname.with_suffix(".pvar")), "utf8")
+        pvar_fname = bytes(str(self._pvar_path()), "utf8")
         try:
             pv = pgenlib.PvarReader(pvar_fname)
         except RuntimeError as e:
             if e.args[0].decode("utf8").startswith("No variants in"):
                 self.log.warning(f"No variants in {pvar_fname}.")
-                self.data = np.empty(
-                    (len(sample_idxs), 0, (2 + (not self._prephased))), dtype=np.uint8
-                )
+                mat_shape = (len(sample_idxs), 0, (2 + (not self._prephased)))
+                if self._variant_major:
+                    mat_shape = (0, len(sample_idxs), mat_shape[2])
+                self.data = np.empty(mat_shape, dtype=np.uint8)
                 return
             else:
                 raise e
@@ -1318,69 +4561,275 @@ class GenotypesPLINK(GenotypesVCF):
             if max_variants is None:
                 max_variants = pgen.get_variant_ct()
             else:
-                max_variants = min(max_variants, pgen.get_variant_ct())
-            indices = self.read_variants(region, variants, max_variants)
-            mat_shape = (len(sample_idxs), len(indices), (2 + (not self._prephased)))
-            self.log.debug(
-                f"Allocating memory for genotype matrix of shape {mat_shape} and "
-                "dtype np.uint8"
-            )
-            # initialize the data array
-            self.data = np.empty(mat_shape, dtype=np.uint8)
-            # how many variants should we load at once?
-            chunks = self.chunk_size
-            if chunks is None or chunks > len(indices):
-                chunks = len(indices)
-            self.log.info(
-                f"Reading genotypes from {len(self.samples)} samples and "
-                f"{len(indices)} variants in chunks of size {chunks} variants"
-            )
-            # iterate through chunks of variants
-            for start in range(0, len(indices), chunks):
-                end = start + chunks
-                if end > len(indices):
-                    end = len(indices)
-                size = end - start
-                self.log.debug(f"Loading from variant #{start} to variant #{end}")
-                # the genotypes start out as a simple 2D array with twice the number
-                # of samples
-                if not self._prephased:
-                    # ...each column is a different chromosomal strand
-                    try:
-                        data = np.empty((size, len(sample_idxs) * 2), dtype=np.int32)
-                        phasing = np.zeros((size, len(sample_idxs)), dtype=np.uint8)
-                    except np.core._exceptions._ArrayMemoryError as e:
-                        raise ValueError(
-                            "You don't have enough memory to load these genotypes! Try"
-                            " specifying a value to the chunk_size parameter, instead"
-                        ) from e
-                    # The haplotype-major mode of read_alleles_and_phasepresent_list
-                    # has not been implemented yet, so we need to read the genotypes
-                    # in sample-major mode and then transpose them
-                    pgen.read_alleles_and_phasepresent_list(
-                        indices[start:end], data, phasing
-                    )
-                    # missing alleles will have a value of -9
-                    # let's make them be -1 to be consistent with cyvcf2
-                    data[data == -9] = -1
-                    # add phase info, then transpose the GT matrix so that samples are
-                    # rows and variants are columns
-                    self.data[:, start:end, :2] = data.reshape(
-                        (size, mat_shape[0], 2)
-                    ).transpose((1, 0, 2))
-                    self.data[:, start:end, 2] = phasing.transpose()
-                else:
-                    # ...each row is a different chromosomal strand
-                    data = np.empty((size, len(sample_idxs) * 2), dtype=np.int32)
-                    pgen.read_alleles_list(indices[start:end], data)
-                    # missing alleles will have a value of -9
-                    # let's make them be -1 to be consistent with cyvcf2
-                    data[data == -9] = -1
-                    self.data[:, start:end] = data.reshape(
-                        (size, mat_shape[0], 2)
-                    ).transpose((1, 0, 2))
-                del data
-                gc.collect()
+                max_variants = min(max_variants, pgen.get_variant_ct())
+            indices = self.read_variants(region, variants, max_variants, pvar_cache)
+            mat_shape = (len(sample_idxs), len(indices), (2 + (not self._prephased)))
+            if lazy:
+                # keep a separate reader open for decoding the genotypes later
+                budget = _LAZY_BUDGET if lazy is True else lazy
+                pgen = pgenlib.PgenReader(
+                    bytes(str(self.fname), "utf8"), sample_subset=sample_idxs, pvar=pv
+                )
+                self.data = _LazyGenotypes(
+                    partial(self._decode_lazy, pgen, indices, len(sample_idxs)),
+                    mat_shape,
+                    budget,
+                )
+                return
+            if self._variant_major:
+                mat_shape = (len(indices), len(sample_idxs), mat_shape[2])
+            self.log.debug(
+                f"Allocating memory for genotype matrix of shape {mat_shape} and "
+                "dtype np.uint8"
+            )
+            # initialize the data array
+            self.data = np.empty(mat_shape, dtype=np.uint8)
+            # and a sample-major view of it for _pipeline_chunks() to fill
+            data = self._sample_major()
+            # how many variants should we load at once?
+            chunks = self.chunk_size
+            if chunks is None or chunks > len(indices):
+                # (but at least one, so that empty regions don't break range())
+                chunks = max(len(indices), 1)
+            self.log.info(
+                f"Reading genotypes from {len(self.samples)} samples and "
+                f"{len(indices)} variants in chunks of size {chunks} variants"
+            )
+            # iterate through chunks of variants
+            for start, end in self._pipeline_chunks(pgen, indices, chunks, data):
+                if qc_stats is not None:
+                    qc_stats.update(start, data[:, start:end].swapaxes(0, 1))
+        if qc is not None and 0 not in self.data.shape:
+            self._apply_qc(qc, qc_stats, inplace=True)
+
+    def _decode_lazy(
+        self,
+        pgen: pgenlib.PgenReader,
+        indices: npt.NDArray[np.uint32],
+        num_samples: int,
+        var_idx: npt.NDArray[np.intp],
+    ) -> npt.NDArray[np.uint8]:
+        """
+        Decode the genotypes of some of the variants in the file
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.read`
+
+        Parameters
+        ----------
+        pgen: pgenlib.PgenReader
+            The pgenlib.PgenReader object from which to fetch the genotypes
+        indices: npt.NDArray[np.uint32]
+            The indices of the loaded variants within the PGEN file
+        num_samples: int
+            The number of samples that the reader was opened with
+        var_idx : npt.NDArray[np.intp]
+            The sorted indices of the variants to decode, among the loaded variants
+
+        Returns
+        -------
+        npt.NDArray[np.uint8]
+            An n x len(var_idx) x 2 (or x 3) array of the genotypes
+        """
+        buffers = self._chunk_buffers(len(var_idx), num_samples)
+        decoded = self._decode_chunk(pgen, indices[var_idx], buffers)
+        out = np.empty(
+            (num_samples, len(var_idx), 2 + (not self._prephased)), dtype=np.uint8
+        )
+        self._store_chunk(decoded, out)
+        return out
+
+    def _pipeline_chunks(
+        self,
+        pgen: pgenlib.PgenReader,
+        indices: npt.NDArray[np.uint32],
+        chunks: int,
+        out: npt.NDArray[np.uint8],
+    ) -> Iterator[tuple[int, int]]:
+        """
+        Read the genotypes of each chunk of variants from a PGEN file into out
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.read`. pgenlib
+        releases the GIL while it decodes, so if there are multiple chunks and
+        multiple CPUs, a worker thread decodes the next chunk while the current chunk
+        is copied into out. The two chunks take turns using two sets of buffers, so
+        this doubles the memory needed for them. Otherwise, each chunk is decoded and
+        copied in turn, using a single set of buffers.
+
+        Parameters
+        ----------
+        pgen: pgenlib.PgenReader
+            The pgenlib.PgenReader object from which to fetch the genotypes
+        indices: npt.NDArray[np.uint32]
+            The indices of the variants within the PGEN file
+        chunks: int
+            The number of variants in each chunk
+        out: npt.NDArray[np.uint8]
+            The array in which to store the genotypes, with the same shape as
+            :py:attr:`~.GenotypesPLINK.data` in sample-major order
+
+        Yields
+        ------
+        Iterator[tuple[int, int]]
+            The start and end of each chunk, once it has been stored in out
+        """
+        starts = range(0, len(indices), chunks)
+        if not len(starts):
+            return
+        num_samples = out.shape[0]
+        buffers = [self._chunk_buffers(chunks, num_samples)]
+        if len(starts) == 1 or (os.cpu_count() or 1) < 2:
+            # decoding can't overlap with copying, so a second set of buffers won't
+            # help
+            for start in starts:
+                end = min(start + chunks, len(indices))
+                decoded = self._decode_chunk(pgen, indices[start:end], buffers[0])
+                self.log.debug(f"Loading from variant #{start} to variant #{end}")
+                self._store_chunk(decoded, out[:, start:end])
+                yield start, end
+            return
+        buffers.append(self._chunk_buffers(chunks, num_samples))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            decoding = pool.submit(
+                self._decode_chunk, pgen, indices[:chunks], buffers[0]
+            )
+            for ct, start in enumerate(starts):
+                end = min(start + chunks, len(indices))
+                decoded = decoding.result()
+                # start decoding the next chunk before we store this one
+                if end < len(indices):
+                    decoding = pool.submit(
+                        self._decode_chunk,
+                        pgen,
+                        indices[end : end + chunks],
+                        buffers[(ct + 1) % 2],
+                    )
+                self.log.debug(f"Loading from variant #{start} to variant #{end}")
+                self._store_chunk(decoded, out[:, start:end])
+                yield start, end
+
+    def _chunk_buffers(
+        self, size: int, num_samples: int
+    ) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]]:
+        """
+        Allocate the buffers that pgenlib will decode a chunk of variants into
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._pipeline_chunks`,
+        :py:meth:`~.GenotypesPLINK._iterate`, and
+        :py:meth:`~.GenotypesPLINK._iterate_chunks`
+
+        Parameters
+        ----------
+        size: int
+            The max number of variants in a chunk
+        num_samples: int
+            The number of samples
+
+        Raises
+        ------
+        ValueError
+            If there isn't enough memory for the buffers
+
+        Returns
+        -------
+        tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]]
+            A buffer for the alleles and a buffer for the phase of each genotype
+
+            The phase buffer will be None if the genotypes are assumed to be phased
+        """
+        # the genotypes start out as a simple 2D array with twice the number
+        # of samples: each column is a different chromosomal strand
+        try:
+            data = np.empty((size, num_samples * 2), dtype=np.int32)
+            phasing = None
+            if not self._prephased:
+                phasing = np.empty((size, num_samples), dtype=np.uint8)
+        except np.core._exceptions._ArrayMemoryError as e:
+            raise ValueError(
+                "You don't have enough memory to load these genotypes! Try"
+                " specifying a value to the chunk_size parameter, instead"
+            ) from e
+        return data, phasing
+
+    def _decode_chunk(
+        self,
+        pgen: pgenlib.PgenReader,
+        indices: npt.NDArray[np.uint32],
+        buffers: tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]],
+    ) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]]:
+        """
+        Decode the genotypes of a chunk of variants from a PGEN file all at once
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._pipeline_chunks`,
+        :py:meth:`~.GenotypesPLINK._iterate`, and
+        :py:meth:`~.GenotypesPLINK._iterate_chunks`
+
+        Parameters
+        ----------
+        pgen: pgenlib.PgenReader
+            The pgenlib.PgenReader object from which to fetch the genotypes
+        indices: npt.NDArray[np.uint32]
+            The indices of the variants within the PGEN file
+        buffers: tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]]
+            The buffers returned by :py:meth:`~.GenotypesPLINK._chunk_buffers`, with
+            room for at least len(indices) variants
+
+        Returns
+        -------
+        tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]]
+            Views of the first len(indices) rows of each buffer
+        """
+        size = len(indices)
+        data, phasing = (buf if buf is None else buf[:size] for buf in buffers)
+        # contiguous variants (like those in a region) can be read as a single range
+        span = None
+        if size and np.all(np.diff(indices) == 1):
+            span = (int(indices[0]), int(indices[-1]) + 1)
+        if phasing is not None:
+            phasing[:] = 0
+            # The haplotype-major mode of read_alleles_and_phasepresent_list
+            # has not been implemented yet, so we need to read the genotypes
+            # in sample-major mode and then transpose them
+            if span is None:
+                pgen.read_alleles_and_phasepresent_list(indices, data, phasing)
+            else:
+                pgen.read_alleles_and_phasepresent_range(*span, data, phasing)
+        elif span is None:
+            pgen.read_alleles_list(indices, data)
+        else:
+            pgen.read_alleles_range(*span, data)
+        # missing alleles will have a value of -9
+        # let's make them be -1 to be consistent with cyvcf2
+        data[data == -9] = -1
+        return data, phasing
+
+    def _store_chunk(
+        self,
+        decoded: tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]],
+        out: npt.NDArray[np.uint8],
+    ):
+        """
+        Store the genotypes of a chunk of variants decoded by
+        :py:meth:`~.GenotypesPLINK._decode_chunk`
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK._pipeline_chunks`,
+        :py:meth:`~.GenotypesPLINK._iterate`, and
+        :py:meth:`~.GenotypesPLINK._iterate_chunks`
+
+        Parameters
+        ----------
+        decoded: tuple[npt.NDArray[np.int32], npt.NDArray[np.uint8]]
+            The arrays returned by :py:meth:`~.GenotypesPLINK._decode_chunk`
+        out: npt.NDArray[np.uint8]
+            The array in which to store the genotypes, with the same shape as
+            :py:attr:`~.GenotypesPLINK.data` but only as many variants as the chunk
+        """
+        data, phasing = decoded
+        size, num_samples = data.shape[0], out.shape[0]
+        # transpose the GT matrix so that samples are rows and variants are columns
+        out[:, :, :2] = data.reshape((size, num_samples, 2)).transpose((1, 0, 2))
+        if phasing is not None:
+            # and then add the phase info
+            out[:, :, 2] = phasing.transpose()
 
     def _iterate(
         self,
@@ -1391,7 +4840,10 @@ class GenotypesPLINK(GenotypesVCF):
         """
         A generator over the lines of a PGEN-PVAR file pair
 
-        This is a helper function for :py:meth:`~.GenotypesPLINK.__iter__`
+        This is a helper function for :py:meth:`~.GenotypesPLINK.__iter__`. It decodes
+        the genotypes of blocks of variants at once and then yields a view of each
+        variant. Use :py:meth:`~.GenotypesPLINK.iter_chunks` to get the blocks
+        directly, instead.
 
         Parameters
         ----------
@@ -1410,33 +4862,29 @@ class GenotypesPLINK(GenotypesVCF):
         """
         self.log.info(f"Loading genotypes from {len(self.samples)} samples")
         Record = namedtuple("Record", "data variants")
-
-        # iterate over each line in the PVAR file
-        for idx, variant_arr in self._iterate_variants(region, variants):
-            # the genotypes start out as a simple 2D array with twice the number of samples
-            data = np.empty(len(self.samples) * 2, dtype=np.int32)
-            if not self._prephased:
-                phasing = np.empty(len(self.samples), dtype=np.uint8)
-                # The haplotype-major mode of read_alleles_and_phasepresent_list has
-                # not been implemented yet, so we need to read the genotypes in sample-
-                # major mode and then transpose them
-                pgen.read_alleles_and_phasepresent(idx, data, phasing)
-            else:
-                pgen.read_alleles(idx, data)
-            # missing alleles will have a value of -9
-            # let's make them be -1 to be consistent with cyvcf2
-            data[data == -9] = -1
-            # strand 1 is at even indices and strand 2 is at odd indices
-            data = np.dstack((data[::2], data[1::2]))[0].astype(np.uint8)
-            # concatenate phasing info into the data
-            if not self._prephased:
-                data = np.concatenate((data, phasing[:, np.newaxis]), axis=1)
+        num_samples, num_strands = len(self.samples), 2 + (not self._prephased)
+        # decode blocks of variants at once into the same buffers
+        # (each strand of each sample takes four bytes in the buffers)
+        block_size = min(_ITER_BLOCK, max(1, _ITER_BUFFER // (8 * max(num_samples, 1))))
+        buffers = self._chunk_buffers(block_size, num_samples)
+        records = self._iterate_variants(region, variants)
+        while True:
+            block = list(islice(records, block_size))
+            if not block:
+                break
+            indices = np.fromiter((idx for idx, _ in block), np.uint32, len(block))
+            # allocate a new array for each block, so that the views we yield from it
+            # stay valid after we move on to the next block
+            data = np.empty((len(block), num_samples, num_strands), dtype=np.uint8)
+            decoded = self._decode_chunk(pgen, indices, buffers)
+            self._store_chunk(decoded, data.swapaxes(0, 1))
             # we extracted the genotypes to a matrix of size p x 3
             # the last dimension has three items:
             # 1) presence of REF in strand one
             # 2) presence of REF in strand two
             # 3) whether the genotype is phased (if self._prephased is False)
-            yield Record(data, variant_arr)
+            for variant_data, (idx, variant_arr) in zip(data, block):
+                yield Record(variant_data, variant_arr)
         pgen.close()
 
     def __iter__(
@@ -1461,7 +4909,7 @@ class GenotypesPLINK(GenotypesVCF):
         """
         super(Genotypes, self).read()
 
-        pv = pgenlib.PvarReader(bytes(str(self.fname.with_suffix(".pvar")), "utf8"))
+        pv = pgenlib.PvarReader(bytes(str(self._pvar_path()), "utf8"))
 
         sample_idxs = self.read_samples(samples)
         pgen = pgenlib.PgenReader(
@@ -1471,6 +4919,102 @@ class GenotypesPLINK(GenotypesVCF):
         # see https://stackoverflow.com/a/36726497
         return self._iterate(pgen, region, variants)
 
+    def _iterate_chunks(
+        self,
+        pgen: pgenlib.PgenReader,
+        chunk_size: int,
+        region: str = None,
+        variants: set[str] = None,
+    ):
+        """
+        A generator over chunks of variants in a PGEN-PVAR file pair
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.iter_chunks`. Unlike
+        :py:meth:`~.GenotypesPLINK._iterate`, it reads the genotypes of each chunk
+        from the PGEN file all at once.
+
+        Parameters
+        ----------
+        pgen: pgenlib.PgenReader
+            The pgenlib.PgenReader object from which to fetch variant records
+        chunk_size : int
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Yields
+        ------
+        Iterator[namedtuple]
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        """
+        self.log.info(
+            f"Loading genotypes from {len(self.samples)} samples in chunks of size "
+            f"{chunk_size} variants"
+        )
+        Record = namedtuple("Record", "data variants")
+        records = self._iterate_variants(region, variants)
+        num_strands = 2 + (not self._prephased)
+        # the decode buffers can be reused across chunks
+        buffers = self._chunk_buffers(chunk_size, len(self.samples))
+        while True:
+            indices = np.empty((chunk_size,), dtype=np.uint32)
+            variants_arr = np.empty((chunk_size,), dtype=self.variants.dtype)
+            num_seen = 0
+            for idx, variant_arr in islice(records, chunk_size):
+                indices[num_seen] = idx
+                variants_arr[num_seen] = variant_arr
+                num_seen += 1
+            if not num_seen:
+                break
+            data = np.empty((len(self.samples), num_seen, num_strands), dtype=np.uint8)
+            self._store_chunk(
+                self._decode_chunk(pgen, indices[:num_seen], buffers), data
+            )
+            yield Record(data, variants_arr[:num_seen])
+        pgen.close()
+
+    def iter_chunks(
+        self,
+        chunk_size: int,
+        region: str = None,
+        samples: set[str] = None,
+        variants: set[str] = None,
+    ) -> Iterator[namedtuple]:
+        """
+        Read genotypes from a PGEN file in chunks of variants without storing anything
+
+        Parameters
+        ----------
+        chunk_size : int
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        samples : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Returns
+        -------
+        Iterator[namedtuple]
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk_size must be a positive integer")
+        super(Genotypes, self).read()
+
+        pv = pgenlib.PvarReader(bytes(str(self._pvar_path()), "utf8"))
+
+        sample_idxs = self.read_samples(samples)
+        pgen = pgenlib.PgenReader(
+            bytes(str(self.fname), "utf8"), sample_subset=sample_idxs, pvar=pv
+        )
+        # call another function to force the lines above to be run immediately
+        # see https://stackoverflow.com/a/36726497
+        return self._iterate_chunks(pgen, chunk_size, region, variants)
+
     def write_samples(self):
         """
         Write sample IDs to a PSAM file from a list stored in
@@ -1483,34 +5027,96 @@ class GenotypesPLINK(GenotypesVCF):
             psam.write("\n".join(self.samples))
             psam.write("\n")
 
-    def write_variants(self):
+    def write_variants(self, compress: str = None):
         """
         Write variant IDs to a PVAR file from the numpy array stored in
         :py:attr:`~.GenotypesPLINK.variants`
 
         This method is called automatically by :py:meth:`~.GenotypesPLINK.write`
+
+        Parameters
+        ----------
+        compress : str, optional
+            Compress the PVAR file with either "gz" or "zst"
+
+            Using "zst" requires the zstandard package
         """
-        with VariantFile(str(self.fname.with_suffix(".pvar")), mode="w") as vcf:
-            # make sure the header is properly structured
-            for contig in set(self.variants["chrom"]):
-                vcf.header.contigs.add(contig)
+        chroms = self.variants["chrom"]
+        # declare each contig in the order in which it first appears
+        contigs = chroms[np.sort(np.unique(chroms, return_index=True)[1])].tolist()
+        with self.hook_compressed(self._pvar_out(compress), mode="w") as pvar:
+            pvar.write(self._pvar_header(contigs))
             self.log.info("Writing PVAR records")
-            for var in self.variants:
-                rec = {
-                    "contig": var["chrom"],
-                    "start": var["pos"],
-                    "stop": var["pos"] + len(var["alleles"][0]) - 1,
-                    "qual": None,
-                    "alleles": var["alleles"],
-                    "id": var["id"],
-                    "filter": None,
-                }
-                # handle pysam increasing the start site by 1
-                rec["start"] -= 1
-                # parse the record into a pysam.VariantRecord
-                record = vcf.new_record(**rec)
-                # write the record to a file
-                vcf.write(record)
+            for start in range(0, len(self.variants), _PVAR_WRITE_BLOCK):
+                end = start + _PVAR_WRITE_BLOCK
+                pvar.write(self._format_variants(self.variants[start:end]))
+
+    def _pvar_out(self, compress: str = None) -> Path:
+        """
+        Get the path to which the PVAR file should be written
+
+        Parameters
+        ----------
+        compress : str, optional
+            See documentation for :py:meth:`~.GenotypesPLINK.write_variants`
+
+        Returns
+        -------
+        Path
+            The path to the PVAR file, with an extra extension if it's compressed
+        """
+        pvar = self.fname.with_suffix(".pvar")
+        if compress is None:
+            return pvar
+        if compress not in ("gz", "zst"):
+            raise ValueError(f"Unsupported PVAR compression '{compress}'")
+        return Path(f"{pvar}.{compress}")
+
+    @staticmethod
+    def _pvar_header(contigs: list[str] = ()) -> str:
+        """
+        Create the header of a PVAR file
+
+        Parameters
+        ----------
+        contigs : list[str], optional
+            The contigs to declare in the header
+
+        Returns
+        -------
+        str
+            The header lines, including the final newline
+        """
+        return "".join(
+            ["##fileformat=VCFv4.2\n"]
+            + [f"##contig=<ID={contig}>\n" for contig in contigs]
+            + ["#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"]
+        )
+
+    @staticmethod
+    def _format_variants(variants: npt.NDArray) -> str:
+        """
+        Format variants as lines of a PVAR file
+
+        The first five columns are the same as in a VCF, so they come from
+        :py:meth:`~.GenotypesVCF._variant_lines`
+
+        Parameters
+        ----------
+        variants : npt.NDArray
+            The variants, with the same fields as :py:attr:`~.GenotypesPLINK.variants`
+
+        Returns
+        -------
+        str
+            A line for each variant, including the final newline
+        """
+        if not len(variants):
+            return ""
+        lines = GenotypesVCF._variant_lines(variants)
+        # QUAL, FILTER, and INFO are always empty
+        end = "\t.\t.\t.\n"
+        return end.join(lines) + end
 
     def _num_unique_alleles(self, arr: npt.NDArray):
         """
@@ -1543,36 +5149,32 @@ class GenotypesPLINK(GenotypesVCF):
         allele_cts[allele_cts < 2] = 2
         return allele_cts
 
-    def write(self):
+    def write(self, compress: str = None):
         """
         Write the variants in this class to PLINK2 files at
         :py:attr:`~.GenotypesPLINK.fname`
+
+        Parameters
+        ----------
+        compress : str, optional
+            See documentation for :py:meth:`~.GenotypesPLINK.write_variants`
         """
         # write the psam and pvar files
         self.write_samples()
-        self.write_variants()
-        self.log.debug(f"Transposing genotype matrix of size {self.data.shape}")
-        # transpose the data b/c pgenwriter expects things in "variant-major" order
-        # (ie where variants are rows instead of samples)
-        data = self.data.transpose((1, 0, 2))[:, :, :2]
+        self.write_variants(compress)
         # how many variants should we write at once?
         chunks = self.chunk_size
         if chunks is None or chunks > len(self.variants):
             chunks = len(self.variants)
 
         # write the pgen file
-        try:
-            max_allele_ct = pgenlib.PvarReader(
-                bytes(str(self.fname.with_suffix(".pvar")), "utf8")
-            ).get_max_allele_ct()
-        except RuntimeError as e:
-            if len(self.variants) == 0:
-                # write an empty pgen file
-                with open(self.fname, "wb"):
-                    pass
-                return
-            else:
-                raise e
+        if len(self.variants) == 0:
+            # write an empty pgen file
+            with open(self.fname, "wb"):
+                pass
+            return
+        # there are always at least two alleles
+        max_allele_ct = max(2, max(map(len, self.variants["alleles"])))
         with pgenlib.PgenWriter(
             filename=bytes(str(self.fname), "utf8"),
             sample_ct=len(self.samples),
@@ -1591,50 +5193,268 @@ class GenotypesPLINK(GenotypesVCF):
                 if end > len(self.variants):
                     end = len(self.variants)
                 self.log.debug(f"Writing variant #{start} through variant #{end}")
-                size = end - start
-                try:
-                    missing = np.ascontiguousarray(
-                        data[start:end] == np.iinfo(np.uint8).max
-                    )
-                    # obtain the number of unique alleles for each variant
-                    # https://stackoverflow.com/a/46575580
-                    allele_cts = self._num_unique_alleles(data[start:end])
-                    subset_data = np.ascontiguousarray(data[start:end], dtype=np.int32)
-                    subset_data.resize((size, len(self.samples) * 2))
-                    missing.resize((size, len(self.samples) * 2))
-                except (np.core._exceptions._ArrayMemoryError, MemoryError) as e:
-                    raise ValueError(
-                        "You don't have enough memory to write these genotypes! Try"
-                        " specifying a value to the chunk_size parameter, instead"
-                    ) from e
-                # convert any missing genotypes to -9
-                subset_data[missing] = -9
-                try:
-                    # finally, append the genotypes to the PGEN file
-                    if self._prephased or self.data.shape[2] < 3:
-                        pgen.append_alleles_batch(
-                            subset_data,
-                            all_phased=True,
-                            allele_cts=allele_cts,
-                        )
-                    else:
-                        # TODO: why does this sometimes leads to a corrupted file?
-                        subset_phase = self.data[:, start:end, 2].T.copy(order="C")
-                        pgen.append_partially_phased_batch(
-                            subset_data,
-                            subset_phase,
-                            allele_cts=allele_cts,
-                        )
-                        del subset_phase
-                except RuntimeError as e:
-                    if not np.all(allele_cts <= max_allele_ct):
-                        raise ValueError("Variant(s) have more alleles than expected")
-                    else:
-                        raise e
-            del subset_data
-            del missing
+                if self._variant_major:
+                    chunk = self.data[start:end]
+                else:
+                    chunk = self.data[:, start:end]
+                self._write_chunk(pgen, chunk, max_allele_ct)
             gc.collect()
 
+    def _write_chunk(
+        self,
+        pgen: pgenlib.PgenWriter,
+        chunk: npt.NDArray,
+        max_allele_ct: int,
+    ):
+        """
+        Append the genotypes of a chunk of variants to a PGEN file
+
+        This is a helper function for :py:meth:`~.GenotypesPLINK.write` and
+        :py:meth:`~.GenotypesPLINKWriter.append`
+
+        Parameters
+        ----------
+        pgen: pgenlib.PgenWriter
+            The pgenlib.PgenWriter object to which the genotypes should be appended
+        chunk: npt.NDArray
+            The genotypes of the variants, in the same layout as
+            :py:attr:`~.GenotypesPLINK.data`
+        max_allele_ct: int
+            The max number of alleles that pgen was declared with
+        """
+        num_samples = len(self.samples)
+        try:
+            if self._packed:
+                # unpack the genotypes, then transpose them b/c pgenwriter expects
+                # things in "variant-major" order
+                gts = np.unpackbits(chunk, axis=0, count=num_samples)
+                gts = gts.transpose((1, 0, 2))
+            elif self._variant_major:
+                # the genotypes are already in the order that pgenwriter expects
+                gts = chunk[:, :, :2]
+            else:
+                # transpose the data b/c pgenwriter expects things in "variant-major"
+                # order (ie where variants are rows instead of samples)
+                gts = chunk.transpose((1, 0, 2))[:, :, :2]
+            size = gts.shape[0]
+            missing = np.ascontiguousarray(gts == np.iinfo(np.uint8).max)
+            # obtain the number of unique alleles for each variant
+            # https://stackoverflow.com/a/46575580
+            allele_cts = self._num_unique_alleles(gts)
+            subset_data = np.ascontiguousarray(gts, dtype=np.int32)
+            subset_data.resize((size, num_samples * 2))
+            missing.resize((size, num_samples * 2))
+        except (np.core._exceptions._ArrayMemoryError, MemoryError) as e:
+            raise ValueError(
+                "You don't have enough memory to write these genotypes! Try"
+                " specifying a value to the chunk_size parameter, instead"
+            ) from e
+        # convert any missing genotypes to -9
+        subset_data[missing] = -9
+        try:
+            # finally, append the genotypes to the PGEN file
+            if self._prephased or chunk.shape[2] < 3:
+                pgen.append_alleles_batch(
+                    subset_data,
+                    all_phased=True,
+                    allele_cts=allele_cts,
+                )
+            else:
+                # TODO: why does this sometimes leads to a corrupted file?
+                subset_phase = chunk[:, :, 2]
+                if not self._variant_major:
+                    subset_phase = subset_phase.T
+                pgen.append_partially_phased_batch(
+                    subset_data,
+                    subset_phase.copy(order="C"),
+                    allele_cts=allele_cts,
+                )
+        except RuntimeError as e:
+            if not np.all(allele_cts <= max_allele_ct):
+                raise ValueError("Variant(s) have more alleles than expected")
+            else:
+                raise e
+
+    def write_chunks(
+        self,
+        num_variants: int,
+        max_allele_ct: int = None,
+        compress: str = None,
+        contigs: list[str] = None,
+    ) -> GenotypesPLINKWriter:
+        """
+        Write genotypes to PLINK2 files at :py:attr:`~.GenotypesPLINK.fname` one
+        chunk of variants at a time, without storing them all in memory
+
+        The samples are taken from :py:attr:`~.GenotypesPLINK.samples`, and the PSAM
+        file is written right away. Each chunk must be in the same layout as
+        :py:attr:`~.GenotypesPLINK.data` would be.
+
+        .. code-block:: python
+
+            with genotypes.write_chunks(num_variants) as writer:
+                for chunk in other_genotypes.iter_chunks(chunk_size=1000):
+                    writer.append(chunk.data, chunk.variants)
+
+        Parameters
+        ----------
+        num_variants : int
+            The total number of variants that will be appended
+
+            PGEN files declare their number of variants up front, so it must be known
+            in advance
+        max_allele_ct : int, optional
+            The max number of alleles among the variants, if it is known in advance
+
+            Defaults to the max supported by PLINK2 (255)
+        compress : str, optional
+            See documentation for :py:meth:`~.GenotypesPLINK.write_variants`
+        contigs : list[str], optional
+            The contigs to declare in the header of the PVAR file, since they must be
+            known in advance
+
+        Returns
+        -------
+        GenotypesPLINKWriter
+            A context manager whose ``append()`` method writes each chunk
+
+            If an error is raised inside of it, or if fewer variants than were declared
+            are appended, the partially written files are removed.
+        """
+        return GenotypesPLINKWriter(
+            self, num_variants, max_allele_ct, compress, contigs
+        )
+
+
+class GenotypesPLINKWriter:
+    """
+    A context manager for writing genotypes to PLINK2 files one chunk at a time
+
+    Create one with :py:meth:`~.GenotypesPLINK.write_chunks`
+
+    Attributes
+    ----------
+    genotypes : GenotypesPLINK
+        The object whose fname, samples, and settings determine what is written
+    num_variants : int
+        The total number of variants that will be appended
+    max_allele_ct : int
+        The max number of alleles among the variants
+    num_written : int
+        The number of variants that have been appended so far
+    compress : str
+        How to compress the PVAR file, if at all. See
+        :py:meth:`~.GenotypesPLINK.write_variants`
+    contigs : list[str]
+        See documentation for :py:meth:`~.GenotypesPLINK.write_chunks`
+    """
+
+    def __init__(
+        self,
+        genotypes: GenotypesPLINK,
+        num_variants: int,
+        max_allele_ct: int = None,
+        compress: str = None,
+        contigs: list[str] = None,
+    ):
+        self.genotypes = genotypes
+        self.compress = compress
+        self.contigs = contigs
+        self.num_variants = num_variants
+        if max_allele_ct is None:
+            max_allele_ct = np.iinfo(np.uint8).max
+        self.max_allele_ct = max_allele_ct
+        self.num_written = 0
+        self._pvar_fname = None
+        self._pvar = None
+        self._pgen = None
+
+    def __enter__(self) -> GenotypesPLINKWriter:
+        gts = self.genotypes
+        self._pvar_fname = gts._pvar_out(self.compress)
+        gts.write_samples()
+        try:
+            self._pvar = gts.hook_compressed(self._pvar_fname, mode="w")
+            self._pvar.write(gts._pvar_header(self.contigs or ()))
+            if self.num_variants:
+                self._pgen = pgenlib.PgenWriter(
+                    filename=bytes(str(gts.fname), "utf8"),
+                    sample_ct=len(gts.samples),
+                    variant_ct=self.num_variants,
+                    allele_ct_limit=self.max_allele_ct,
+                    nonref_flags=False,
+                    hardcall_phase_present=True,
+                )
+            else:
+                # write an empty pgen file
+                with open(gts.fname, "wb"):
+                    pass
+        except BaseException:
+            self.__exit__(*sys.exc_info())
+            raise
+        gts.log.info(
+            f"Writing genotypes from {len(gts.samples)} samples and "
+            f"{self.num_variants} variants in chunks"
+        )
+        return self
+
+    def append(self, data: npt.NDArray, variants: npt.NDArray):
+        """
+        Append a chunk of variants to the PGEN and PVAR files
+
+        Parameters
+        ----------
+        data : npt.NDArray
+            The genotypes of the variants, in the same layout as
+            :py:attr:`~.GenotypesPLINK.data`
+        variants : npt.NDArray
+            The variants, with the same fields as :py:attr:`~.GenotypesPLINK.variants`
+
+        Raises
+        ------
+        ValueError
+            If more variants are appended than were declared
+        """
+        if not len(variants):
+            return
+        if self.num_written + len(variants) > self.num_variants:
+            raise ValueError(
+                f"Cannot append {len(variants)} more variants after "
+                f"{self.num_written} of the {self.num_variants} declared variants"
+            )
+        self.genotypes.log.debug(
+            f"Writing variant #{self.num_written} through variant "
+            f"#{self.num_written + len(variants)}"
+        )
+        self._pvar.write(self.genotypes._format_variants(variants))
+        self.genotypes._write_chunk(self._pgen, data, self.max_allele_ct)
+        self.num_written += len(variants)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._pvar is not None:
+            self._pvar.close()
+        pgen, self._pgen = self._pgen, None
+        complete = self.num_written == self.num_variants
+        if exc_type is None and complete:
+            if pgen is not None:
+                pgen.close()
+            return
+        # a PgenWriter refuses to close until all of the declared variants have been
+        # appended, so we abandon it, instead, and remove everything written so far
+        del pgen
+        fname = self.genotypes.fname
+        tmp = Path(f"{fname}.tmp")
+        for path in (fname, tmp, fname.with_suffix(".psam"), self._pvar_fname):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        if exc_type is None:
+            raise ValueError(
+                f"Only {self.num_written} of the {self.num_variants} declared variants "
+                "were appended"
+            )
+
 
 class GenotypesPLINKTR(GenotypesPLINK):
     """
@@ -1740,6 +5560,9 @@ class GenotypesPLINKTR(GenotypesPLINK):
         samples: set[str] = None,
         variants: set[str] = None,
         max_variants: int = None,
+        variant_major: bool = False,
+        qc: dict[str, dict] = None,
+        pvar_cache: bool = False,
     ):
         """
         Read genotypes from a PGEN file into a numpy matrix stored in
@@ -1755,8 +5578,16 @@ class GenotypesPLINKTR(GenotypesPLINK):
             See documentation for :py:attr:`~.GenotypesVCF.read`
         max_variants : int, optional
             See documentation for :py:attr:`~.GenotypesVCF.read`
+        variant_major : bool, optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        qc : dict[str, dict], optional
+            See documentation for :py:attr:`~.GenotypesVCF.read`
+        pvar_cache : bool, optional
+            See documentation for :py:attr:`~.GenotypesPLINK.read`
         """
-        super().read(region, samples, variants, max_variants)
+        super().read(
+            region, samples, variants, max_variants, variant_major, qc, pvar_cache
+        )
 
         num_variants = len(self.variants)
         # initialize a jagged array of allele lengths
@@ -1774,13 +5605,14 @@ class GenotypesPLINKTR(GenotypesPLINK):
             num_alleles = len(record.alt_allele_lengths) + 1
             allele_lens[idx, 1:num_alleles] = record.alt_allele_lengths
         # record missing entries and then set them all to REF
-        missing = self.data[:, :, :2] == np.iinfo(np.uint8).max
-        self.data[:, :, :2][missing] = 0
+        data = self._sample_major()
+        missing = data[:, :, :2] == np.iinfo(np.uint8).max
+        data[:, :, :2][missing] = 0
         # convert from genotype indices to allele lengths
         variant_coords = np.arange(num_variants)[:, np.newaxis]
-        self.data[:, :, :2] = allele_lens[variant_coords, self.data[:, :, :2]]
+        data[:, :, :2] = allele_lens[variant_coords, data[:, :, :2]]
         # restore missing entries
-        self.data[:, :, :2][missing] = np.iinfo(np.uint8).max
+        data[:, :, :2][missing] = np.iinfo(np.uint8).max
         # clean up memory
         del missing
         del allele_lens
@@ -1829,6 +5661,58 @@ class GenotypesPLINKTR(GenotypesPLINK):
             variant.data[:, :2][missing] = np.iinfo(np.uint8).max
             yield variant
 
+    def _iterate_chunks(
+        self,
+        pgen: pgenlib.PgenReader,
+        chunk_size: int,
+        region: str = None,
+        variants: set[str] = None,
+    ):
+        """
+        A generator over chunks of variants in a PGEN-PVAR file pair
+
+        This is a helper function for :py:meth:`~.GenotypesPLINKTR.iter_chunks`
+
+        Parameters
+        ----------
+        pgen: pgenlib.PgenReader
+            The pgenlib.PgenReader object from which to fetch variant records
+        chunk_size : int
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        region : str, optional
+            See documentation for :py:meth:`~.Genotypes.read`
+        variants : set[str], optional
+            See documentation for :py:meth:`~.Genotypes.read`
+
+        Yields
+        ------
+        Iterator[namedtuple]
+            See documentation for :py:meth:`~.Genotypes.iter_chunks`
+        """
+        tr_records = self._iter_TRRecords(region, variants)
+        chunks = super()._iterate_chunks(pgen, chunk_size, region, variants)
+        for chunk in chunks:
+            records = list(islice(tr_records, len(chunk.variants)))
+            # initialize a jagged array of allele lengths
+            max_num_alleles = max(len(rec.alt_allele_lengths) + 1 for rec in records)
+            allele_lens = np.zeros(
+                (len(records), max_num_alleles), dtype=chunk.data.dtype
+            )
+            # extract the REF and ALT allele lengths of each TR
+            for idx, record in enumerate(records):
+                allele_lens[idx, 0] = record.ref_allele_length
+                num_alleles = len(record.alt_allele_lengths) + 1
+                allele_lens[idx, 1:num_alleles] = record.alt_allele_lengths
+            # record missing entries and then set them all to REF
+            missing = chunk.data[:, :, :2] == np.iinfo(np.uint8).max
+            chunk.data[:, :, :2][missing] = 0
+            # convert from genotype indices to allele lengths
+            variant_coords = np.arange(len(records))[:, np.newaxis]
+            chunk.data[:, :, :2] = allele_lens[variant_coords, chunk.data[:, :, :2]]
+            # restore missing entries
+            chunk.data[:, :, :2][missing] = np.iinfo(np.uint8).max
+            yield chunk
+
     def write(self):
         raise NotImplementedError
 
@@ -1,5 +1,8 @@
 from __future__ import annotations
+import os
+import hashlib
 from pathlib import Path
+from itertools import chain
 from functools import total_ordering
 from logging import getLogger, Logger
 from dataclasses import dataclass, field, fields
@@ -15,6 +18,15 @@ from .genotypes import GenotypesVCF
 
 # the current version of the hap format spec
 HAP_VERSION = "0.2.0"
+# the max number of bytes of genotypes to compare at once when building bitsets in
+# Haplotypes.transform()
+_BITSET_BLOCK = 1 << 24
+# the max number of bytes of partial haplotype bitsets to keep in each level of the
+# trie in Haplotypes.transform()
+_TRIE_BLOCK = 1 << 26
+# the default max number of bytes of haplotype genotypes to keep in the cache directory
+# of Haplotypes.transform()
+_TRANSFORM_CACHE_SIZE = 1 << 30
 
 
 @dataclass
@@ -485,6 +497,9 @@ class Haplotype:
         var_IDs = self.varIDs
         # ensure the variants in the Genotypes object are ordered according to var_IDs
         gts = genotypes.subset(variants=var_IDs)
+        if gts._packed:
+            # this is cheap since there are only a few variants in the haplotype
+            gts.unpack()
         # check: were any of the variants absent from the genotypes?
         if len(gts.variants) < len(var_IDs):
             missing_IDs = set(var_IDs) - set(gts.variants["id"])
@@ -509,7 +524,7 @@ class Haplotype:
             raise ValueError("Some alleles were not present in the genotypes")
         # look for the presence of each allele in each chromosomal strand
         # and then just AND them together
-        return np.all(allele_arr == gts.data[:, :, :2], axis=1)
+        return np.all(allele_arr == gts._sample_major()[:, :, :2], axis=1)
 
     def __lt__(self, other: Haplotype):
         """
@@ -1341,6 +1356,8 @@ class Haplotypes(Data):
         self,
         gts: GenotypesVCF,
         hap_gts: GenotypesVCF = None,
+        cache_dir: Path = None,
+        cache_size: int = _TRANSFORM_CACHE_SIZE,
     ) -> GenotypesVCF:
         """
         Transform a genotypes matrix via the current haplotype
@@ -1355,12 +1372,28 @@ class Haplotypes(Data):
         hap_gts: GenotypesVCF
             An empty GenotypesVCF object into which the haplotype genotypes should
             be stored
+        cache_dir: Path, optional
+            A directory in which to cache the genotypes of each haplotype, so that
+            later calls only need to compute those of new or changed haplotypes
+
+            Each haplotype is identified by its alleles, the file from which gts were
+            read, and the samples. So gts should not have been modified after they
+            were read.
+        cache_size: int, optional
+            The max number of bytes to keep in cache_dir
+
+            The least recently used files are deleted first
 
         Returns
         -------
         GenotypesVCF
             A Genotypes object composed of haplotypes instead of regular variants.
+
+            If the genotypes in gts were bit-packed, the haplotype genotypes will be
+            bit-packed, too
         """
+        if cache_dir is not None:
+            return self._transform_cached(gts, hap_gts, Path(cache_dir), cache_size)
         self.index()
         haps = [self.data[hap] for hap in self.type_ids["H"]]
         # Initialize GenotypesVCF return value
@@ -1389,7 +1422,6 @@ class Haplotypes(Data):
         gts = gts.subset(variants=tuple(k[0] for k in alleles))
         self.log.debug(f"Creating array denoting alt allele status")
         # initialize a np array denoting the allele integer in each haplotype
-        # with shape (1, gts.data.shape[1], 1) for broadcasting later
         try:
             allele_arr = np.array(
                 [
@@ -1397,22 +1429,542 @@ class Haplotypes(Data):
                     for i, (vID, allele) in enumerate(alleles)
                 ],
                 dtype=gts.data.dtype,
-            )[np.newaxis, :, np.newaxis]
+            )
         except ValueError:
             raise ValueError("Some alleles were not present in the genotypes")
         # finally, obtain and merge the haplotype genotypes
         self.log.info(f"Transforming genotypes for {len(haps)} haplotypes")
-        equality_arr = np.equal(allele_arr, gts.data[:, :, :2])
-        self.log.debug(
-            f"Allocating array with dtype {gts.data.dtype} and size "
-            f"{(len(gts.samples), len(haps), 2)}"
-        )
-        hap_gts.data = np.empty((gts.data.shape[0], len(haps), 2), dtype=np.bool_)
+        num_samples = len(gts.samples)
+        self.log.debug(f"Encoding {len(allele_arr)} alleles as bitsets")
+        bits = self._allele_bits(gts, allele_arr)
         self.log.debug("Computing haplotype genotypes. This may take a while")
-        for i in range(len(haps)):
-            hap_gts.data[:, i] = np.all(equality_arr[:, idxs[i]], axis=1)
+        hap_bits = self._haplotype_bits(bits, idxs)
+        del bits
+        # drop the padding at the end of each bitset
+        num_bits = num_samples * (2 // hap_bits.shape[1])
+        hap_bytes = hap_bits.view(np.uint8)[:, :, : -(-num_bits // 8)]
+        if gts._packed:
+            hap_gts.data = np.ascontiguousarray(hap_bytes.transpose((2, 0, 1)))
+            hap_gts._packed = True
+            return hap_gts
+        # store the haplotype genotypes in the same layout as the genotypes
+        hap_gts._variant_major = gts._variant_major
+        self.log.debug(f"Unpacking haplotype genotypes for {num_samples} samples")
+        hap_data = np.unpackbits(hap_bytes, axis=2, count=num_bits).view(np.bool_)
+        if hap_gts._variant_major:
+            hap_gts.data = hap_data.reshape((len(haps), num_samples, 2))
+        else:
+            hap_gts.data = np.ascontiguousarray(hap_data.transpose((2, 0, 1)))
         return hap_gts
 
+    def _transform_cached(
+        self,
+        gts: GenotypesVCF,
+        hap_gts: GenotypesVCF = None,
+        cache_dir: Path = None,
+        cache_size: int = _TRANSFORM_CACHE_SIZE,
+    ) -> GenotypesVCF:
+        """
+        Transform genotypes via the haplotypes, reusing the genotypes of any
+        haplotypes that were cached by a previous call
+
+        This is a helper function for :py:meth:`~.Haplotypes.transform`. The cache is
+        a directory of .npy files, each holding a row of bits for every haplotype from
+        a single call. Only the haplotypes that weren't found in the cache are written
+        to the new file, so the rows of a haplotype are never stored twice.
+
+        Parameters
+        ----------
+        gts : GenotypesVCF
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        hap_gts: GenotypesVCF, optional
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        cache_dir: Path
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        cache_size: int, optional
+            See documentation for :py:meth:`~.Haplotypes.transform`
+
+        Returns
+        -------
+        GenotypesVCF
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        """
+        if gts.fname is None:
+            self.log.warning(
+                "Genotypes that weren't read from a file cannot be cached. Proceeding "
+                "without the cache."
+            )
+            return self.transform(gts, hap_gts)
+        self.index()
+        haps = [self.data[hap] for hap in self.type_ids["H"]]
+        num_samples = len(gts.samples)
+        # each row stores both strands of each sample in turn
+        bits = np.empty((len(haps), -(-num_samples * 2 // 8)), dtype=np.uint8)
+        keys = self._cache_keys(gts, haps)
+        cached, files = self._read_transform_cache(cache_dir, bits.shape[1])
+        hits = {}
+        for idx, key in enumerate(keys):
+            if key in cached:
+                fname, row = cached[key]
+                hits.setdefault(fname, ([], []))
+                hits[fname][0].append(idx)
+                hits[fname][1].append(row)
+        for fname, (idxs, rows) in hits.items():
+            bits[idxs] = files[fname]["bits"][rows]
+        missing = [idx for idx, key in enumerate(keys) if key not in cached]
+        self.log.info(
+            f"Found {len(haps) - len(missing)} of {len(haps)} haplotypes in the cache "
+            f"in {cache_dir}"
+        )
+        if missing:
+            computed = self.subset(haplotypes=tuple(haps[idx].id for idx in missing))
+            computed = computed.transform(gts)
+            if computed._packed:
+                computed.unpack()
+            bits[missing] = np.packbits(
+                computed._sample_major().transpose((1, 0, 2)).reshape(len(missing), -1),
+                axis=1,
+            )
+        try:
+            for fname in hits:
+                # mark the files as recently used, so that they are evicted last
+                os.utime(fname)
+            if missing:
+                self._write_transform_cache(
+                    cache_dir, [keys[idx] for idx in missing], bits[missing]
+                )
+            self._evict_transform_cache(cache_dir, cache_size)
+        except OSError as e:
+            self.log.warning(f"Failed to cache haplotype genotypes in {cache_dir}: {e}")
+        # store the haplotype genotypes in the same layout as the genotypes
+        if hap_gts is None:
+            hap_gts = GenotypesVCF(fname=None, log=self.log)
+        hap_gts.samples = gts.samples
+        hap_gts.variants = np.array(
+            [(hap.id, hap.chrom, hap.start, ("A", "T")) for hap in haps],
+            dtype=hap_gts.variants.dtype,
+        )
+        hap_data = np.unpackbits(bits, axis=1, count=num_samples * 2).view(np.bool_)
+        hap_data = hap_data.reshape((len(haps), num_samples, 2))
+        if gts._packed:
+            hap_gts.data = np.packbits(hap_data.transpose((1, 0, 2)), axis=0)
+            hap_gts._packed = True
+            return hap_gts
+        hap_gts._variant_major = gts._variant_major
+        if hap_gts._variant_major:
+            hap_gts.data = hap_data
+        else:
+            hap_gts.data = np.ascontiguousarray(hap_data.transpose((1, 0, 2)))
+        return hap_gts
+
+    @staticmethod
+    def _cache_keys(gts: GenotypesVCF, haps: list[Haplotype]) -> list[bytes]:
+        """
+        Identify the genotypes of each haplotype in the cache of
+        :py:meth:`~.Haplotypes.transform`
+
+        Parameters
+        ----------
+        gts : GenotypesVCF
+            The genotypes which to transform using the haplotypes
+        haps : list[Haplotype]
+            The haplotypes
+
+        Returns
+        -------
+        list[bytes]
+            A hash of the alleles of each haplotype, the files from which the
+            genotypes were read, and the samples
+        """
+        source = (gts.__class__.__name__, gts._source_stamp(), tuple(gts.samples))
+        base = hashlib.sha1(repr(source).encode("utf8"))
+        keys = []
+        for hap in haps:
+            digest = base.copy()
+            # the order of the alleles doesn't affect the genotypes of the haplotype
+            alleles = sorted({f"{vr.id}\t{vr.allele}" for vr in hap.variants})
+            digest.update("\n".join(alleles).encode("utf8"))
+            keys.append(digest.hexdigest()[:32].encode("ascii"))
+        return keys
+
+    def _read_transform_cache(
+        self, cache_dir: Path, num_bytes: int
+    ) -> tuple[dict[bytes, tuple[Path, int]], dict[Path, npt.NDArray]]:
+        """
+        Find the haplotypes in the cache of :py:meth:`~.Haplotypes.transform`
+
+        Parameters
+        ----------
+        cache_dir : Path
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        num_bytes : int
+            The number of bytes in the row of each haplotype. Files with any other
+            number were written for other samples, so they are skipped.
+
+        Returns
+        -------
+        tuple[dict[bytes, tuple[Path, int]], dict[Path, npt.NDArray]]
+            The file and row in which each key from
+            :py:meth:`~.Haplotypes._cache_keys` can be found, and the memory-mapped
+            contents of each file
+        """
+        cached, files = {}, {}
+        if not cache_dir.exists():
+            return cached, files
+        for fname in cache_dir.glob("*.npy"):
+            try:
+                entries = np.load(fname, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                self.log.warning(f"Ignoring unreadable cache file {fname}: {e}")
+                continue
+            if entries.dtype.names != ("key", "bits"):
+                continue
+            if entries.dtype["bits"].shape != (num_bytes,):
+                continue
+            files[fname] = entries
+            for row, key in enumerate(entries["key"].tolist()):
+                cached[key] = (fname, row)
+        return cached, files
+
+    def _write_transform_cache(
+        self, cache_dir: Path, keys: list[bytes], bits: npt.NDArray[np.uint8]
+    ):
+        """
+        Store the genotypes of some haplotypes in a new file in the cache of
+        :py:meth:`~.Haplotypes.transform`
+
+        Parameters
+        ----------
+        cache_dir : Path
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        keys : list[bytes]
+            The output of :py:meth:`~.Haplotypes._cache_keys`
+        bits : npt.NDArray[np.uint8]
+            The packed genotypes of each haplotype, with one row per key
+        """
+        entries = np.empty(
+            len(keys), dtype=[("key", "S32"), ("bits", np.uint8, (bits.shape[1],))]
+        )
+        entries["key"] = keys
+        entries["bits"] = bits
+        fname = cache_dir / (hashlib.sha1(b"".join(keys)).hexdigest()[:16] + ".npy")
+        self.log.debug(f"Caching the genotypes of {len(keys)} haplotypes in {fname}")
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so that other readers never see half of it
+        tmp_fname = fname.with_suffix(".tmp")
+        with open(tmp_fname, "wb") as cache_file:
+            np.save(cache_file, entries)
+        os.replace(tmp_fname, fname)
+
+    def _evict_transform_cache(self, cache_dir: Path, cache_size: int):
+        """
+        Delete the least recently used files in the cache of
+        :py:meth:`~.Haplotypes.transform` until it fits within its size budget
+
+        The most recently used file is always kept
+
+        Parameters
+        ----------
+        cache_dir : Path
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        cache_size : int
+            See documentation for :py:meth:`~.Haplotypes.transform`
+        """
+        if not cache_dir.exists():
+            return
+        stats = sorted(
+            ((fname.stat(), fname) for fname in cache_dir.glob("*.npy")),
+            key=lambda item: item[0].st_mtime_ns,
+            reverse=True,
+        )
+        total = 0
+        for idx, (stat, fname) in enumerate(stats):
+            total += stat.st_size
+            if idx and total > cache_size:
+                self.log.debug(f"Evicting {fname} from the cache")
+                fname.unlink()
+
+    @staticmethod
+    def _allele_bits(
+        gts: GenotypesVCF, allele_arr: npt.NDArray
+    ) -> npt.NDArray[np.uint64]:
+        """
+        Encode whether each strand of each sample matches each allele as a bitset
+
+        This is a helper function for :py:meth:`~.Haplotypes.transform`. The genotypes
+        are compared in blocks, so that an n x a x 2 array of matches is never
+        created.
+
+        Parameters
+        ----------
+        gts: GenotypesVCF
+            Genotypes containing only the variants in allele_arr, in order
+        allele_arr: npt.NDArray
+            The index of the desired allele of each variant in gts
+
+        Returns
+        -------
+        npt.NDArray[np.uint64]
+            An array of shape len(allele_arr) x 2 x ceil(n/64), where each bit denotes
+            whether a strand of a sample has an allele. The bits of the samples are
+            packed in the same order as :py:meth:`~.Genotypes.pack`.
+
+            If the genotypes are stored variant-major, the array instead has shape
+            len(allele_arr) x 1 x ceil(2n/64) and the two strands of each sample are
+            adjacent bits, since that is the order of the genotypes in memory
+        """
+        num_alleles, num_samples = len(allele_arr), len(gts.samples)
+        num_rows = 1 if gts._variant_major else 2
+        num_bytes = -(-num_samples * (2 // num_rows) // 8)
+        # pad each bitset to a whole number of 64-bit words
+        bits = np.zeros((num_alleles, num_rows, -(-num_bytes // 8) * 8), dtype=np.uint8)
+        if gts._packed:
+            # the bits denote the presence of the ALT allele, so we flip them wherever
+            # we want the REF allele instead
+            equality_arr = np.where(
+                (allele_arr == 0)[np.newaxis, :, np.newaxis], ~gts.data, gts.data
+            )
+            # packed genotypes are biallelic, so no strand can match any other allele
+            equality_arr[:, allele_arr > 1] = 0
+            bits[:, :, :num_bytes] = equality_arr.transpose((1, 2, 0))
+            # clear the padding bits at the end so they never look like a match
+            bits[:, :, num_bytes - 1] &= np.uint8((0xFF << -num_samples % 8) & 0xFF)
+        elif gts._variant_major:
+            # each allele's genotypes are contiguous, so we compare blocks of alleles
+            block = max(1, _BITSET_BLOCK // max(1, 2 * num_samples))
+            for start in range(0, num_alleles, block):
+                end = min(start + block, num_alleles)
+                equality_arr = np.equal(
+                    gts.data[start:end, :, :2],
+                    allele_arr[start:end, np.newaxis, np.newaxis],
+                )
+                bits[start:end, 0, :num_bytes] = np.packbits(
+                    equality_arr.reshape((end - start, -1)), axis=1
+                )
+        else:
+            # each sample's genotypes are contiguous, so we compare blocks of samples
+            # and then OR together the rows of every eight samples into a byte, which
+            # is faster than np.packbits() along the first axis
+            block = max(8, _BITSET_BLOCK // max(1, 2 * num_alleles) // 8 * 8)
+            for start in range(0, num_samples, block):
+                end = min(start + block, num_samples)
+                equality_arr = np.zeros(
+                    (-(-(end - start) // 8) * 8, num_alleles, 2), dtype=np.uint8
+                )
+                np.equal(
+                    gts.data[start:end, :, :2],
+                    allele_arr[np.newaxis, :, np.newaxis],
+                    out=equality_arr[: end - start].view(np.bool_),
+                )
+                equality_arr = equality_arr.reshape((-1, 8, num_alleles, 2))
+                packed = equality_arr[:, 0] << 7
+                for bit in range(1, 8):
+                    packed |= equality_arr[:, bit] << (7 - bit)
+                byte = start // 8
+                bits[:, :, byte : byte + len(packed)] = packed.transpose((1, 2, 0))
+        return bits.view(np.uint64)
+
+    @staticmethod
+    def _haplotype_trie(
+        idxs: list[npt.NDArray],
+    ) -> tuple[list[tuple[list[int], list[int]]], npt.NDArray[np.intp]]:
+        """
+        Arrange the alleles of some haplotypes into a trie, so that alleles shared by
+        several haplotypes are AND-ed together only once
+
+        This is a helper function for :py:meth:`~.Haplotypes._haplotype_bits`.
+
+        Parameters
+        ----------
+        idxs: list[npt.NDArray]
+            The indices of the alleles in each haplotype, ordered such that
+            haplotypes with shared alleles have common prefixes
+
+        Returns
+        -------
+        tuple[list[tuple[list[int], list[int]]], npt.NDArray[np.intp]]
+            The nodes in each level of the trie, where the nodes at depth d + 1 are
+            encoded as a pair of lists: the index of the parent of each node among
+            the nodes at depth d and the index of the allele that each node adds to
+            its parent
+
+            Also, the index of the last node of each haplotype among the nodes at its
+            depth
+        """
+        levels = []
+        nodes = {}
+        ends = np.zeros(len(idxs), dtype=np.intp)
+        for hap, idx in enumerate(idxs):
+            node = 0
+            for depth, allele in enumerate(idx):
+                if depth == len(levels):
+                    levels.append(([], []))
+                key = (depth, node, allele)
+                if key not in nodes:
+                    parents, alleles = levels[depth]
+                    nodes[key] = len(alleles)
+                    parents.append(node)
+                    alleles.append(allele)
+                node = nodes[key]
+            ends[hap] = node
+        return levels, ends
+
+    @staticmethod
+    def _haplotype_bits(
+        bits: npt.NDArray[np.uint64], idxs: list[npt.NDArray]
+    ) -> npt.NDArray[np.uint64]:
+        """
+        Compute the bitset of each haplotype by AND-ing the bitsets of its alleles
+
+        This is a helper function for :py:meth:`~.Haplotypes.transform`. Haplotypes
+        that share alleles can share partial products via a trie (see
+        :py:meth:`~.Haplotypes._haplotype_trie`). The haplotypes are processed in
+        batches to limit the memory used by the partial products, and the trie is only
+        used for a batch if it requires fewer gathers of bitsets than AND-ing the
+        alleles of each haplotype separately.
+
+        Parameters
+        ----------
+        bits: npt.NDArray[np.uint64]
+            The bitset of each allele, as returned by
+            :py:meth:`~.Haplotypes._allele_bits`
+        idxs: list[npt.NDArray]
+            The indices (within bits) of the alleles in each haplotype
+
+        Returns
+        -------
+        npt.NDArray[np.uint64]
+            An array of shape len(idxs) x 2 x ceil(n/64), where each bit denotes
+            whether a strand of a sample has a haplotype
+        """
+        hap_bits = np.empty((len(idxs), *bits.shape[1:]), dtype=np.uint64)
+        # order the alleles in each haplotype from most to least common, so that
+        # alleles shared by many haplotypes end up in common prefixes
+        hap_alleles = [set(idx.tolist()) for idx in idxs]
+        counts = np.bincount(
+            np.fromiter(chain.from_iterable(hap_alleles), dtype=np.intp),
+            minlength=len(bits),
+        )
+        rank = np.argsort(np.argsort(-counts, kind="stable")).tolist()
+        seqs = [tuple(sorted(hap, key=rank.__getitem__)) for hap in hap_alleles]
+        # then sort the haplotypes so that those with common prefixes are adjacent
+        order = sorted(range(len(seqs)), key=lambda hap: [rank[a] for a in seqs[hap]])
+        batch = max(1, _TRIE_BLOCK // max(1, hap_bits[0:1].nbytes))
+        for start in range(0, len(order), batch):
+            haps = order[start : start + batch]
+            batch_seqs = [seqs[hap] for hap in haps]
+            lengths = np.array([len(seq) for seq in batch_seqs], dtype=np.uintp)
+            levels, ends = Haplotypes._haplotype_trie(batch_seqs)
+            # the trie needs a gather for each node and another for the parents of
+            # each level, unless every node in the previous level has a single child
+            chains = [True] * len(levels)
+            for depth in range(1, len(levels)):
+                parents = levels[depth][0]
+                chains[depth] = len(parents) == len(levels[depth - 1][0]) and (
+                    parents == list(range(len(parents)))
+                )
+            num_gathers = sum(
+                len(alleles) * (2 - is_chain)
+                for (_, alleles), is_chain in zip(levels, chains)
+            )
+            haps = np.array(haps, dtype=np.intp)
+            if num_gathers < lengths.sum():
+                Haplotypes._trie_bits(
+                    bits, levels, ends, lengths, chains, hap_bits, haps
+                )
+            else:
+                Haplotypes._flat_bits(bits, batch_seqs, lengths, hap_bits, haps)
+        return hap_bits
+
+    @staticmethod
+    def _flat_bits(
+        bits: npt.NDArray[np.uint64],
+        seqs: list[tuple[int]],
+        lengths: npt.NDArray[np.uintp],
+        hap_bits: npt.NDArray[np.uint64],
+        haps: npt.NDArray[np.intp],
+    ):
+        """
+        Compute the bitset of each haplotype by AND-ing the bitsets of its alleles, one
+        after the other
+
+        This is a helper function for :py:meth:`~.Haplotypes._haplotype_bits`.
+        Haplotypes with the same number of alleles are processed together.
+
+        Parameters
+        ----------
+        bits: npt.NDArray[np.uint64]
+            See documentation for :py:meth:`~.Haplotypes._haplotype_bits`
+        seqs: list[tuple[int]]
+            The indices (within bits) of the alleles in each haplotype
+        lengths: npt.NDArray[np.uintp]
+            The number of alleles in each haplotype
+        hap_bits: npt.NDArray[np.uint64]
+            The array into which the bitset of each haplotype should be stored
+        haps: npt.NDArray[np.intp]
+            The index of each haplotype within hap_bits
+        """
+        for length in np.unique(lengths):
+            hap_idxs = np.flatnonzero(lengths == length)
+            if not length:
+                # a haplotype without any alleles is present everywhere
+                hap_bits[haps[hap_idxs]] = np.iinfo(np.uint64).max
+                continue
+            allele_idxs = np.array([seqs[i] for i in hap_idxs], dtype=np.intp)
+            group = bits[allele_idxs[:, 0]]
+            for col in range(1, length):
+                group &= bits[allele_idxs[:, col]]
+            hap_bits[haps[hap_idxs]] = group
+
+    @staticmethod
+    def _trie_bits(
+        bits: npt.NDArray[np.uint64],
+        levels: list[tuple[list[int], list[int]]],
+        ends: npt.NDArray[np.intp],
+        lengths: npt.NDArray[np.uintp],
+        chains: list[bool],
+        hap_bits: npt.NDArray[np.uint64],
+        haps: npt.NDArray[np.intp],
+    ):
+        """
+        Compute the bitset of each haplotype by evaluating a trie of its alleles
+
+        This is a helper function for :py:meth:`~.Haplotypes._haplotype_bits`. The trie
+        is evaluated one level at a time, so that the nodes at each depth are computed
+        together and only a single level of partial products is kept at once.
+
+        Parameters
+        ----------
+        bits: npt.NDArray[np.uint64]
+            See documentation for :py:meth:`~.Haplotypes._haplotype_bits`
+        levels: list[tuple[list[int], list[int]]]
+            See documentation for :py:meth:`~.Haplotypes._haplotype_trie`
+        ends: npt.NDArray[np.intp]
+            See documentation for :py:meth:`~.Haplotypes._haplotype_trie`
+        lengths: npt.NDArray[np.uintp]
+            The number of alleles in each haplotype
+        chains: list[bool]
+            Whether each node in the level above each level has a single child
+        hap_bits: npt.NDArray[np.uint64]
+            See documentation for :py:meth:`~.Haplotypes._flat_bits`
+        haps: npt.NDArray[np.intp]
+            See documentation for :py:meth:`~.Haplotypes._flat_bits`
+        """
+        # a haplotype without any alleles is present everywhere
+        hap_bits[haps[lengths == 0]] = np.iinfo(np.uint64).max
+        level = None
+        for depth, ((parents, alleles), is_chain) in enumerate(zip(levels, chains)):
+            if not depth:
+                level = bits[alleles]
+            elif is_chain:
+                level &= bits[alleles]
+            else:
+                # evict the previous level once its children have been computed
+                level = level[parents]
+                level &= bits[alleles]
+            done = lengths == depth + 1
+            hap_bits[haps[done]] = level[ends[done]]
+
     def sort(self):
         """
         Sorts .hap files first by chrom, followed by start, end, and lastly ID
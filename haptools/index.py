@@ -92,3 +92,36 @@ def index_haps(
     tbi_file = append_suffix(hp.fname, ".tbi")
     shutil.copy(str(tbi_file), str(append_suffix(output, ".tbi")))
     tbi_file.unlink()
+
+
+def index_variants(
+    genotypes: Path,
+    log: logging.Logger = None,
+):
+    """
+    Index the variant IDs in a VCF, BCF, or PGEN file
+
+    See documentation for :py:meth:`~.data.Genotypes.write_id_index`
+
+    Parameters
+    ----------
+
+    genotypes : Path
+        The path to the genotypes in VCF or PGEN format (or to the PVAR file of a PGEN
+        file)
+    log : Logger, optional
+        A logging module to which to write messages about progress and any errors
+    """
+    if log is None:
+        log = getLogger(name="index", level="ERROR")
+
+    for ext in (".pvar", ".pvar.gz", ".pvar.zst"):
+        if genotypes.name.endswith(ext):
+            genotypes = genotypes.with_name(genotypes.name[: -len(ext)] + ".pgen")
+            break
+
+    if genotypes.suffix == ".pgen":
+        gts = data.GenotypesPLINK(genotypes, log=log)
+    else:
+        gts = data.Genotypes(genotypes, log=log)
+    gts.write_id_index()
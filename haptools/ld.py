@@ -78,6 +78,7 @@ def calc_ld(
     from_gts: bool = False,
     output: Path = Path("/dev/stdout"),
     log: logging.Logger = None,
+    workers: int = 1,
 ):
     """
     Creates a VCF composed of haplotypes
@@ -117,6 +118,12 @@ def calc_ld(
         The location to which to write output
     log : Logger, optional
         A logging module to which to write messages about progress and any errors
+    workers : int, optional
+        The number of processes to use when reading genotypes from an indexed VCF
+
+        See documentation for the workers parameter of
+        :py:meth:`~.data.Genotypes.read`. This argument is ignored if the genotypes
+        are in PGEN format.
     """
     if log is None:
         log = getLogger(name="ld", level="ERROR")
@@ -188,7 +195,10 @@ def calc_ld(
         log.info("Loading genotypes from VCF/BCF file")
         gt = data.GenotypesVCF(fname=genotypes, log=log)
     # gt._prephased = True
-    gt.read(region=region, samples=samples, variants=variants)
+    if isinstance(gt, data.GenotypesPLINK):
+        gt.read(region=region, samples=samples, variants=variants)
+    else:
+        gt.read(region=region, samples=samples, variants=variants, workers=workers)
     gt.check_missing(discard_also=discard_missing)
     gt.check_biallelic()
     gt.check_phase()
@@ -310,6 +310,7 @@ def simulate_pt(
     seed: int = None,
     output: Path = Path("-"),
     log: logging.Logger = None,
+    workers: int = 1,
 ):
     """
     Haplotype-aware phenotype simulation. Create a set of simulated phenotypes from a
@@ -378,6 +379,12 @@ def simulate_pt(
         The location to which to write the simulated phenotypes
     log : logging.Logger, optional
         The logging module for this task
+    workers : int, optional
+        The number of processes to use when reading genotypes from an indexed VCF
+
+        See documentation for the workers parameter of
+        :py:meth:`~.data.Genotypes.read`. This argument is ignored if the genotypes
+        are in PGEN format.
     """
     if log is None:
         log = getLogger(name="simphenotype", level="ERROR")
@@ -431,7 +438,10 @@ def simulate_pt(
             gt = Genotypes(fname=genotypes, log=log)
 
     # gt._prephased = True
-    gt.read(region=region, samples=samples, variants=haplotype_ids)
+    if isinstance(gt, GenotypesPLINK):
+        gt.read(region=region, samples=samples, variants=haplotype_ids)
+    else:
+        gt.read(region=region, samples=samples, variants=haplotype_ids, workers=workers)
     log.info("QC-ing genotypes")
     gt.check_missing()
 
@@ -443,7 +453,12 @@ def simulate_pt(
         else:
             log.info("Loading repeat genotypes from VCF/BCF file")
             tr_gt = GenotypesTR(fname=repeats, log=log)
-        tr_gt.read(region=region, samples=samples, variants=haplotype_ids)
+        if isinstance(tr_gt, GenotypesPLINK):
+            tr_gt.read(region=region, samples=samples, variants=haplotype_ids)
+        else:
+            tr_gt.read(
+                region=region, samples=samples, variants=haplotype_ids, workers=workers
+            )
         tr_gt.check_missing()
         gt = Genotypes.merge_variants((gt, tr_gt), fname=None)
 
@@ -1,16 +1,24 @@
 from __future__ import annotations
 import logging
 from pathlib import Path
-from collections import namedtuple
+from operator import itemgetter
+from itertools import repeat
+from functools import partial
 from dataclasses import dataclass, field
+from collections import namedtuple, Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 from cyvcf2 import VCF
 import numpy.typing as npt
-from pysam import VariantFile
 
 from . import data
 from .logging import getLogger
+from .data.genotypes import _compact, _gt_tokens, _VCF_WRITE_BLOCK
+
+
+# the number of variants to read at a time when streaming genotypes
+_STREAM_CHUNK = 1000
 
 
 @dataclass
@@ -184,24 +192,31 @@ class GenotypesAncestry(data.GenotypesVCF):
         # goes from encoding number to population code
         self.popnum_ancestry = {}
 
-    def _iterate(self, vcf: VCF, region: str = None, variants: set[str] = None):
+    def _iterate(
+        self,
+        vcf: VCF,
+        region: str = None,
+        variants: set[str] = None,
+        fields: bool = False,
+    ):
         """
         See documentation for :py:meth:`~.Genotypes._iterate`
         """
         self.log.info(f"Loading genotypes from {len(self.samples)} samples")
         Record = namedtuple("Record", "data ancestry variants")
+        variant_getter = self._variant_getter(fields)
         num_seen = 0
         pop_count = 0
         # iterate over each line in the VCF
         # note, this can take a lot of time if there are many samples
-        for variant in vcf(region):
+        for variant in self._vcf_iter(vcf, region, variants):
             if variants is not None and variant.ID not in variants:
                 if num_seen >= len(variants):
                     # exit early if we've already found all the variants
                     break
                 continue
             # save meta information about each variant
-            variant_arr = self._variant_arr(variant)
+            variant_arr = variant_getter(variant)
             # extract the genotypes to a matrix of size n x 3
             # the last dimension has three items:
             # 1) presence of REF in strand one
@@ -230,65 +245,37 @@ class GenotypesAncestry(data.GenotypesVCF):
         samples: set[str] = None,
         variants: set[str] = None,
         max_variants: int = None,
+        workers: int = 1,
+        qc: dict[str, dict] = None,
     ):
         """
         See documentation for :py:meth:`~.Genotypes.read`
         """
         super(data.Genotypes, self).read()
-        records = self.__iter__(region=region, samples=samples, variants=variants)
+        qc_stats = self._qc_stats(qc)
+        if workers > 1 and self._read_shards(region, samples, variants, workers):
+            # the genotypes weren't parsed here, so they'll have to be summarized
+            if qc is not None and 0 not in self.data.shape:
+                self._apply_qc(qc, inplace=True)
+            return
+        records = self._iterate(self._open_vcf(samples), region, variants, fields=True)
         if variants is not None:
             max_variants = len(variants)
-        # check whether we can preallocate memory instead of making copies
-        if max_variants is None:
-            self.log.warning(
-                "The max_variants parameter was not specified. We have no choice but to"
-                " append to an ever-growing array, which can lead to memory overuse!"
-            )
-            variants_arr = []
-            data_arr = []
-            ancestry_arr = []
-            for rec in records:
-                variants_arr.append(rec.variants)
-                data_arr.append(rec.data)
-                ancestry_arr.append(rec.ancestry)
-            self.log.info(f"Copying {len(variants_arr)} variants into np arrays.")
-            # convert to np array for speedy operations later on
-            self.variants = np.array(variants_arr, dtype=self.variants.dtype)
-            self.data = np.array(data_arr, dtype=np.uint8)
-            self.ancestry = np.array(ancestry_arr, dtype=np.uint8)
-        else:
-            # preallocate arrays! this will save us lots of memory and speed b/c
-            # appends can sometimes make copies
-            self.variants = np.empty((max_variants,), dtype=self.variants.dtype)
-            # in order to check_phase() later, we must store the phase info, as well
-            self.data = np.empty(
-                (max_variants, len(self.samples), (2 + (not self._prephased))),
-                dtype=np.uint8,
-            )
-            self.ancestry = np.empty(
-                (max_variants, len(self.samples), 2),
-                dtype=np.uint8,
-            )
-            self.valid_labels = np.empty(
-                (max_variants, len(self.samples), 2),
-                dtype=object,
-            )
-            num_seen = 0
-            for rec in records:
-                if num_seen >= max_variants:
-                    break
-                self.variants[num_seen] = rec.variants
-                self.data[num_seen] = rec.data
-                self.ancestry[num_seen] = rec.ancestry
-                num_seen += 1
-            if max_variants > num_seen:
-                self.log.info(
-                    f"Removing {max_variants-num_seen} unneeded variant records that "
-                    "were preallocated b/c max_variants was specified."
-                )
-                self.variants = self.variants[:num_seen]
-                self.data = self.data[:num_seen]
-                self.ancestry = self.ancestry[:num_seen]
+        # preallocate arrays! this will save us lots of memory and speed b/c
+        # appends can sometimes make copies
+        arrays = self._collect_records(
+            records, self._num_records(region, max_variants), max_variants, qc_stats
+        )
+        self.variants = arrays.get(
+            "variants", np.empty((0,), dtype=self.variants.dtype)
+        )
+        self.data = arrays.get(
+            "data",
+            np.empty((0, len(self.samples), (2 + (not self._prephased))), np.uint8),
+        )
+        self.ancestry = arrays.get(
+            "ancestry", np.empty((0, len(self.samples), 2), dtype=np.uint8)
+        )
         if 0 in self.data.shape:
             self.log.warning(
                 "Failed to load genotypes. If you specified a region, check that the"
@@ -298,6 +285,30 @@ class GenotypesAncestry(data.GenotypesVCF):
         self.log.info(f"Transposing genotype matrix of size {self.data.shape}.")
         self.data = self.data.transpose((1, 0, 2))
         self.ancestry = self.ancestry.transpose((1, 0, 2))
+        if qc is not None and 0 not in self.data.shape:
+            self._apply_qc(qc, qc_stats, inplace=True)
+
+    def _merge_shards(self, shards: list[GenotypesAncestry], keep: list[npt.NDArray]):
+        """
+        See documentation for :py:meth:`~.Genotypes._merge_shards`
+        """
+        super()._merge_shards(shards, keep)
+        # each shard encodes the populations in the order it encountered them, so we
+        # must translate them to a single shared encoding
+        ancestry = []
+        for gts, idx in zip(shards, keep):
+            encoding = np.zeros(len(gts.popnum_ancestry), dtype=np.uint8)
+            for num, pop in gts.popnum_ancestry.items():
+                if pop not in self.ancestry_labels:
+                    self.ancestry_labels[pop] = len(self.ancestry_labels)
+                    self.popnum_ancestry[self.ancestry_labels[pop]] = pop
+                encoding[num] = self.ancestry_labels[pop]
+            if gts.ancestry.shape[1]:
+                ancestry.append(encoding[gts.ancestry[:, idx]])
+        if len(ancestry):
+            self.ancestry = np.concatenate(ancestry, axis=1)
+        else:
+            self.ancestry = np.empty((len(self.samples), 0, 2), dtype=np.uint8)
 
     def subset(
         self,
@@ -350,6 +361,25 @@ class GenotypesAncestry(data.GenotypesVCF):
         if not inplace:
             return gts
 
+    def _discard(
+        self,
+        keep_samples: npt.NDArray[np.bool_] = None,
+        keep_variants: npt.NDArray[np.bool_] = None,
+        inplace: bool = False,
+    ):
+        """
+        See documentation for :py:meth:`~.Genotypes._discard`
+        """
+        if keep_samples is not None and not np.all(keep_samples):
+            self.ancestry = _compact(
+                self.ancestry, keep_samples, axis=0, inplace=inplace
+            )
+        if keep_variants is not None and not np.all(keep_variants):
+            self.ancestry = _compact(
+                self.ancestry, keep_variants, axis=1, inplace=inplace
+            )
+        super()._discard(keep_samples, keep_variants, inplace)
+
     def check_missing(self, discard_also=False):
         """
         See documentation for :py:meth:`~.Genotypes.check_missing`
@@ -361,14 +391,11 @@ class GenotypesAncestry(data.GenotypesVCF):
             samp_idx, variant_idx = np.nonzero(missing)
             if discard_also:
                 original_num_samples = len(self.samples)
-                self.data = np.delete(self.data, samp_idx, axis=0)
-                self.ancestry = np.delete(self.ancestry, samp_idx, axis=0)
-                self.samples = tuple(np.delete(self.samples, samp_idx))
+                self._discard(keep_samples=~np.any(missing, axis=1))
                 self.log.info(
                     "Ignoring missing genotypes from "
                     f"{original_num_samples - len(self.samples)} samples"
                 )
-                self._samp_idx = None
             else:
                 raise ValueError(
                     "Genotype with ID {} at POS {}:{} is missing for sample {}".format(
@@ -396,10 +423,7 @@ class GenotypesAncestry(data.GenotypesVCF):
             samp_idx, variant_idx = np.nonzero(multiallelic)
             if discard_also:
                 self.log.info(f"Ignoring {len(variant_idx)} multiallelic variants")
-                self.data = np.delete(self.data, variant_idx, axis=1)
-                self.ancestry = np.delete(self.ancestry, variant_idx, axis=1)
-                self.variants = np.delete(self.variants, variant_idx)
-                self._var_idx = None
+                self._discard(keep_variants=~np.any(multiallelic, axis=0))
             else:
                 raise ValueError(
                     "Variant with ID {} at POS {}:{} is multiallelic for sample {}"
@@ -415,109 +439,103 @@ class GenotypesAncestry(data.GenotypesVCF):
             )
         self.data = self.data.astype(np.bool_)
 
-    def write(self, chroms=None):
+    def _pop_tokens(self) -> npt.NDArray:
+        """
+        Create a lookup table from the population codes of a genotype to its POP token
+        in a VCF
+
+        Returns
+        -------
+        npt.NDArray
+            An array of shape 256 x 256 and type bytes, indexed by the population code
+            of each strand. Codes without a population are left empty.
+        """
+        names = np.full(256, b"", dtype=object)
+        for num, pop in self.popnum_ancestry.items():
+            names[num] = pop.encode()
+        names = names.astype(bytes)
+        return np.char.add(np.char.add(names[:, np.newaxis], b","), names)
+
+    def _sample_columns(self, start: int, end: int, gts: npt.NDArray) -> list[bytes]:
+        """
+        See documentation for :py:meth:`~.GenotypesVCF._sample_columns`
+        """
+        if not len(self.samples) or (
+            self.ancestry is None and self.valid_labels is None
+        ):
+            return super()._sample_columns(start, end, gts)
+        fields = _gt_tokens()[gts[:, :, 2], gts[:, :, 0], gts[:, :, 1]]
+        if self.ancestry is not None:
+            pops = self.ancestry[:, start:end].swapaxes(0, 1)
+            pops = self._pop_tokens()[pops[:, :, 0], pops[:, :, 1]]
+            fields = np.char.add(np.char.add(fields, b":"), pops)
+        if self.valid_labels is not None:
+            labels = self.valid_labels[:, start:end].swapaxes(0, 1)
+            if labels.dtype == object:
+                # missing labels are written as empty strings
+                labels = np.where(np.equal(labels, None), "", labels)
+            try:
+                labels = labels.astype(bytes)
+            except UnicodeEncodeError:
+                labels = np.char.encode(labels.astype(str), "utf-8")
+            labels = np.char.add(np.char.add(labels[:, :, 0], b","), labels[:, :, 1])
+            fields = np.char.add(np.char.add(fields, b":"), labels)
+        return [b"\t" + b"\t".join(row) for row in fields.tolist()]
+
+    def write(self, chroms: list[str] = None, threads: int = 1, index: bool = False):
         # Assumption is the data must be phased
         """
         Write the variants in this class to a VCF at :py:attr:`~.GenotypesAncestry.fname`
-        """
-        vcf = VariantFile(str(self.fname), mode="w")
 
-        # make sure the header is properly structured
-        if not chroms:
-            for contig in set(self.variants["chrom"]):
-                vcf.header.contigs.add(contig)
-        else:
+        The ancestry of each allele is written to the POP FORMAT field, and the
+        :py:attr:`~.GenotypesAncestry.valid_labels` are written to the SAMPLE field
+
+        Parameters
+        ----------
+        chroms : list[str], optional
+            If provided, only declare the contigs in this list (with or without a
+            "chr" prefix) in the header of the VCF
+        threads : int, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        index : bool, optional
+            See documentation for :py:meth:`~.GenotypesVCF.write`
+        """
+        chrom_col = self.variants["chrom"]
+        contigs = chrom_col[np.sort(np.unique(chrom_col, return_index=True)[1])]
+        contigs = contigs.tolist()
+        if chroms:
             # make sure the header is properly structured with contig names from ref VCF
-            for contig in set(self.variants["chrom"]):
-                # remove chr in front of seqname if present and compare
-                if contig.startswith("chr"):
-                    if contig[3:] in chroms:
-                        vcf.header.contigs.add(contig)
-                if contig in chroms:
-                    vcf.header.contigs.add(contig)
-
-        vcf.header.add_meta(
-            "FORMAT",
-            items=[
-                ("ID", "GT"),
-                ("Number", 1),
-                ("Type", "String"),
-                ("Description", "Genotype"),
-            ],
-        )
-        if not self.ancestry is None:
-            vcf.header.add_meta(
-                "FORMAT",
-                items=[
-                    ("ID", "POP"),
-                    ("Number", 2),
-                    ("Type", "String"),
-                    (
-                        "Description",
-                        "Origin Population of each respective allele in GT",
-                    ),
-                ],
-            )
-        if not self.valid_labels is None:
-            vcf.header.add_meta(
-                "FORMAT",
-                items=[
-                    ("ID", "SAMPLE"),
-                    ("Number", 2),
-                    ("Type", "String"),
-                    (
-                        "Description",
-                        "Origin sample and haplotype of each respective allele in GT",
-                    ),
-                ],
+            # remove chr in front of seqname if present and compare
+            contigs = [
+                contig
+                for contig in contigs
+                if contig in chroms
+                or (contig.startswith("chr") and contig[3:] in chroms)
+            ]
+            invalid = ~np.isin(chrom_col, contigs)
+            if np.any(invalid):
+                raise ValueError(
+                    "Invalid chromosome/contig {} for variant {}".format(
+                        *tuple(self.variants[np.argmax(invalid)][["chrom", "id"]])
+                    )
+                )
+        formats = [("GT", "1", "Genotype")]
+        block_size = None
+        if self.ancestry is not None:
+            formats.append(
+                ("POP", "2", "Origin Population of each respective allele in GT")
             )
-        try:
-            vcf.header.add_samples(self.samples)
-        except AttributeError:
-            self.log.warning(
-                "Upgrade to pysam >=0.19.1 to reduce the time required to create "
-                "VCFs. See https://github.com/pysam-developers/pysam/issues/1104"
+        if self.valid_labels is not None:
+            formats.append(
+                (
+                    "SAMPLE",
+                    "2",
+                    "Origin sample and haplotype of each respective allele in GT",
+                )
             )
-            for sample in self.samples:
-                vcf.header.add_sample(sample)
-        self.log.info("Writing VCF records")
-        phased = self._prephased or (self.data.shape[2] < 3)
-        for var_idx, var in enumerate(self.variants):
-            rec = {
-                "contig": var["chrom"],
-                "start": var["pos"],
-                "stop": var["pos"] + len(var["alleles"][0]) - 1,
-                "qual": None,
-                "alleles": var["alleles"],
-                "id": var["id"],
-                "filter": None,
-            }
-            # handle pysam increasing the start site by 1
-            rec["start"] -= 1
-            # parse the record into a pysam.VariantRecord
-            record = vcf.new_record(**rec)
-            for samp_idx, sample in enumerate(self.samples):
-                # TODO: make this work when there are missing values
-                record.samples[sample]["GT"] = tuple(self.data[samp_idx, var_idx, :2])
-                if not self.ancestry is None:
-                    record.samples[sample]["POP"] = tuple(
-                        map(
-                            self.popnum_ancestry.get,
-                            self.ancestry[samp_idx, var_idx, :],
-                        )
-                    )
-                if not self.valid_labels is None:
-                    record.samples[sample]["SAMPLE"] = tuple(
-                        self.valid_labels[samp_idx, var_idx, :]
-                    )
-                # add proper phasing info
-                if phased:
-                    record.samples[sample].phased = True
-                else:
-                    record.samples[sample].phased = self.data[samp_idx, var_idx, 2]
-            # write the record to a file
-            vcf.write(record)
-        vcf.close()
+            # the labels are formatted as wide strings, so we use smaller blocks
+            block_size = _VCF_WRITE_BLOCK >> 4
+        self._write_vcf(formats, contigs, threads, index, block_size)
 
     def merge_variants(
         cls, objs: tuple[data.Genotypes], check_samples: bool = True, **kwargs
@@ -527,6 +545,15 @@ class GenotypesAncestry(data.GenotypesVCF):
         """
         raise NotImplementedError
 
+    @classmethod
+    def merge_samples(
+        cls, objs: tuple[data.Genotypes], on: str = "id", **kwargs
+    ) -> data.Genotypes:
+        """
+        See documentation for :py:meth:`~.data.Genotypes.merge_samples`
+        """
+        raise NotImplementedError
+
 
 def transform_haps(
     genotypes: Path,
@@ -539,6 +566,9 @@ def transform_haps(
     ancestry: bool = False,
     output: Path = Path("-"),
     log: logging.Logger = None,
+    workers: int = 1,
+    streaming: bool = False,
+    cache_dir: Path = None,
 ):
     """
     Creates a VCF composed of haplotypes
@@ -575,9 +605,42 @@ def transform_haps(
         The location to which to write output
     log : Logger, optional
         A logging module to which to write messages about progress and any errors
+    workers : int, optional
+        The number of processes to use when transforming haplotypes
+
+        The haplotypes are partitioned by contig, or by region if there are fewer
+        contigs than workers. The genotypes of each partition are then read and
+        transformed in a separate process. The output is the same regardless of the
+        number of workers.
+
+        If the haplotypes can't be partitioned, the workers are used to read the
+        genotypes from an indexed VCF, instead. See documentation for the workers
+        parameter of :py:meth:`~.data.Genotypes.read`.
+    streaming : bool, optional
+        Whether to stream the genotypes in chunks of chunk_size variants, writing the
+        genotypes of each haplotype as soon as all of its variants have been read
+
+        Only the variants of the haplotypes that haven't been written yet are kept in
+        memory. The haplotypes are written in order of their position, instead of the
+        order in the .hap file. This cannot be combined with discard_missing,
+        ancestry, or workers.
+    cache_dir : Path, optional
+        A directory in which to cache the genotypes of each haplotype, so that only
+        new or changed haplotypes are transformed the next time
+
+        See documentation for :py:meth:`~.data.Haplotypes.transform`. This cannot be
+        combined with streaming or ancestry.
     """
     if log is None:
         log = getLogger(name="transform", level="ERROR")
+    if streaming and (discard_missing or ancestry):
+        raise ValueError(
+            "Streaming cannot be combined with discarding missing genotypes or ancestry"
+        )
+    if streaming and workers > 1:
+        raise ValueError("Streaming cannot be combined with multiple workers")
+    if cache_dir is not None and (streaming or ancestry):
+        raise ValueError("Caching cannot be combined with streaming or ancestry")
 
     haps_class = HaplotypesAncestry if ancestry else data.Haplotypes
     log.info("Loading haplotypes")
@@ -599,6 +662,131 @@ def transform_haps(
     log.info("Extracting variants from haplotypes")
     variants = {vr.id for id in hp.type_ids["H"] for vr in hp.data[id].variants}
 
+    if streaming:
+        return _transform_streaming(
+            hp, genotypes, variants, region, samples, chunk_size, output, log
+        )
+
+    if output.suffix == ".pgen":
+        out_file_type = "PGEN"
+        hp_gt = data.GenotypesPLINK(fname=output, log=log, chunk_size=chunk_size)
+    else:
+        out_file_type = "VCF/BCF"
+        hp_gt = data.GenotypesVCF(fname=output, log=log)
+
+    partitions = []
+    if workers > 1:
+        if (
+            genotypes.suffix == ".pgen"
+            or data.GenotypesVCF(fname=genotypes)._index_stats() is not None
+        ):
+            # the contigs and positions in the .hap file might not match those in the
+            # genotypes file, so we find the variants there, instead
+            if genotypes.suffix == ".pgen":
+                gt = data.GenotypesPLINK(fname=genotypes, log=log)
+            else:
+                gt = data.GenotypesVCF(fname=genotypes, log=log)
+            gt.read_variants(region=region, variants=variants)
+            partitions = _partition_haps(hp, gt.variants, workers)
+        else:
+            log.warning(
+                "Unable to read the partitions of the haplotypes in parallel. Check "
+                "that the genotypes file has been indexed. Falling back to a single "
+                "worker."
+            )
+    if len(partitions) > 1:
+        log.info(
+            f"Transforming {len(partitions)} partitions of the haplotypes with "
+            f"{workers} workers"
+        )
+        _transform_partitions(
+            hp,
+            partitions,
+            genotypes,
+            samples,
+            chunk_size,
+            discard_missing,
+            ancestry,
+            log,
+            workers,
+            hp_gt,
+            cache_dir,
+        )
+    else:
+        _transform(
+            hp,
+            genotypes,
+            variants,
+            region,
+            samples,
+            chunk_size,
+            discard_missing,
+            ancestry,
+            log,
+            workers,
+            hp_gt,
+            cache_dir,
+        )
+
+    log.info(f"Writing haplotypes to {out_file_type} file")
+    hp_gt.write()
+
+    log.debug("Done!")
+    return hp_gt
+
+
+def _transform(
+    hp: data.Haplotypes,
+    genotypes: Path,
+    variants: set[str],
+    region: str = None,
+    samples: set[str] = None,
+    chunk_size: int = None,
+    discard_missing: bool = False,
+    ancestry: bool = False,
+    log: logging.Logger = None,
+    workers: int = 1,
+    hp_gt: data.GenotypesVCF = None,
+    cache_dir: Path = None,
+) -> data.GenotypesVCF:
+    """
+    Load the genotypes of some haplotypes and transform them
+
+    This is a helper function for :py:func:`~.transform_haps`
+
+    Parameters
+    ----------
+    hp : data.Haplotypes
+        The haplotypes to transform
+    genotypes : Path
+        See documentation for :py:func:`~.transform_haps`
+    variants : set[str]
+        The IDs of the variants in the haplotypes
+    region : str, optional
+        See documentation for :py:func:`~.transform_haps`
+    samples : set[str], optional
+        See documentation for :py:func:`~.transform_haps`
+    chunk_size : int, optional
+        See documentation for :py:func:`~.transform_haps`
+    discard_missing : bool, optional
+        See documentation for :py:func:`~.transform_haps`
+    ancestry : bool, optional
+        See documentation for :py:func:`~.transform_haps`
+    log : Logger, optional
+        See documentation for :py:func:`~.transform_haps`
+    workers : int, optional
+        The number of processes to use when reading genotypes from an indexed VCF
+    hp_gt : data.GenotypesVCF, optional
+        An empty GenotypesVCF object into which the haplotype genotypes should be
+        stored
+    cache_dir : Path, optional
+        See documentation for :py:func:`~.transform_haps`
+
+    Returns
+    -------
+    data.GenotypesVCF
+        The haplotype genotypes
+    """
     # load the genotypes, but first get the path to the breakpoints file
     if genotypes.suffix == ".gz":
         bps_file = genotypes.with_suffix("").with_suffix(".bp")
@@ -615,29 +803,29 @@ def transform_haps(
         else:
             gt = data.GenotypesVCF(fname=genotypes, log=log)
     # gt._prephased = True
-    gt.read(region=region, samples=samples, variants=variants)
+    # unless we need ancestry labels, store the genotypes variant-major so that
+    # neither the read nor the write has to transpose them
+    if isinstance(gt, data.GenotypesPLINK):
+        gt.read(
+            region=region,
+            samples=samples,
+            variants=variants,
+            variant_major=not ancestry,
+        )
+    elif isinstance(gt, GenotypesAncestry):
+        gt.read(region=region, samples=samples, variants=variants, workers=workers)
+    else:
+        gt.read(
+            region=region,
+            samples=samples,
+            variants=variants,
+            workers=workers,
+            variant_major=not ancestry,
+        )
     gt.check_missing(discard_also=discard_missing)
     gt.check_phase()
 
-    # check that all of the variants were loaded successfully and warn otherwise
-    if len(variants) > len(gt.variants):
-        diff = list(variants.difference(gt.variants["id"]))
-        first_few = 5 if len(diff) > 5 else len(diff)
-        log.warning(
-            f"{len(diff)} variant(s) could not be found in the genotypes file. Check "
-            "that the IDs in your .hap file correspond with those in the genotypes "
-            f"file. Here are the first few missing variants: {diff[:first_few]}"
-        )
-        # subset the set of haplotypes so that we keep only those that we can transform
-        gt_variants = set(gt.variants["id"])
-        original_num_haps = len(hp.data)
-        haplotype_ids = tuple(
-            hap_id
-            for hap_id, hap in hp.data.items()
-            if gt_variants.issuperset(hap.varIDs)
-        )
-        hp.subset(haplotypes=haplotype_ids, inplace=True)
-        log.info(f"Proceeding with {len(hp.data)} of {original_num_haps} haplotypes")
+    _check_variants(hp, variants, gt.variants, log)
 
     if ancestry and not isinstance(gt, GenotypesAncestry):
         log.info("Loading ancestry info from .bp file")
@@ -657,17 +845,419 @@ def transform_haps(
         gta.ancestry = bps.population_array(gt.variants[["chrom", "pos"]])
         gt = gta
 
+    log.info("Transforming genotypes via haplotypes")
+    if cache_dir is not None:
+        return hp.transform(gt, hp_gt, cache_dir=cache_dir)
+    return hp.transform(gt, hp_gt)
+
+
+def _partition_haps(
+    hp: data.Haplotypes, gt_variants: npt.NDArray, num_partitions: int = 2
+) -> list[tuple[str, tuple[str]]]:
+    """
+    Partition haplotypes by contig, so that each partition can be transformed on its
+    own
+
+    This is a helper function for :py:func:`~.transform_haps`
+
+    Parameters
+    ----------
+    hp : data.Haplotypes
+        The haplotypes to partition
+    gt_variants : npt.NDArray
+        The variants of the haplotypes, as loaded from the genotypes file
+
+        The region of each partition is taken from these, rather than from the .hap
+        file, so that the partitions read exactly the same variants as a single
+        worker would
+    num_partitions : int, optional
+        The desired number of partitions
+
+        Contigs are never merged, so there may be more partitions than this. If there
+        are fewer contigs, the haplotypes in each contig are split by position.
+
+    Returns
+    -------
+    list[tuple[str, tuple[str]]]
+        The region spanned by the variants of each partition and the IDs of its
+        haplotypes, ordered by contig (as in the .hap file) and then by position
+
+        This is empty if any haplotype has no variants, is missing any of them from
+        the genotypes file, or has variants on multiple contigs, since only a single
+        worker can handle those
+    """
+    sites = dict(
+        zip(
+            gt_variants["id"].tolist(),
+            zip(gt_variants["chrom"].tolist(), gt_variants["pos"].tolist()),
+        )
+    )
+    contigs = {}
+    for hap_id in hp.type_ids["H"]:
+        hap = hp.data[hap_id]
+        hap_sites = [sites.get(vr.id) for vr in hap.variants]
+        if (
+            not hap_sites
+            or None in hap_sites
+            or len({chrom for chrom, _ in hap_sites}) > 1
+        ):
+            return []
+        positions = [pos for _, pos in hap_sites]
+        contigs.setdefault(hap_sites[0][0], []).append((min(positions), hap, positions))
+    partitions = []
+    for chrom, haps in contigs.items():
+        haps.sort(key=itemgetter(0))
+        pieces = 1
+        if len(contigs) < num_partitions:
+            num_haps = len(hp.type_ids["H"])
+            pieces = max(1, round(num_partitions * len(haps) / num_haps))
+        for group in np.array_split(np.arange(len(haps)), min(pieces, len(haps))):
+            group = haps[group[0] : group[-1] + 1]
+            positions = [pos for _, _, hap_pos in group for pos in hap_pos]
+            partitions.append(
+                (
+                    f"{chrom}:{min(positions)}-{max(positions)}",
+                    tuple(hap.id for _, hap, _ in group),
+                )
+            )
+    return partitions
+
+
+def _transform_partition(
+    hp: data.Haplotypes,
+    genotypes: Path,
+    region: str,
+    samples: set[str] = None,
+    chunk_size: int = None,
+    discard_missing: bool = False,
+    ancestry: bool = False,
+    log: logging.Logger = None,
+    hp_gt: data.GenotypesVCF = None,
+    cache_dir: Path = None,
+) -> data.GenotypesVCF:
+    """
+    Transform a single partition of the haplotypes in a worker process
+
+    This is a helper function for :py:func:`~._transform_partitions`
+
+    Parameters
+    ----------
+    hp : data.Haplotypes
+        The haplotypes in the partition
+    genotypes : Path
+        See documentation for :py:func:`~.transform_haps`
+    region : str
+        The region spanned by the variants of the haplotypes in the partition
+    samples : set[str], optional
+        See documentation for :py:func:`~.transform_haps`
+    chunk_size : int, optional
+        See documentation for :py:func:`~.transform_haps`
+    discard_missing : bool, optional
+        See documentation for :py:func:`~.transform_haps`
+    ancestry : bool, optional
+        See documentation for :py:func:`~.transform_haps`
+    log : Logger, optional
+        See documentation for :py:func:`~.transform_haps`
+    hp_gt : data.GenotypesVCF, optional
+        An empty GenotypesVCF object into which the haplotype genotypes should be
+        stored
+    cache_dir : Path, optional
+        See documentation for :py:func:`~.transform_haps`
+
+    Returns
+    -------
+    data.GenotypesVCF
+        The haplotype genotypes of the partition
+    """
+    # the parent process reports progress for all of the partitions, so the workers
+    # should only ever report warnings and errors
+    log.setLevel(max(log.getEffectiveLevel(), logging.WARNING))
+    variants = {vr.id for id in hp.type_ids["H"] for vr in hp.data[id].variants}
+    return _transform(
+        hp,
+        genotypes,
+        variants,
+        region,
+        samples,
+        chunk_size,
+        discard_missing,
+        ancestry,
+        log,
+        # the other workers are already busy with the other partitions
+        1,
+        hp_gt,
+        cache_dir,
+    )
+
+
+def _transform_partitions(
+    hp: data.Haplotypes,
+    partitions: list[tuple[str, tuple[str]]],
+    genotypes: Path,
+    samples: set[str] = None,
+    chunk_size: int = None,
+    discard_missing: bool = False,
+    ancestry: bool = False,
+    log: logging.Logger = None,
+    workers: int = 2,
+    hp_gt: data.GenotypesVCF = None,
+    cache_dir: Path = None,
+):
+    """
+    Transform partitions of the haplotypes in parallel and concatenate them
+
+    This is a helper function for :py:func:`~.transform_haps`
+
+    Parameters
+    ----------
+    hp : data.Haplotypes
+        The haplotypes to transform
+    partitions : list[tuple[str, tuple[str]]]
+        The output of :py:func:`~._partition_haps`
+    genotypes : Path
+        See documentation for :py:func:`~.transform_haps`
+    samples : set[str], optional
+        See documentation for :py:func:`~.transform_haps`
+    chunk_size : int, optional
+        See documentation for :py:func:`~.transform_haps`
+    discard_missing : bool, optional
+        See documentation for :py:func:`~.transform_haps`
+    ancestry : bool, optional
+        See documentation for :py:func:`~.transform_haps`
+    log : Logger, optional
+        See documentation for :py:func:`~.transform_haps`
+    workers : int, optional
+        See documentation for :py:func:`~.transform_haps`
+    hp_gt : data.GenotypesVCF, optional
+        An empty GenotypesVCF object into which the haplotype genotypes should be
+        stored, in the order of the haplotypes in hp
+    cache_dir : Path, optional
+        See documentation for :py:func:`~.transform_haps`
+    """
+    regions = [region for region, _ in partitions]
+    parts = [hp.subset(haplotypes=hap_ids) for _, hap_ids in partitions]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                _transform_partition,
+                parts,
+                repeat(genotypes),
+                regions,
+                repeat(samples),
+                repeat(chunk_size),
+                repeat(discard_missing),
+                repeat(ancestry),
+                repeat(log),
+                (hp_gt.__class__(fname=None, log=log) for _ in parts),
+                repeat(cache_dir),
+            )
+        )
+    # each partition might have discarded different samples with missing genotypes
+    kept = set(results[0].samples).intersection(*(res.samples for res in results))
+    hp_gt.samples = tuple(samp for samp in results[0].samples if samp in kept)
+    for res in results:
+        if len(res.samples) > len(hp_gt.samples):
+            res.subset(samples=hp_gt.samples, inplace=True)
+    hp_gt._variant_major = results[0]._variant_major
+    hp_gt.variants = np.concatenate([res.variants for res in results])
+    hp_gt.data = np.concatenate([res.data for res in results], axis=hp_gt._var_axis)
+    # restore the order of the haplotypes in the .hap file
+    hap_ids = set(hp_gt.variants["id"])
+    hp_gt.subset(
+        variants=tuple(hap_id for hap_id in hp.type_ids["H"] if hap_id in hap_ids),
+        inplace=True,
+    )
+
+
+def _check_variants(
+    hp: data.Haplotypes,
+    variants: set[str],
+    gt_variants: npt.NDArray,
+    log: logging.Logger,
+):
+    """
+    Check that all of the variants were loaded successfully and warn otherwise
+
+    Any haplotypes with missing variants are discarded. This is a helper function for
+    :py:func:`~.transform_haps`
+
+    Parameters
+    ----------
+    hp : data.Haplotypes
+        The haplotypes to transform
+    variants : set[str]
+        The IDs of the variants in the haplotypes
+    gt_variants : npt.NDArray
+        The variants that were loaded from the genotypes file
+    log : Logger
+        A logging module to which to write messages about progress and any errors
+    """
+    if len(variants) > len(gt_variants):
+        diff = list(variants.difference(gt_variants["id"]))
+        first_few = 5 if len(diff) > 5 else len(diff)
+        log.warning(
+            f"{len(diff)} variant(s) could not be found in the genotypes file. Check "
+            "that the IDs in your .hap file correspond with those in the genotypes "
+            f"file. Here are the first few missing variants: {diff[:first_few]}"
+        )
+        # subset the set of haplotypes so that we keep only those that we can transform
+        gt_variants = set(gt_variants["id"])
+        original_num_haps = len(hp.data)
+        haplotype_ids = tuple(
+            hap_id
+            for hap_id, hap in hp.data.items()
+            if gt_variants.issuperset(hap.varIDs)
+        )
+        hp.subset(haplotypes=haplotype_ids, inplace=True)
+        log.info(f"Proceeding with {len(hp.data)} of {original_num_haps} haplotypes")
+
+
+def _transform_streaming(
+    hp: data.Haplotypes,
+    genotypes: Path,
+    variants: set[str],
+    region: str = None,
+    samples: set[str] = None,
+    chunk_size: int = None,
+    output: Path = Path("-"),
+    log: logging.Logger = None,
+) -> data.GenotypesVCF:
+    """
+    Transform haplotypes while streaming their genotypes in chunks of variants
+
+    This is a helper function for :py:func:`~.transform_haps`. The genotypes of each
+    haplotype are written as soon as all of its variants have been read, so only the
+    variants of haplotypes that haven't been written yet are ever kept in memory.
+
+    Parameters
+    ----------
+    hp : data.Haplotypes
+        The haplotypes to transform
+    genotypes : Path
+        See documentation for :py:func:`~.transform_haps`
+    variants : set[str]
+        The IDs of the variants in the haplotypes
+    region : str, optional
+        See documentation for :py:func:`~.transform_haps`
+    samples : set[str], optional
+        See documentation for :py:func:`~.transform_haps`
+    chunk_size : int, optional
+        The number of variants to read at a time. Defaults to _STREAM_CHUNK
+    output : Path, optional
+        See documentation for :py:func:`~.transform_haps`
+    log : Logger, optional
+        See documentation for :py:func:`~.transform_haps`
+
+    Returns
+    -------
+    data.GenotypesVCF
+        The output genotypes, containing the samples and the haplotypes that were
+        written but none of their genotypes
+    """
+    if genotypes.suffix == ".pgen":
+        gts_class = partial(data.GenotypesPLINK, chunk_size=chunk_size)
+    else:
+        gts_class = data.GenotypesVCF
+    # find the variants before reading any of their genotypes, so that we know which
+    # haplotypes can be transformed and how many will be written
+    log.info("Loading variants from genotypes file")
+    gt = gts_class(fname=genotypes, log=log)
+    gt.read_variants(region=region, variants=variants)
+    _check_variants(hp, variants, gt.variants, log)
+    chroms = dict(zip(gt.variants["id"].tolist(), gt.variants["chrom"].tolist()))
+    # make sure that every haplotype can be written before we start writing any of
+    # them, so that an error never leaves a half-written output behind
+    for hap in map(hp.data.get, hp.type_ids["H"]):
+        if not chroms.keys() >= set(hap.varIDs):
+            raise ValueError(
+                f"Failed to find all of the variants in haplotype {hap.id}. Check "
+                "that the IDs in your .hap file correspond with those in the "
+                "genotypes file."
+            )
+    # order the haplotypes by position, and their contigs as in the genotypes file
+    contig_order = {
+        chrom: idx for idx, chrom in enumerate(dict.fromkeys(chroms.values()))
+    }
+    haps = sorted(
+        (hp.data[hap_id] for hap_id in hp.type_ids["H"]),
+        key=lambda hap: (
+            min((contig_order[chroms[vr.id]] for vr in hap.variants), default=-1),
+            hap.start,
+        ),
+    )
+    # count the haplotypes that still need each variant
+    needed = Counter(vr_id for hap in haps for vr_id in set(hap.varIDs))
+
     if output.suffix == ".pgen":
         out_file_type = "PGEN"
         hp_gt = data.GenotypesPLINK(fname=output, log=log, chunk_size=chunk_size)
     else:
         out_file_type = "VCF/BCF"
         hp_gt = data.GenotypesVCF(fname=output, log=log)
-    log.info("Transforming genotypes via haplotypes")
-    hp.transform(gt, hp_gt)
-
-    log.info(f"Writing haplotypes to {out_file_type} file")
-    hp_gt.write()
+    gt = gts_class(fname=genotypes, log=log)
+    chunks = gt.iter_chunks(
+        chunk_size or _STREAM_CHUNK,
+        region=region,
+        samples=samples,
+        variants=set(needed),
+    )
+    hp_gt.samples = gt.samples
+    contigs = list(dict.fromkeys(hap.chrom for hap in haps))
+    if out_file_type == "PGEN":
+        writer = hp_gt.write_chunks(
+            num_variants=len(haps), max_allele_ct=2, contigs=contigs
+        )
+    else:
+        writer = hp_gt.write_chunks(contigs=contigs)
 
+    # the variants that are still needed by haplotypes that haven't been written, yet
+    window_variants = data.GenotypesVCF(fname=None).variants
+    window_data = np.empty((len(gt.samples), 0, 2), dtype=np.uint8)
+    queue = deque(haps)
+    written = []
+    log.info(f"Streaming genotypes and writing haplotypes to {out_file_type} file")
+    with writer:
+        for chunk in chunks:
+            chunk_gts = data.GenotypesVCF(fname=None, log=log)
+            chunk_gts.samples = gt.samples
+            chunk_gts.data = chunk.data
+            chunk_gts.variants = chunk.variants
+            chunk_gts.check_missing()
+            if chunk_gts.data.shape[2] > 2:
+                chunk_gts.check_phase()
+            window_data = np.concatenate((window_data, chunk_gts.data), axis=1)
+            window_variants = np.concatenate((window_variants, chunk_gts.variants))
+            # write the haplotypes whose variants have all been read, in order
+            loaded = set(window_variants["id"])
+            ready = []
+            while queue and loaded.issuperset(queue[0].varIDs):
+                ready.append(queue.popleft())
+            if not ready:
+                continue
+            window = data.GenotypesVCF(fname=None, log=log)
+            window.samples = gt.samples
+            window.data = window_data
+            window.variants = window_variants
+            hap_gt = hp.subset(haplotypes=tuple(hap.id for hap in ready)).transform(
+                window
+            )
+            writer.append(hap_gt.data, hap_gt.variants)
+            written.append(hap_gt.variants)
+            # evict the variants that are no longer needed by any haplotype
+            needed.subtract(vr_id for hap in ready for vr_id in set(hap.varIDs))
+            keep = np.fromiter(
+                (needed[vr_id] > 0 for vr_id in window_variants["id"]),
+                dtype=np.bool_,
+                count=len(window_variants),
+            )
+            window_data = window_data[:, keep]
+            window_variants = window_variants[keep]
+        if queue:
+            raise ValueError(
+                f"Failed to find all of the variants in haplotype {queue[0].id}. Are "
+                "the variants in the genotypes file sorted?"
+            )
+    if written:
+        hp_gt.variants = np.concatenate(written)
     log.debug("Done!")
     return hp_gt
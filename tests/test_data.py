@@ -1,4 +1,6 @@
 import os
+import shutil
+from collections import namedtuple
 from pathlib import Path
 from dataclasses import dataclass, field
 
@@ -161,6 +163,165 @@ class TestGenotypes:
                 assert line.variants[col] == expected.variants[col][idx]
         assert gts.samples == expected.samples
 
+    def test_load_genotypes_iter_chunks(self):
+        expected = self._get_fake_genotypes()
+
+        gts = Genotypes(DATADIR / "simple.vcf")
+        chunks = list(gts.iter_chunks(chunk_size=3))
+        # the last chunk should contain whatever was left over
+        assert [len(chunk.variants) for chunk in chunks] == [3, 1]
+        for idx, chunk in zip((slice(0, 3), slice(3, 4)), chunks):
+            np.testing.assert_allclose(chunk.data[:, :, :2], expected.data[:, idx])
+            for col in ("chrom", "pos", "id"):
+                assert (
+                    chunk.variants[col].tolist() == expected.variants[col][idx].tolist()
+                )
+        assert gts.samples == expected.samples
+
+        with pytest.raises(ValueError):
+            next(gts.iter_chunks(chunk_size=0))
+
+    def test_load_genotypes_preallocate(self):
+        expected = self._get_fake_genotypes()
+
+        # the number of records should be estimated from the index, if there is one
+        gts = Genotypes(DATADIR / "simple.vcf.gz")
+        assert gts._num_records() == 4
+        assert gts._num_records(max_variants=2) == 2
+        # or from the number of lines in the file, otherwise
+        gts = Genotypes(DATADIR / "simple.vcf")
+        assert gts._num_records() >= 4
+
+        # the arrays should grow if the estimate is too small
+        arrays = gts._collect_records(gts.__iter__(), num_records=1)
+        np.testing.assert_allclose(
+            arrays["data"][:, :, :2], expected.data.transpose((1, 0, 2))
+        )
+        assert arrays["variants"]["id"].tolist() == expected.variants["id"].tolist()
+
+    def test_load_genotypes_columnar(self):
+        expected = GenotypesVCF(DATADIR / "simple.vcf")
+        expected.read()
+
+        # the variants array should be the same whether it was built from columns of
+        # fields or from a np array for each record
+        for fields in (True, False):
+            gts = GenotypesVCF(DATADIR / "simple.vcf")
+            records = gts._iterate(gts._open_vcf(), fields=fields)
+            variants = gts._collect_records(records, num_records=1)["variants"]
+            assert variants.dtype == expected.variants.dtype
+            for col in ("chrom", "pos", "id", "alleles"):
+                assert variants[col].tolist() == expected.variants[col].tolist()
+
+        # child classes that override _variant_arr should still be respected
+        class CustomGenotypes(Genotypes):
+            def _variant_arr(self, record):
+                arr = super()._variant_arr(record)
+                arr["id"] = "custom_" + arr["id"]
+                return arr
+
+        gts = CustomGenotypes(DATADIR / "simple.vcf")
+        gts.read()
+        assert all(vid.startswith("custom_") for vid in gts.variants["id"])
+        assert len(gts.variants) == len(expected.variants)
+
+    def test_load_genotypes_cache(self):
+        expected = GenotypesVCF(DATADIR / "simple.vcf")
+        expected.read()
+        cache_dir = DATADIR / "simple.vcf.hgtcache"
+
+        # the first read should create the cache and the second should load from it
+        for i in range(2):
+            gts = GenotypesVCF(DATADIR / "simple.vcf")
+            gts.read(cache=True)
+            assert cache_dir.exists()
+            np.testing.assert_allclose(gts.data, expected.data)
+            assert gts.samples == expected.samples
+            for col in ("chrom", "pos", "id", "alleles"):
+                assert gts.variants[col].tolist() == expected.variants[col].tolist()
+
+        # a different subset of samples should not reuse the same cache entry
+        gts = GenotypesVCF(DATADIR / "simple.vcf")
+        gts.read(samples=["HG00097", "HG00100"], cache=True)
+        np.testing.assert_allclose(gts.data, expected.data[[1, 3]])
+        assert len(list(cache_dir.iterdir())) == 2
+
+        # and neither should a read that stops early
+        gts = GenotypesVCF(DATADIR / "simple.vcf")
+        gts.read(max_variants=2, cache=True)
+        np.testing.assert_allclose(gts.data, expected.data[:, :2])
+        gts = GenotypesVCF(DATADIR / "simple.vcf")
+        gts.read(cache=True)
+        np.testing.assert_allclose(gts.data, expected.data)
+        assert len(list(cache_dir.iterdir())) == 3
+
+        shutil.rmtree(cache_dir)
+
+    def test_load_genotypes_id_index(self, caplog):
+        fname = DATADIR / "example.vcf.gz"
+        expected = GenotypesVCF(fname)
+        expected.read()
+        variants = set(expected.variants["id"][1::4].tolist()) | {"missing"}
+        expected.subset(variants=expected.variants["id"][1::4], inplace=True)
+
+        gts = GenotypesVCF(fname)
+        gts.write_id_index()
+        index_file = DATADIR / "example.vcf.gz.hidx"
+        assert index_file.exists()
+
+        # the variants should be found via seeks instead of a scan of the file
+        gts.read(variants=variants)
+        assert "Found 4 of the requested variants" in caplog.text
+        np.testing.assert_allclose(gts.data, expected.data)
+        assert gts.variants.tolist() == expected.variants.tolist()
+
+        index_file.unlink()
+
+    def test_load_genotypes_lazy(self):
+        fname = DATADIR / "example.vcf.gz"
+        expected = GenotypesVCF(fname)
+        expected.read()
+
+        # only a single variant should be cached at a time
+        gts = GenotypesVCF(fname)
+        gts.read(lazy=expected.data[:, 0].nbytes)
+        assert gts.variants.tolist() == expected.variants.tolist()
+        np.testing.assert_allclose(gts.data[:, 3], expected.data[:, 3])
+        np.testing.assert_allclose(gts.data[2, ::3], expected.data[2, ::3])
+        np.testing.assert_allclose(np.asarray(gts.data), expected.data)
+
+        # subsetting should only decode the requested variants
+        variants = tuple(expected.variants["id"][[5, 1]])
+        samples = expected.samples[1:3]
+        gts.subset(samples=samples, variants=variants, inplace=True)
+        expected.subset(samples=samples, variants=variants, inplace=True)
+        np.testing.assert_allclose(gts.data[...], expected.data)
+
+        # lazy reading requires an index and can't be combined with other options
+        with pytest.raises(ValueError):
+            Genotypes(DATADIR / "simple.vcf").read(lazy=True)
+        with pytest.raises(ValueError):
+            GenotypesVCF(fname).read(lazy=True, cache=True)
+
+    def test_load_genotypes_parallel(self, caplog):
+        for region in (None, "1:10115-10120"):
+            expected = GenotypesVCF(DATADIR / "simple.vcf.gz")
+            expected.read(region=region)
+
+            # the shards should be stitched back together in the order of the file
+            gts = GenotypesVCF(DATADIR / "simple.vcf.gz")
+            gts.read(region=region, workers=3)
+            np.testing.assert_allclose(gts.data, expected.data)
+            assert gts.samples == expected.samples
+            assert gts.variants.tolist() == expected.variants.tolist()
+
+        # files without an index should be read serially
+        expected = self._get_fake_genotypes()
+        gts = Genotypes(DATADIR / "simple.vcf")
+        gts.read(workers=2)
+        assert "Falling back to serial reading" in caplog.text
+        np.testing.assert_allclose(gts.data[:, :, :2], expected.data)
+
     def test_load_genotypes_discard_multiallelic(self):
         gts = self._get_fake_genotypes()
 
@@ -177,6 +338,107 @@ class TestGenotypes:
         np.testing.assert_equal(gts.data, data_copy_without_biallelic)
         assert gts.variants.shape == tuple(variant_shape)
 
+    def test_load_genotypes_qc(self):
+        # create a VCF in which two of the samples are missing genotypes, so that
+        # the multiallelic and unphased genotypes all belong to discarded samples
+        fname = DATADIR / "test_qc.vcf"
+        edits = {"10114": {11: ".|."}, "10117": {13: ".|0"}, "10122": {11: "0/1"}}
+        with open(DATADIR / "simple-multiallelic.vcf") as vcf_in:
+            with open(fname, "w") as vcf_out:
+                for line in vcf_in:
+                    fields = line.rstrip("\n").split("\t")
+                    if not line.startswith("#"):
+                        for col, gt in edits.get(fields[1], {}).items():
+                            fields[col] = gt
+                    vcf_out.write("\t".join(fields) + "\n")
+
+        qc = {
+            "missing": {"discard_also": True},
+            "biallelic": {"discard_also": True},
+            "phase": {},
+            "maf": {"threshold": 0.1, "discard_also": True},
+        }
+        expected = GenotypesVCF(fname)
+        expected.read()
+        expected.check_missing(**qc["missing"])
+        expected.check_biallelic(**qc["biallelic"])
+        expected.check_phase()
+        expected.check_maf(**qc["maf"])
+
+        # the checks should have the same outcome when run while reading
+        for variant_major in (False, True):
+            gts = GenotypesVCF(fname)
+            gts.read(qc=qc, variant_major=variant_major)
+            assert gts.data.dtype == np.bool_
+            np.testing.assert_allclose(gts._sample_major(), expected.data)
+            assert gts.samples == expected.samples
+            assert gts.variants["id"].tolist() == expected.variants["id"].tolist()
+
+        # and they should raise the same errors, too
+        for check in ("missing", "biallelic"):
+            expected = GenotypesVCF(fname)
+            expected.read()
+            with pytest.raises(ValueError) as expected_info:
+                getattr(expected, f"check_{check}")()
+            with pytest.raises(ValueError) as info:
+                GenotypesVCF(fname).read(qc={check: {}})
+            assert str(info.value) == str(expected_info.value)
+        with pytest.raises(ValueError):
+            GenotypesVCF(fname).read(qc={"unknown": {}})
+
+        fname.unlink()
+
+    @pytest.mark.parametrize("block", [1, 1 << 20])
+    def test_discard_in_place(self, block, monkeypatch):
+        monkeypatch.setattr("haptools.data.genotypes._COMPACT_BLOCK", block)
+        for variant_major in (False, True):
+            gts = self._get_fake_genotypes()
+            gts.data[2, 3, 0] = np.iinfo(np.uint8).max
+            gts.data[0, 3, 1] = 1
+            expected = np.delete(gts.data, [2], axis=0)
+            alt_af = expected.astype(np.bool_).mean(axis=(0, 2))
+            common = np.minimum(alt_af, 1 - alt_af) >= 0.01
+            expected, expected_ids = expected[:, common], gts.variants["id"][common]
+            if variant_major:
+                gts.data = np.ascontiguousarray(gts.data.transpose((1, 0, 2)))
+                gts._variant_major = True
+            gts.data = gts.data.copy()
+            original = gts.data.ctypes.data
+
+            # the surviving genotypes should be shifted down inside the same buffer
+            keep_samples = np.ones(len(gts.samples), dtype=np.bool_)
+            keep_samples[2] = False
+            gts._discard(keep_samples=keep_samples, inplace=True)
+            gts._discard(keep_variants=common, inplace=True)
+            assert gts.data.ctypes.data == original
+            np.testing.assert_allclose(gts._sample_major(), expected)
+            assert gts.samples == ("HG00096", "HG00097", "HG00100", "HG00101")
+            assert gts.variants["id"].tolist() == expected_ids.tolist()
+
+    def test_discard_shared(self):
+        # discarding from one object should never affect another that shares its data
+        gts = self._get_fake_genotypes()
+        gts.data = gts.data.copy()
+        gts.data[2, 3, 0] = np.iinfo(np.uint8).max
+        other = Genotypes(fname=None)
+        other.samples = gts.samples
+        other.variants = gts.variants
+        other.data = gts.data
+        expected = gts.data.copy()
+
+        other.check_missing(discard_also=True)
+        assert len(other.samples) == 4
+        np.testing.assert_allclose(other.data, np.delete(expected, [2], axis=0))
+        assert len(gts.samples) == 5
+        np.testing.assert_allclose(gts.data, expected)
+
+        # and neither should discarding from a subset that shares it
+        subset = gts.subset(variants=tuple(gts.variants["id"]))
+        view = gts.data[:, 1:]
+        gts.check_missing(discard_also=True)
+        np.testing.assert_allclose(subset.data, expected)
+        np.testing.assert_allclose(view, expected[:, 1:])
+
     def test_load_genotypes_subset(self):
         expected = self._get_expected_genotypes()
 
@@ -278,6 +540,67 @@ class TestGenotypes:
         assert len(gts.variants) == 0
         assert gts.data.shape[1] == 0
 
+    def test_pack(self):
+        gts = self._get_fake_genotypes()
+        expected = gts.data.astype(np.bool_)
+        expected_maf = gts.check_maf()
+
+        gts.check_biallelic()
+        gts.pack()
+        assert gts.data.shape == (1, 4, 2)
+        np.testing.assert_allclose(gts.check_maf(), expected_maf)
+        # this should be a no-op
+        gts.check_missing()
+
+        # subset to a few samples and variants
+        gts_sub = gts.subset(samples=("HG00099", "HG00096"), variants=("1:10116:A:G",))
+        assert gts_sub._packed
+        gts_sub.unpack()
+        np.testing.assert_allclose(gts_sub.data, expected[[2, 0]][:, [1]])
+
+        gts.unpack()
+        np.testing.assert_allclose(gts.data, expected)
+
+        # we can't pack genotypes that still have phase information
+        gts = Genotypes(DATADIR / "simple.vcf")
+        gts.read()
+        with pytest.raises(ValueError):
+            gts.pack()
+
+    def test_variant_major(self):
+        expected = GenotypesVCF(DATADIR / "simple.vcf")
+        expected.read()
+        expected.check_missing()
+        expected.check_biallelic()
+        expected.check_phase()
+
+        gts = GenotypesVCF(DATADIR / "simple.vcf")
+        gts.read(variant_major=True)
+        assert gts.data.flags["C_CONTIGUOUS"]
+        gts.check_missing()
+        gts.check_biallelic()
+        gts.check_phase()
+        np.testing.assert_allclose(gts.data, expected.data.transpose((1, 0, 2)))
+        np.testing.assert_allclose(gts.check_maf(), expected.check_maf())
+
+        # subsetting should respect the layout, too
+        samples, variants = ("HG00099", "HG00096"), ("1:10116:A:G", "1:10114:T:C")
+        gts_sub = gts.subset(samples=samples, variants=variants)
+        assert gts_sub._variant_major
+        np.testing.assert_allclose(
+            gts_sub._sample_major(),
+            expected.subset(samples=samples, variants=variants).data,
+        )
+
+        # discarding variants should work along the correct axis
+        gts.check_maf(threshold=0.3, discard_also=True)
+        expected.check_maf(threshold=0.3, discard_also=True)
+        np.testing.assert_allclose(gts._sample_major(), expected.data)
+
+        # we can't pack genotypes that are stored variant-major
+        with pytest.raises(ValueError):
+            gts.pack()
+
     def test_check_sorted(self, caplog):
         gts = self._get_fake_genotypes()
         gts.check_sorted()
@@ -316,6 +639,50 @@ class TestGenotypes:
         assert gts.data.shape[2] == gts2.data.shape[2]
         assert gts.data.shape[1] == (gts1.data.shape[1] + gts2.data.shape[1])
 
+    def test_merge_samples(self):
+        expected = self._get_fake_genotypes()
+        variants = tuple(expected.variants["id"])
+        gts1 = expected.subset(samples=expected.samples[:2])
+        # the variants in the second object are in a different order, and one is absent
+        gts2 = expected.subset(samples=expected.samples[2:], variants=variants[:0:-1])
+
+        gts = Genotypes.merge_samples((gts1, gts2), fname=None)
+
+        assert gts.samples == expected.samples
+        np.testing.assert_equal(gts.variants, expected.variants[1:])
+        np.testing.assert_equal(gts.data, expected.data[:, 1:])
+
+        # also try aligning the variants by their position
+        gts = Genotypes.merge_samples((gts2, gts1), on="pos", fname=None)
+        assert gts.samples == expected.samples[2:] + expected.samples[:2]
+        np.testing.assert_equal(gts.variants, gts2.variants)
+        np.testing.assert_equal(gts.data[3:], gts1.data[:, :0:-1])
+
+        with pytest.raises(ValueError):
+            Genotypes.merge_samples((gts1, gts1), fname=None)
+
+    def test_merge_samples_chunks(self):
+        expected = self._get_fake_genotypes()
+        variants = tuple(expected.variants["id"])
+        gts1 = expected.subset(samples=expected.samples[:2])
+        gts2 = expected.subset(samples=expected.samples[2:], variants=variants[1:])
+
+        def chunks(gts, chunk_size):
+            for start in range(0, len(gts.variants), chunk_size):
+                end = start + chunk_size
+                yield namedtuple("Record", "data variants")(
+                    gts.data[:, start:end], gts.variants[start:end]
+                )
+
+        merged = list(
+            Genotypes.merge_samples_chunks((chunks(gts1, 3), chunks(gts2, 2)))
+        )
+        assert len(merged) == 2
+        data = np.concatenate([chunk.data for chunk in merged], axis=1)
+        merged_variants = np.concatenate([chunk.variants for chunk in merged])
+        np.testing.assert_equal(merged_variants, expected.variants[1:])
+        np.testing.assert_equal(data, expected.data[:, 1:])
+
 
 class TestGenotypesPLINK:
     def _get_fake_genotypes_plink(self):
@@ -416,6 +783,95 @@ class TestGenotypesPLINK:
             for col in ("chrom", "pos", "id", "alleles"):
                 assert gts.variants[col][i] == expected.variants[col][i]
 
+    def test_load_genotypes_pvar_index(self):
+        expected = self._get_fake_genotypes_multiallelic()
+        index_file = DATADIR / "simple-multiallelic.pvar.hidx"
+
+        # the first read should create the sidecar and the second should load from it
+        for i in range(2):
+            gts = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+            gts.read(pvar_cache=True)
+            gts.check_phase()
+            assert index_file.exists()
+            np.testing.assert_allclose(gts.data, expected.data)
+            for col in ("chrom", "pos", "id", "alleles"):
+                assert gts.variants[col].tolist() == expected.variants[col].tolist()
+
+        # regions and variants should select the same records from the sidecar
+        gts = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        gts.read(region="1:10115-10117", variants={"1:10116:A:G", "1:10122:A:G"})
+        assert gts.variants["id"].tolist() == ["1:10116:A:G"]
+
+        index_file.unlink()
+
+    def test_load_genotypes_pvar_long_alleles(self):
+        expected = self._get_fake_genotypes_plink()
+        tmp_file = Path("test_long_alleles")
+        for suffix in (".pgen", ".psam"):
+            shutil.copy(DATADIR / f"simple{suffix}", tmp_file.with_suffix(suffix))
+        # give one of the variants a long indel, which shouldn't inflate the others
+        long_alt = "A" * 1000
+        with open(DATADIR / "simple.pvar") as pvar:
+            lines = pvar.readlines()
+        fields = lines[-1].rstrip("\n").split("\t")
+        fields[4] = long_alt
+        lines[-1] = "\t".join(fields) + "\n"
+        with open(tmp_file.with_suffix(".pvar"), "w") as pvar:
+            pvar.writelines(lines)
+
+        for i in range(2):
+            gts = GenotypesPLINK(tmp_file.with_suffix(".pgen"))
+            columns, contigs = gts._load_pvar(pvar_cache=True)
+            assert all(col.dtype == object for col in columns[:2])
+            assert columns[4][np.arange(len(columns[4]))][-1] == long_alt
+            gts.read(pvar_cache=True, region="1:10116-10122")
+            gts.check_phase()
+            np.testing.assert_allclose(gts.data, expected.data[:, 1:])
+            assert gts.variants["alleles"][-1] == (fields[3], long_alt)
+
+        for suffix in (".pgen", ".psam", ".pvar", ".pvar.hidx"):
+            Path(str(tmp_file) + suffix).unlink()
+
+    def test_load_genotypes_region(self):
+        expected = GenotypesPLINK(DATADIR / "simple-tr.pgen")
+        expected.read()
+
+        regions = {
+            "1": ("1", 0, np.inf),
+            "1:10116": ("1", 10116, np.inf),
+            "1:10115-10117": ("1", 10115, 10117),
+            "1:10118-10119": ("1", 10118, 10119),
+            "X:1-30000": ("X", 1, 30000),
+            "2": ("2", 0, np.inf),
+        }
+        for region, (chrom, start, end) in regions.items():
+            gts = GenotypesPLINK(DATADIR / "simple-tr.pgen")
+            gts.read(region=region)
+            keep = (expected.variants["chrom"] == chrom) & (
+                (expected.variants["pos"] >= start) & (expected.variants["pos"] <= end)
+            )
+            np.testing.assert_allclose(gts.data, expected.data[:, keep])
+            assert gts.variants["id"].tolist() == expected.variants["id"][keep].tolist()
+
+        # unsorted positions can't be binary searched
+        chroms = np.array(["1", "1", "X", "X"])
+        pos = np.array([1, 2, 1, 3], dtype=np.uint32)
+        assert gts._contig_ranges(chroms, pos) == {"1": (0, 2), "X": (2, 4)}
+        assert gts._contig_ranges(chroms, pos[::-1]) is None
+        assert gts._contig_ranges(chroms[[0, 2, 1, 3]], pos) is None
+
+    def test_load_genotypes_qc(self):
+        qc = {"biallelic": {"discard_also": True}, "phase": {}}
+        expected = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        expected.read()
+        expected.check_biallelic(**qc["biallelic"])
+        expected.check_phase()
+
+        gts = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen", chunk_size=1)
+        gts.read(qc=qc)
+        np.testing.assert_allclose(gts.data, expected.data)
+        assert gts.variants["id"].tolist() == expected.variants["id"].tolist()
+
     def test_load_genotypes_multiallelic_tr(self):
         expected = self._get_fake_genotypes_multiallelic_tr()
 
@@ -443,6 +899,24 @@ class TestGenotypesPLINK:
             for col in ("chrom", "pos", "id", "alleles"):
                 assert gts.variants[col][i] == expected.variants[col][i]
 
+    @pytest.mark.parametrize("cpus", [1, 2])
+    @pytest.mark.parametrize("prephased", [False, True])
+    def test_load_genotypes_pipelined(self, monkeypatch, prephased, cpus):
+        # chunks are only decoded in a separate thread when there are multiple CPUs
+        monkeypatch.setattr("haptools.data.genotypes.os.cpu_count", lambda: cpus)
+        expected = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        expected._prephased = prephased
+        expected.read()
+
+        # the last chunk is smaller than the others, so the buffers are only partly used
+        for chunk_size in (1, 3):
+            gts = GenotypesPLINK(
+                DATADIR / "simple-multiallelic.pgen", chunk_size=chunk_size
+            )
+            gts._prephased = prephased
+            gts.read()
+            np.testing.assert_allclose(gts.data, expected.data)
+
     def test_load_genotypes_prephased(self):
         expected = self._get_fake_genotypes_plink()
 
@@ -457,6 +931,24 @@ class TestGenotypesPLINK:
             for col in ("chrom", "pos", "id", "alleles"):
                 assert gts.variants[col][i] == expected.variants[col][i]
 
+    def test_load_genotypes_lazy(self):
+        expected = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        expected.read()
+
+        gts = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        gts.read(lazy=True)
+        assert gts.variants.tolist() == expected.variants.tolist()
+        np.testing.assert_allclose(gts.data[:, 1:3], expected.data[:, 1:3])
+        np.testing.assert_allclose(np.asarray(gts.data), expected.data)
+
+        samples = expected.samples[::2]
+        gts.subset(samples=samples, inplace=True)
+        expected.subset(samples=samples, inplace=True)
+        np.testing.assert_allclose(gts.data[:, ::-1], expected.data[:, ::-1])
+
+        with pytest.raises(ValueError):
+            GenotypesPLINK(DATADIR / "simple.pgen").read(lazy=True, variant_major=True)
+
     def test_load_genotypes_iterate(self):
         expected = self._get_fake_genotypes_plink()
 
@@ -472,6 +964,61 @@ class TestGenotypesPLINK:
             )
         assert gts.samples == expected.samples
 
+    @pytest.mark.parametrize("block", [1, 3, 1024])
+    def test_load_genotypes_iterate_blocks(self, block, monkeypatch):
+        monkeypatch.setattr("haptools.data.genotypes._ITER_BLOCK", block)
+        expected = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        expected.read()
+
+        # records from earlier blocks should remain intact
+        lines = list(GenotypesPLINK(DATADIR / "simple-multiallelic.pgen"))
+        assert len(lines) == len(expected.variants)
+        for idx, line in enumerate(lines):
+            np.testing.assert_allclose(line.data, expected.data[:, idx])
+            assert line.variants["id"] == expected.variants["id"][idx]
+
+    @pytest.mark.parametrize(
+        "region, variants",
+        [("1:10116-10120", None), ("1", {"1:10122:A:G"}), ("2", None)],
+    )
+    def test_load_genotypes_iterate_region(self, region, variants):
+        expected = GenotypesPLINK(DATADIR / "simple.pgen")
+        expected.read(region=region, variants=variants)
+
+        # iterating should select the same variants as reading
+        gts = GenotypesPLINK(DATADIR / "simple.pgen")
+        lines = list(gts.__iter__(region=region, variants=variants))
+        assert [line.variants["id"] for line in lines] == expected.variants[
+            "id"
+        ].tolist()
+        for idx, line in enumerate(lines):
+            np.testing.assert_allclose(line.data, expected.data[:, idx])
+        chunks = list(gts.iter_chunks(2, region=region, variants=variants))
+        ids = [vr_id for chunk in chunks for vr_id in chunk.variants["id"].tolist()]
+        assert ids == expected.variants["id"].tolist()
+
+    def test_load_genotypes_iter_chunks(self):
+        expected = self._get_fake_genotypes_plink()
+
+        gts = GenotypesPLINK(DATADIR / "simple.pgen")
+        chunks = list(gts.iter_chunks(chunk_size=3))
+        assert [len(chunk.variants) for chunk in chunks] == [3, 1]
+        data = np.concatenate([chunk.data for chunk in chunks], axis=1)
+        variants = np.concatenate([chunk.variants for chunk in chunks])
+
+        # check that everything matches what we expected
+        np.testing.assert_allclose(data[:, :, :2], expected.data)
+        for col in ("chrom", "pos", "id", "alleles"):
+            assert variants[col].tolist() == expected.variants[col].tolist()
+        assert gts.samples == expected.samples
+
+        # check that subsetting the samples works, too
+        gts = GenotypesPLINK(DATADIR / "simple.pgen")
+        samples = {"HG00097", "HG00100"}
+        chunk = next(gts.iter_chunks(chunk_size=4, samples=samples))
+        np.testing.assert_allclose(chunk.data[:, :, :2], expected.data[[1, 3]])
+        assert gts.samples == ("HG00097", "HG00100")
+
     def test_iter_multiallelic_tr(self):
         expected = self._get_fake_genotypes_multiallelic_tr()
 
@@ -569,6 +1116,155 @@ class TestGenotypesPLINK:
         fname.with_suffix(".pvar").unlink()
         fname.unlink()
 
+    def test_write_genotypes_no_alt(self):
+        gts = self._get_fake_genotypes_plink()
+        # the first variant has lost its ALT allele
+        gts.variants["alleles"][0] = (gts.variants["alleles"][0][0],)
+
+        fname = DATADIR / "test_write.pgen"
+        gts.fname = fname
+        gts.write()
+
+        with open(fname.with_suffix(".pvar")) as pvar:
+            records = [line.split("\t") for line in pvar if not line.startswith("#")]
+        assert [record[4] for record in records] == ["."] + [
+            alleles[1] for alleles in gts.variants["alleles"][1:]
+        ]
+
+        new_gts = GenotypesPLINK(fname)
+        new_gts.read()
+        assert new_gts.variants["alleles"][0] == (gts.variants["alleles"][0][0], ".")
+
+        # clean up afterwards: delete the files we created
+        fname.with_suffix(".psam").unlink()
+        fname.with_suffix(".pvar").unlink()
+        fname.unlink()
+
+    def test_write_genotypes_compressed(self):
+        gts = self._get_fake_genotypes_multiallelic()
+
+        fname = DATADIR / "test_write_compressed.pgen"
+        gts.fname = fname
+        gts.write(compress="gz")
+        pvar = fname.with_suffix(".pvar.gz")
+        assert pvar.exists() and not fname.with_suffix(".pvar").exists()
+
+        with gts.hook_compressed(pvar, mode="r") as pvar_file:
+            lines = pvar_file.read().splitlines()
+        assert lines[:3] == [
+            "##fileformat=VCFv4.2",
+            "##contig=<ID=1>",
+            "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO",
+        ]
+        assert lines[4] == "1\t10116\t1:10116:A:G\tA\tG,T\t.\t.\t."
+
+        new_gts = GenotypesPLINK(fname)
+        new_gts.read()
+        new_gts.check_phase()
+        np.testing.assert_allclose(gts.data, new_gts.data)
+        for col in ("chrom", "pos", "id", "alleles"):
+            assert new_gts.variants[col].tolist() == gts.variants[col].tolist()
+
+        # clean up afterwards: delete the files we created
+        fname.with_suffix(".psam").unlink()
+        pvar.unlink()
+        fname.unlink()
+
+    def test_write_genotypes_streaming(self):
+        expected = GenotypesPLINK(DATADIR / "simple-multiallelic.pgen")
+        expected.read()
+
+        fname = DATADIR / "test_write_streaming.pgen"
+        gts = GenotypesPLINK(fname)
+        gts.samples = expected.samples
+        chunks = expected.iter_chunks(chunk_size=3)
+        with gts.write_chunks(
+            len(expected.variants), max_allele_ct=3, contigs=["1"]
+        ) as writer:
+            for chunk in chunks:
+                writer.append(chunk.data, chunk.variants)
+        assert writer.num_written == len(expected.variants)
+        with open(fname.with_suffix(".pvar")) as pvar:
+            assert "##contig=<ID=1>\n" in pvar.readlines()
+
+        new_gts = GenotypesPLINK(fname)
+        new_gts.read()
+        np.testing.assert_allclose(new_gts.data, expected.data)
+        assert new_gts.samples == expected.samples
+        for col in ("chrom", "pos", "id", "alleles"):
+            assert new_gts.variants[col].tolist() == expected.variants[col].tolist()
+
+        # clean up afterwards: delete the files we created
+        fname.with_suffix(".psam").unlink()
+        fname.with_suffix(".pvar").unlink()
+        fname.unlink()
+
+        # the number of variants must match what was declared, and any partially
+        # written files should be removed if it doesn't
+        outputs = (fname, fname.with_suffix(".psam"), fname.with_suffix(".pvar"))
+        with pytest.raises(ValueError):
+            with gts.write_chunks(2) as writer:
+                writer.append(expected.data, expected.variants)
+        assert not any(path.exists() for path in outputs)
+        with pytest.raises(ValueError):
+            with gts.write_chunks(5) as writer:
+                writer.append(expected.data, expected.variants)
+        assert not any(path.exists() for path in outputs)
+        with pytest.raises(RuntimeError):
+            with gts.write_chunks(len(expected.variants)) as writer:
+                writer.append(expected.data[:, :2], expected.variants[:2])
+                raise RuntimeError("interrupted")
+        assert not any(path.exists() for path in outputs)
+        assert not Path(f"{fname}.tmp").exists()
+
+    def test_write_genotypes_packed(self):
+        gts = self._get_fake_genotypes_plink()
+        expected = gts.data.astype(np.bool_)
+        gts.data = expected
+        gts.pack()
+
+        fname = DATADIR / "test_write_packed.pgen"
+        gts.fname = fname
+        gts.chunk_size = 3
+        gts.write()
+
+        new_gts = GenotypesPLINK(fname)
+        new_gts.read()
+        new_gts.check_phase()
+
+        # check that everything matches what we expected
+        np.testing.assert_allclose(expected, new_gts.data)
+        assert gts.samples == new_gts.samples
+
+        # clean up afterwards: delete the files we created
+        fname.with_suffix(".psam").unlink()
+        fname.with_suffix(".pvar").unlink()
+        fname.unlink()
+
+    def test_write_genotypes_variant_major(self):
+        expected = GenotypesPLINK(DATADIR / "simple.pgen")
+        expected.read()
+
+        gts = GenotypesPLINK(DATADIR / "simple.pgen", chunk_size=3)
+        gts.read(variant_major=True)
+        np.testing.assert_allclose(gts.data, expected.data.transpose((1, 0, 2)))
+
+        fname = DATADIR / "test_write_variant_major.pgen"
+        gts.fname = fname
+        gts.write()
+
+        new_gts = GenotypesPLINK(fname)
+        new_gts.read()
+
+        # check that everything matches what we expected
+        np.testing.assert_allclose(expected.data, new_gts.data)
+        assert gts.samples == new_gts.samples
+
+        # clean up afterwards: delete the files we created
+        fname.with_suffix(".psam").unlink()
+        fname.with_suffix(".pvar").unlink()
+        fname.unlink()
+
     def test_write_genotypes_empty(self):
         fname = DATADIR / "test_write.pgen"
         gts = GenotypesPLINK(fname=fname)
@@ -764,6 +1460,18 @@ class TestGenotypesPLINKTR:
         # Check samples
         assert gts.samples == expected.samples
 
+    def test_iter_chunks(self):
+        expected = self._get_fake_genotypes_multiallelic()
+        gts = GenotypesPLINKTR(DATADIR / "simple-tr.pgen")
+        chunks = list(gts.iter_chunks(chunk_size=2))
+        data = np.concatenate([chunk.data for chunk in chunks], axis=1)
+        variants = np.concatenate([chunk.variants for chunk in chunks])
+        # Check that everything matches what we expected
+        np.testing.assert_allclose(data, expected.data)
+        for col in ("chrom", "pos", "id"):
+            assert variants[col].tolist() == expected.variants[col].tolist()
+        assert gts.samples == expected.samples
+
     def test_read(self):
         expected_alleles = self._get_fake_genotypes_multiallelic().data
         gts = GenotypesPLINKTR(DATADIR / "simple-tr.pgen")
@@ -1626,6 +2334,133 @@ class TestHaplotypes:
         if return_also:
             return hap_gt
 
+    def test_haps_transform_packed(self):
+        expected = self.test_haps_transform(return_also=True).data
+
+        haps = self._get_dummy_haps()
+        gens = TestGenotypesVCF()._get_fake_genotypes_refalt()
+        gens.data[[2, 4], 0, 1] = 1
+        gens.data[[1, 4], 2, 0] = 1
+        gens.data = gens.data.astype(np.bool_)
+        gens.pack()
+        hap_gt = GenotypesVCF(fname=None)
+        haps.transform(gens, hap_gt)
+        assert hap_gt._packed
+        np.testing.assert_allclose(hap_gt.check_maf(), expected.mean(axis=(0, 2)))
+        hap_gt.unpack()
+        np.testing.assert_allclose(hap_gt.data, expected)
+
+    def test_haps_transform_variant_major(self):
+        expected = self.test_haps_transform(return_also=True).data
+
+        haps = self._get_dummy_haps()
+        gens = TestGenotypesVCF()._get_fake_genotypes_refalt()
+        gens.data[[2, 4], 0, 1] = 1
+        gens.data[[1, 4], 2, 0] = 1
+        gens.data = np.ascontiguousarray(gens.data.transpose((1, 0, 2)))
+        gens._variant_major = True
+        hap_gt = GenotypesVCF(fname=None)
+        haps.transform(gens, hap_gt)
+        assert hap_gt._variant_major
+        np.testing.assert_allclose(hap_gt.data, expected.transpose((1, 0, 2)))
+
+    @pytest.mark.parametrize("layout", ["sample", "variant", "packed"])
+    def test_haps_transform_cache(self, layout, caplog):
+        caplog.set_level("INFO")
+        gens = GenotypesVCF(DATADIR / "simple.vcf")
+        gens.read(variant_major=(layout == "variant"))
+        gens.check_phase()
+        if layout == "packed":
+            gens.check_biallelic()
+            gens.pack()
+        haps = self._get_dummy_haps()
+        expected = haps.transform(gens)
+        cache_dir = DATADIR / "test_haps_transform.cache"
+
+        # the first transform should fill the cache and the second should use it
+        for num_cached in (0, 3):
+            caplog.clear()
+            hap_gt = haps.transform(gens, cache_dir=cache_dir)
+            assert f"Found {num_cached} of 3 haplotypes" in caplog.text
+            assert hap_gt._packed == expected._packed
+            assert hap_gt._variant_major == expected._variant_major
+            np.testing.assert_allclose(hap_gt.data, expected.data)
+            assert hap_gt.variants.tolist() == expected.variants.tolist()
+        assert len(list(cache_dir.iterdir())) == 1
+
+        # only the haplotype that changed should need to be transformed again
+        haps.data["H2"].variants = haps.data["H2"].variants[:1]
+        expected = haps.transform(gens)
+        caplog.clear()
+        hap_gt = haps.transform(gens, cache_dir=cache_dir)
+        assert "Found 2 of 3 haplotypes" in caplog.text
+        np.testing.assert_allclose(hap_gt.data, expected.data)
+        # and the new file should hold only that haplotype
+        sizes = sorted(len(np.load(fname)) for fname in cache_dir.iterdir())
+        assert sizes == [1, 3]
+
+        # the least recently used file should be evicted once the cache is too big
+        haps.transform(gens, cache_dir=cache_dir, cache_size=1)
+        assert len(list(cache_dir.iterdir())) == 1
+
+        shutil.rmtree(cache_dir)
+
+    @pytest.mark.parametrize("layout", ["sample", "variant", "packed"])
+    def test_haps_transform_blocks(self, layout, monkeypatch):
+        # compare the genotypes of a single allele or eight samples at a time
+        monkeypatch.setattr("haptools.data.haplotypes._BITSET_BLOCK", 1)
+        expected = self.test_haps_transform(return_also=True).data
+        expected = np.tile(expected, (5, 1, 1))
+
+        haps = self._get_dummy_haps()
+        gens = TestGenotypesVCF()._get_fake_genotypes_refalt()
+        gens.data[[2, 4], 0, 1] = 1
+        gens.data[[1, 4], 2, 0] = 1
+        gens.data = np.tile(gens.data, (5, 1, 1))
+        gens.samples = tuple(f"{samp}_{i}" for i in range(5) for samp in gens.samples)
+        if layout == "variant":
+            gens.data = np.ascontiguousarray(gens.data.transpose((1, 0, 2)))
+            gens._variant_major = True
+        elif layout == "packed":
+            gens.data = gens.data.astype(np.bool_)
+            gens.pack()
+        hap_gt = haps.transform(gens)
+        if layout == "packed":
+            hap_gt.unpack()
+        np.testing.assert_allclose(hap_gt._sample_major(), expected)
+
+    @pytest.mark.parametrize("trie_block", [1, 1 << 26])
+    def test_haps_transform_nested(self, trie_block, monkeypatch):
+        # a small block forces each haplotype into its own batch, without a trie
+        monkeypatch.setattr("haptools.data.haplotypes._TRIE_BLOCK", trie_block)
+        gens = TestGenotypesVCF()._get_fake_genotypes_refalt()
+        gens.data = np.random.default_rng(0).integers(0, 2, gens.data.shape[:2] + (2,))
+        gens.data = gens.data.astype(np.uint8)
+        variants = [
+            Variant(start=pos, end=pos + 1, id=vid, allele=alleles[1])
+            for vid, pos, alleles in gens.variants[["id", "pos", "alleles"]].tolist()
+        ]
+        variants[2] = Variant(start=10117, end=10118, id="1:10117:C:A", allele="C")
+        # create haplotypes that extend each other, along with a few that don't
+        haps = Haplotypes(fname=None)
+        haps.data = {}
+        for i in range(len(variants) + 1):
+            for hap_id, hap_vars in ((f"H{i}", variants[:i]), (f"R{i}", variants[i:])):
+                haps.data[hap_id] = Haplotype(
+                    chrom="1", start=10114, end=10123, id=hap_id
+                )
+                haps.data[hap_id].variants = tuple(hap_vars)
+        expected = np.ones((len(gens.samples), len(haps.data), 2), dtype=np.bool_)
+        for i, hap in enumerate(haps.data.values()):
+            for var in hap.variants:
+                idx = gens.variants["id"].tolist().index(var.id)
+                allele = gens.variants["alleles"][idx].index(var.allele)
+                expected[:, i] &= gens.data[:, idx] == allele
+
+        hap_gt = haps.transform(gens)
+        assert hap_gt.variants["id"].tolist() == list(haps.data.keys())
+        np.testing.assert_allclose(hap_gt.data, expected)
+
     def test_haps_transform_multiallelic(self, return_also=False):
         expected = np.array(
             [
@@ -1865,6 +2700,67 @@ class TestGenotypesVCF:
 
         fname.unlink()
 
+    @pytest.mark.parametrize("ext", ["vcf.gz", "bcf"])
+    def test_write_compressed(self, ext, monkeypatch):
+        # use tiny blocks, so that there are several to compress in parallel
+        monkeypatch.setattr("haptools.data.genotypes._BGZF_BLOCK", 100)
+        gts = GenotypesVCF(DATADIR / "simple-multiallelic.vcf")
+        gts.read()
+        fname = DATADIR / f"test_write_compressed.{ext}"
+        gts.fname = fname
+        gts.write(threads=2, index=True)
+
+        # the index should let us read just one region
+        new_gts = GenotypesVCF(fname)
+        new_gts.read(region="1:10116-10117")
+        np.testing.assert_allclose(new_gts.data, gts.data[:, 1:3])
+        for col in ("chrom", "pos", "id", "alleles"):
+            assert new_gts.variants[col].tolist() == gts.variants[col][1:3].tolist()
+
+        index = Path(f"{fname}.tbi" if ext == "vcf.gz" else f"{fname}.csi")
+        index.unlink()
+        fname.unlink()
+
+    def test_write_chunks(self):
+        expected = GenotypesVCF(DATADIR / "simple-multiallelic.vcf")
+        expected.read()
+
+        fname = DATADIR / "test_write_chunks.vcf.gz"
+        gts = GenotypesVCF(fname)
+        gts.samples = expected.samples
+        chunks = expected.iter_chunks(chunk_size=2)
+        with gts.write_chunks(contigs=["1"], index=True) as writer:
+            for chunk in chunks:
+                writer.append(chunk.data, chunk.variants)
+        assert writer.num_written == len(expected.variants)
+
+        # an error shouldn't leave a half-written file behind
+        fname_error = DATADIR / "test_write_chunks_error.vcf"
+        gts.fname = fname_error
+        with pytest.raises(RuntimeError):
+            with gts.write_chunks(contigs=["1"]) as writer:
+                writer.append(expected.data[:, :2], expected.variants[:2])
+                raise RuntimeError("interrupted")
+        assert not fname_error.exists()
+        gts.fname = fname
+
+        new_gts = GenotypesVCF(fname)
+        new_gts.read(region="1:10116-10117")
+        np.testing.assert_allclose(new_gts.data, expected.data[:, 1:3])
+        new_gts.read()
+        np.testing.assert_allclose(new_gts.data, expected.data)
+        assert new_gts.samples == expected.samples
+        for col in ("chrom", "pos", "id", "alleles"):
+            assert new_gts.variants[col].tolist() == expected.variants[col].tolist()
+
+        # the variants can also be read on their own, without any genotypes
+        new_gts = GenotypesVCF(fname)
+        new_gts.read_variants(max_variants=2)
+        assert new_gts.variants["id"].tolist() == expected.variants["id"][:2].tolist()
+
+        Path(f"{fname}.tbi").unlink()
+        fname.unlink()
+
     def test_write_empty(self):
         fname = Path("test.vcf")
         gts = GenotypesVCF(fname=fname)
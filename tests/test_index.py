@@ -82,3 +82,33 @@ def test_no_sort(capfd):
 
     Path("test.hap.gz").unlink()
     Path("test.hap.gz").with_suffix(".gz.tbi").unlink()
+
+
+def test_ids(capfd):
+    file = DATADIR / "simple.vcf.gz"
+    tmp_file = Path("test.vcf.gz")
+
+    # copy the file so that we don't affect anything in the tests/data directory
+    shutil.copy(str(file), str(tmp_file))
+    shutil.copy(str(file) + ".tbi", str(tmp_file) + ".tbi")
+
+    cmd = f"index --ids {tmp_file}"
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+    captured = capfd.readouterr()
+    assert captured.out == ""
+    assert result.exit_code == 0
+
+    # check that the index lists every variant in the file
+    with np.load(str(tmp_file) + ".hidx") as index:
+        assert index["id"].astype(str).tolist() == [
+            "1:10114:T:C",
+            "1:10116:A:G",
+            "1:10117:C:A",
+            "1:10122:A:G",
+        ]
+        assert index["pos"].tolist() == [10114, 10116, 10117, 10122]
+
+    tmp_file.unlink()
+    Path(str(tmp_file) + ".tbi").unlink()
+    Path(str(tmp_file) + ".hidx").unlink()
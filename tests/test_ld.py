@@ -1,6 +1,7 @@
 import math
 from pathlib import Path
 
+import pytest
 import numpy as np
 from click.testing import CliRunner
 
@@ -68,7 +69,8 @@ def test_ld(seed=42):
     np.testing.assert_allclose(old_ld, ld[0])
 
 
-def test_basic(capfd):
+@pytest.mark.parametrize("workers", [1, 2])
+def test_basic(capfd, workers):
     expected = """#\torderH\tld
 #\tversion\t0.2.0
 #H\tld\t.3f\tLinkage-disequilibrium
@@ -83,7 +85,7 @@ V\tchr21.q.3365*11\t26938989\t26938989\t21_26938989_G_A\tA
     gt_file = DATADIR / "example.vcf.gz"
     hp_file = DATADIR / "basic.hap.gz"
 
-    cmd = f"ld chr21.q.3365*1 {gt_file} {hp_file}"
+    cmd = f"ld --workers {workers} chr21.q.3365*1 {gt_file} {hp_file}"
     runner = CliRunner()
     result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
     captured = capfd.readouterr()
@@ -1,7 +1,9 @@
 import os
+import shutil
 from pathlib import Path
 
 import pytest
+import pysam
 import numpy as np
 import numpy.lib.recfunctions as rfn
 from click.testing import CliRunner
@@ -59,6 +61,47 @@ class TestGenotypesAncestry:
         np.testing.assert_allclose(gts.ancestry, expected.ancestry)
         assert gts.samples == expected.samples
 
+    def test_load_genotypes_ancestry_parallel(self):
+        expected = self._get_fake_genotypes()
+
+        # compress and index a copy of the VCF so that it can be split into shards
+        fname = DATADIR / "simple-ancestry-parallel.vcf"
+        fname.write_text(self.file.read_text())
+        fname = Path(pysam.tabix_index(str(fname), preset="vcf", force=True))
+
+        gts = GenotypesAncestry(fname)
+        gts.read(workers=4)
+        np.testing.assert_allclose(gts.data, expected.data)
+        assert gts.ancestry_labels == expected.ancestry_labels
+        np.testing.assert_allclose(gts.ancestry, expected.ancestry)
+        assert gts.samples == expected.samples
+
+        fname.with_suffix(".gz.tbi").unlink()
+        fname.unlink()
+
+    def test_load_genotypes_qc(self):
+        expected = self._get_fake_genotypes()
+
+        # an empty set of checks shouldn't change anything
+        gts = GenotypesAncestry.load(self.file, qc={})
+        np.testing.assert_allclose(gts.data, expected.data)
+        np.testing.assert_allclose(gts.ancestry, expected.ancestry)
+
+        # only the second variant has any ALT alleles, so it's the only one to survive
+        qc = {
+            "missing": {"discard_also": True},
+            "biallelic": {"discard_also": True},
+            "maf": {"threshold": 0.01, "discard_also": True},
+        }
+        gts = GenotypesAncestry(self.file)
+        gts.read(qc=qc)
+        np.testing.assert_allclose(gts.data, expected.data[:, [1]])
+        np.testing.assert_allclose(gts.ancestry, expected.ancestry[:, [1]])
+        assert gts.variants["id"].tolist() == ["1:10116:A:G"]
+
+        with pytest.raises(ValueError):
+            GenotypesAncestry(self.file).read(qc={"unknown": {}})
+
     def test_load_genotypes_iterate(self, caplog):
         expected = self._get_expected_ancestry().transpose((1, 0, 2))
 
@@ -126,9 +169,29 @@ class TestGenotypesAncestry:
         np.testing.assert_allclose(gts_sub.ancestry, expected_ancestry)
         assert np.array_equal(gts_sub.variants, expected_variants)
 
-    @pytest.mark.xfail(reason="not implemented yet")
     def test_write_genotypes(self):
-        assert False
+        gts = self._get_fake_genotypes()
+        gts.popnum_ancestry = {num: pop for pop, num in gts.ancestry_labels.items()}
+        gts.valid_labels = np.array(
+            [[(f"{samp}-1", f"{samp}-2")] * gts.data.shape[1] for samp in gts.samples]
+        )
+        gts.fname = DATADIR / "simple-ancestry-write.vcf"
+        gts.write()
+
+        new_gts = GenotypesAncestry(gts.fname)
+        new_gts.read()
+        np.testing.assert_allclose(new_gts.data, gts.data)
+        assert new_gts.ancestry_labels == gts.ancestry_labels
+        np.testing.assert_allclose(new_gts.ancestry, gts.ancestry)
+        assert new_gts.samples == gts.samples
+
+        # check that the origin of each allele was also written
+        with pysam.VariantFile(str(gts.fname)) as vcf:
+            for record in vcf:
+                for samp in gts.samples:
+                    assert record.samples[samp]["SAMPLE"] == (f"{samp}-1", f"{samp}-2")
+
+        gts.fname.unlink()
 
     @pytest.mark.xfail(reason="not implemented yet")
     def test_write_genotypes_phase(self, prephased=True):
@@ -234,6 +297,193 @@ def test_basic(capfd):
     assert result.exit_code == 0
 
 
+def test_basic_threads(capfd, caplog):
+    expected = """##fileformat=VCFv4.2
+##FILTER=<ID=PASS,Description="All filters passed">
+##contig=<ID=1>
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tHG00096\tHG00097\tHG00099\tHG00100\tHG00101
+1\t10114\tH1\tA\tT\t.\t.\t.\tGT\t0|1\t0|1\t1|1\t1|1\t0|0
+1\t10114\tH2\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+1\t10116\tH3\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+"""
+    gt_file = DATADIR / "simple.vcf.gz"
+    hp_file = DATADIR / "simple.hap"
+
+    cmd = f"transform --threads 2 {gt_file} {hp_file}"
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+    captured = capfd.readouterr()
+    assert captured.out == expected
+    assert result.exit_code == 0
+    # --threads is just a deprecated alias of --workers
+    assert "--threads is deprecated" in caplog.text
+
+    cmd = f"transform --threads 2 --workers 2 {gt_file} {hp_file}"
+    result = runner.invoke(main, cmd.split(" "))
+    assert result.exit_code != 0
+
+
+@pytest.mark.parametrize("gt_file", ["simple.vcf.gz", "simple.pgen"])
+@pytest.mark.parametrize("chunk_size", [1, None])
+def test_basic_streaming(capfd, gt_file, chunk_size):
+    expected = """##fileformat=VCFv4.2
+##FILTER=<ID=PASS,Description="All filters passed">
+##contig=<ID=1>
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tHG00096\tHG00097\tHG00099\tHG00100\tHG00101
+1\t10114\tH1\tA\tT\t.\t.\t.\tGT\t0|1\t0|1\t1|1\t1|1\t0|0
+1\t10114\tH2\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+1\t10116\tH3\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+"""
+    gt_file = DATADIR / gt_file
+    hp_file = DATADIR / "simple.hap"
+
+    cmd = f"transform --streaming {gt_file} {hp_file}"
+    if chunk_size is not None:
+        cmd += f" --chunk-size {chunk_size}"
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+    captured = capfd.readouterr()
+    assert captured.out == expected
+    assert result.exit_code == 0
+
+
+def test_streaming_missing_variant(capfd):
+    # one variant takes the ID of another, so two of the haplotypes can't be
+    # transformed even though the number of variants seems to add up
+    gt_file = Path("test_streaming_missing.vcf")
+    gt_file.write_text(
+        (DATADIR / "simple.vcf").read_text().replace("1:10117:C:A", "1:10116:A:G")
+    )
+    hp_file = DATADIR / "simple.hap"
+    out_file = Path("test_streaming_missing.out.vcf")
+
+    cmd = f"transform --streaming -o {out_file} {gt_file} {hp_file}"
+    runner = CliRunner()
+    with pytest.raises(ValueError, match="H2"):
+        runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+    assert not out_file.exists()
+
+    gt_file.unlink()
+
+
+def test_workers_contig_mismatch(capfd):
+    # the contigs in the .hap file needn't match those in the genotypes file, since
+    # the variants are matched by their IDs
+    gt_file = DATADIR / "simple.vcf.gz"
+    hp_file = Path("test_workers_chr.hap")
+    hp_file.write_text(
+        "".join(
+            "\t".join(
+                ("chr1" if line.startswith("H\t") and idx == 1 else val)
+                for idx, val in enumerate(line.split("\t"))
+            )
+            for line in (DATADIR / "simple.hap").read_text().splitlines(keepends=True)
+        )
+    )
+
+    outputs = []
+    for workers in (1, 2):
+        cmd = f"transform --workers {workers} {gt_file} {hp_file}"
+        runner = CliRunner()
+        result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+        assert result.exit_code == 0
+        outputs.append(capfd.readouterr().out)
+    assert outputs[0] == outputs[1]
+    assert [line.split("\t")[2] for line in outputs[1].splitlines()[-3:]] == [
+        "H1",
+        "H2",
+        "H3",
+    ]
+
+    hp_file.unlink()
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_basic_workers(capfd, workers):
+    expected = """##fileformat=VCFv4.2
+##FILTER=<ID=PASS,Description="All filters passed">
+##contig=<ID=2>
+##contig=<ID=1>
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tHG00096\tHG00097\tHG00099\tHG00100\tHG00101
+2\t10116\tH6\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+2\t10114\tH4\tA\tT\t.\t.\t.\tGT\t0|1\t0|1\t1|1\t1|1\t0|0
+1\t10114\tH1\tA\tT\t.\t.\t.\tGT\t0|1\t0|1\t1|1\t1|1\t0|0
+1\t10114\tH2\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+1\t10116\tH3\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+"""
+    gt_file = DATADIR / "simple-two-contigs.vcf.gz"
+    hp_file = DATADIR / "simple-two-contigs.hap"
+
+    # first, copy the variants in the genotypes file onto a second contig
+    gts = GenotypesVCF.load(DATADIR / "simple.vcf")
+    variants = gts.variants.copy()
+    variants["chrom"] = "2"
+    variants["id"] = [vr_id.replace("1:", "2:", 1) for vr_id in variants["id"]]
+    gts.variants = np.concatenate((gts.variants, variants))
+    gts.data = np.concatenate((gts.data, gts.data), axis=1)
+    gts.fname = gt_file
+    gts.write(index=True)
+    # and put haplotypes on the second contig before those on the first
+    haps = (DATADIR / "simple.hap").read_text().splitlines(keepends=True)
+    hp_file.write_text(
+        "".join(haps[:4])
+        + "H\t2\t10116\t10119\tH6\tASW\t0.25\n"
+        + "H\t2\t10114\t10118\tH4\tYRI\t0.75\n"
+        + "V\tH4\t10114\t10115\t2:10114:T:C\tT\n"
+        + "V\tH4\t10116\t10117\t2:10116:A:G\tG\n"
+        + "V\tH6\t10116\t10117\t2:10116:A:G\tA\n"
+        + "V\tH6\t10117\t10118\t2:10117:C:A\tA\n"
+        + "".join(haps[4:])
+    )
+
+    cmd = f"transform --workers {workers} {gt_file} {hp_file}"
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+    captured = capfd.readouterr()
+    assert captured.out == expected
+    assert result.exit_code == 0
+
+    hp_file.unlink()
+    gt_file.with_suffix(".gz.tbi").unlink()
+    gt_file.unlink()
+
+
+def test_basic_cache(capfd):
+    expected = """##fileformat=VCFv4.2
+##FILTER=<ID=PASS,Description="All filters passed">
+##contig=<ID=1>
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tHG00096\tHG00097\tHG00099\tHG00100\tHG00101
+1\t10114\tH1\tA\tT\t.\t.\t.\tGT\t0|1\t0|1\t1|1\t1|1\t0|0
+1\t10114\tH2\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+1\t10116\tH3\tA\tT\t.\t.\t.\tGT\t0|0\t0|0\t0|0\t0|0\t0|0
+"""
+    gt_file = DATADIR / "simple.vcf.gz"
+    hp_file = DATADIR / "simple.hap"
+    cache_dir = Path("transform.cache")
+
+    # the second run should load the genotypes of every haplotype from the cache
+    cmd = f"transform --cache-dir {cache_dir} {gt_file} {hp_file}"
+    for i in range(2):
+        runner = CliRunner()
+        result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+        captured = capfd.readouterr()
+        assert captured.out == expected
+        assert result.exit_code == 0
+        assert len(list(cache_dir.iterdir())) == 1
+
+    # caching cannot be combined with --ancestry
+    cmd = f"transform --ancestry --cache-dir {cache_dir} {gt_file} {hp_file}"
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "))
+    assert result.exit_code != 0
+
+    shutil.rmtree(cache_dir)
+
+
 def test_basic_multiallelic(capfd):
     expected = """##fileformat=VCFv4.2
 ##FILTER=<ID=PASS,Description="All filters passed">
@@ -338,6 +588,49 @@ def test_pgen_two_samples(capfd):
     assert result.exit_code == 0
 
 
+def test_pgen_two_samples_streaming(capfd):
+    pytest.importorskip("pgenlib")
+    expected = np.array(
+        [
+            [[0, 1, 1]],
+            [[0, 0, 1]],
+        ],
+        dtype=np.uint8,
+    )
+    gt_file = DATADIR / "apoe.vcf.gz"
+    hp_file = DATADIR / "apoe4.hap"
+
+    cmd = (
+        "transform --streaming -c 1 -o output.pgen -s HG00097 -s NA12878 "
+        f"{gt_file} {hp_file}"
+    )
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "), catch_exceptions=False)
+    captured = capfd.readouterr()
+    assert captured.out == ""
+    output = Path("output.pgen")
+    gt = GenotypesPLINK(output)
+    gt.read()
+    np.testing.assert_allclose(gt.data, expected)
+    assert tuple(gt.variants[["id", "chrom", "pos"]][0]) == ("APOe4", "19", 45411941)
+    assert gt.samples == ("HG00097", "NA12878")
+    output.unlink()
+    output.with_suffix(".pvar").unlink()
+    output.with_suffix(".psam").unlink()
+    assert result.exit_code == 0
+
+
+def test_streaming_ancestry(capfd):
+    gt_file = DATADIR / "simple-ancestry.vcf"
+    hp_file = DATADIR / "simple.hap"
+
+    # streaming cannot be combined with --ancestry
+    cmd = f"transform --streaming --ancestry {gt_file} {hp_file}"
+    runner = CliRunner()
+    result = runner.invoke(main, cmd.split(" "))
+    assert result.exit_code != 0
+
+
 ancestry_results = """##fileformat=VCFv4.2
 ##FILTER=<ID=PASS,Description="All filters passed">
 ##contig=<ID=1>